@@ -1,28 +1,22 @@
 import serial
 import time
 from print_utils import print_frame
-from serial_utils import choose_serial_port, find_frame_start
-from can_parser import parse_frame_exclude_sof  # your CAN frame parser
+from serial_utils import choose_serial_port, FrameScanner
 
 def main():
     port = choose_serial_port()
     ser = serial.Serial(port, baudrate=115200, timeout=0.1)
 
-    buffer = bytearray()
-    FRAME_SIZE = 64  # or your actual frame size
+    scanner = FrameScanner()  # checksum per xor_common.INCLUDE_SOF_IN_CHECKSUM
 
     while True:
         data = ser.read(128)  # read up to 128 bytes at a time
         if data:
-            buffer.extend(data)
+            scanner.feed(data)
 
-            # Look for a valid frame in the buffer
-            idx = find_frame_start(buffer, parse_frame_exclude_sof)
-            if idx >= 0:
-                frame = buffer[idx:idx+FRAME_SIZE]
+            # Every valid frame in what's come in so far
+            while (frame := scanner.next_frame()) is not None:
                 print_frame(frame, label="CAN Frame")
-                # Remove processed frame from buffer
-                buffer = buffer[idx+FRAME_SIZE:]
         else:
             time.sleep(0.01)
 
@@ -1,12 +1,23 @@
 import sys
+import time
 import argparse
 
+from xor_fast import HAVE_NUMPY, frame_checksum, verify_xor_batch
+from xor_common import SOF
+from serial_utils import FrameScanner
+from pcap_utils import LINKTYPE_USER0, file_header, pack_records
+
+FRAME_SIZE = 64
+CHECKSUM_INDEX = 63
+# --pcap mode reads up to this many frames' worth of bytes per read into one reused buffer,
+# checks them all in one verify_xor_batch() and writes the good ones in one write()
+# (falling back to serial_utils.FrameScanner to find the frames again when they stop lining up).
+# Each read takes whatever has arrived (readinto1), so a slow source isn't held back until it fills a block.
+DEFAULT_BLOCK_FRAMES = 1024
+
 def xor_checksum(buffer, include_sof):
-    start_idx = 0 if include_sof else 1
-    checksum = 0x00
-    for b in buffer[start_idx:63]:  # assuming 64-byte buffer, last byte checksum
-        checksum ^= b
-    return checksum
+    # assuming 64-byte buffer, last byte checksum
+    return frame_checksum(buffer, 63, include_sof)
 
 def parse_frame(frame_bytes, include_sof):
     # frame_bytes should be a bytes or bytearray of length 64
@@ -23,17 +34,125 @@ def parse_frame(frame_bytes, include_sof):
     print(f"Checksum calc: {calc_checksum:02X}, Frame checksum: {frame_checksum:02X}, Valid: {valid}")
     print()
 
+def _leading_valid(valid, count):
+    """How many of the `count` frames verify_xor_batch() checked pass before the first bad one."""
+    if HAVE_NUMPY:
+        return count if valid.all() else int(valid.argmin())
+    return valid.index(False) if False in valid else count
+
+def stream_to_pcap(infile, out, include_sof, pcapng=False, linktype=LINKTYPE_USER0,
+                   block_frames=DEFAULT_BLOCK_FRAMES):
+    """
+    Frames from `infile` (64 bytes each) to `out` as pcap / pcapng records, each one stamped
+    with the time the read that completed it returned. While frames come back to back they
+    are checked a block at a time; at the first bad one (checksum, or no SOF where a frame
+    should start) a FrameScanner takes over until it finds a good frame followed by another
+    SOF, and batching picks up again right after it. Only frames that pass are written.
+    Runs to EOF or Ctrl+C / the reader going away, returns (valid frames, times sync was lost,
+    bytes skipped to resync) either way.
+    """
+    buf = bytearray(block_frames * FRAME_SIZE)
+    view = memoryview(buf)
+    filled = 0
+    # One read, at most, per call on a BufferedReader like stdin: whatever the pipe has, not a full block
+    readinto = getattr(infile, 'readinto1', infile.readinto)
+    scanner = None # a FrameScanner while out of sync
+    valid_frames = 0
+    resyncs = 0
+    skipped_bytes = 0
+
+    try:
+        out.write(file_header(linktype, pcapng))
+        out.flush()
+        while True:
+            n = readinto(view[filled:])
+            if not n:
+                break  # EOF, an incomplete frame left in the buffer is dropped
+            filled += n
+            ts_ns = time.time_ns()
+            while True:
+                if scanner is not None:
+                    scanner.feed(view[:filled])
+                    filled = 0
+                    frame = scanner.next_frame()
+                    if frame is None:
+                        break
+                    out.write(pack_records(frame, 1, FRAME_SIZE, None, ts_ns, pcapng))
+                    valid_frames += 1
+                    skipped_bytes += scanner.discarded
+                    # The scanner stopped right after a good frame, so what it still holds is aligned again
+                    # (and shorter than buf: it never holds more than one read plus a partial frame)
+                    rest = scanner.buf[scanner.pos:]
+                    filled = len(rest)
+                    buf[:filled] = rest
+                    scanner = None
+
+                count = filled // FRAME_SIZE
+                if not count:
+                    break
+                valid, _ = verify_xor_batch(buf, count, 0, FRAME_SIZE, CHECKSUM_INDEX, include_sof, SOF)
+                good = _leading_valid(valid, count)
+                # Every frame in the run is followed by a SOF (the next one's) except maybe the last:
+                # if what comes after it is already here and isn't a SOF, it's a frame that gained or
+                # lost a byte and still XORed right by chance. (Nothing after it yet: it goes out on its
+                # checksum alone rather than waiting for the next frame.)
+                if good and good * FRAME_SIZE < filled and buf[good * FRAME_SIZE] != SOF:
+                    good -= 1
+                if good:
+                    out.write(pack_records(buf, good, FRAME_SIZE, None, ts_ns, pcapng))
+                    valid_frames += good
+                used = good * FRAME_SIZE
+                if good < count:
+                    # Lost sync (a dropped or extra byte shifts every frame after it): hand the rest to a scanner
+                    resyncs += 1
+                    scanner = FrameScanner(include_sof, FRAME_SIZE, chained=True)
+                    scanner.feed(view[used:filled])
+                    filled = 0
+                    continue
+                # Carry the partial frame at the end over to the front for the next read
+                buf[:filled - used] = buf[used:filled]
+                filled -= used
+                break
+            out.flush()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    if scanner is not None:
+        skipped_bytes += scanner.discarded
+    return valid_frames, resyncs, skipped_bytes
+
 def main():
     parser = argparse.ArgumentParser(description="CAN extcap parser with optional SOF checksum inclusion")
     parser.add_argument("--include-sof", action="store_true",
                         help="Include SOF (first byte) in XOR checksum calculation")
     parser.add_argument("inputfile", nargs="?", type=argparse.FileType('rb'), default=sys.stdin.buffer,
                         help="Input file or stdin (binary frame stream)")
+    parser.add_argument("--pcap", metavar="OUTPUT",
+                        help="Write the valid frames to this pcap file ('-' for stdout, "
+                             "e.g. piped into wireshark -k -i -) instead of printing every frame")
+    parser.add_argument("--pcapng", action="store_true", help="With --pcap: write pcapng instead")
+    parser.add_argument("--dlt", type=int, default=LINKTYPE_USER0,
+                        help="With --pcap: link type of the records (default %(default)s, DLT_USER0)")
+    parser.add_argument("--block-frames", type=int, default=DEFAULT_BLOCK_FRAMES,
+                        help="With --pcap: frames read and checked per batch (default %(default)s)")
 
     args = parser.parse_args()
 
     include_sof = args.include_sof
 
+    if args.pcap:
+        if args.block_frames < 1:
+            parser.error("--block-frames must be at least 1")
+        out = sys.stdout.buffer if args.pcap == '-' else open(args.pcap, 'wb')
+        try:
+            valid_frames, resyncs, skipped_bytes = stream_to_pcap(args.inputfile, out, include_sof, args.pcapng,
+                                                                  args.dlt, args.block_frames)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        print(f"{valid_frames} valid frames written, lost sync {resyncs} times, "
+              f"skipped {skipped_bytes} bytes to resync", file=sys.stderr)
+        return
+
     # Example: read frames in chunks of 64 bytes
     while True:
         frame = args.inputfile.read(64)
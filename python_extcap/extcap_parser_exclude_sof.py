@@ -2,10 +2,10 @@ import serial
 import serial.tools.list_ports
 import sys
 
+from xor_fast import frame_checksum
+
 def parse_frame_exclude_sof(frame_bytes):
-    checksum = 0
-    for b in frame_bytes[1:-1]:  # exclude SOF and checksum
-        checksum ^= b
+    checksum = frame_checksum(frame_bytes, include_sof=False)  # exclude SOF and checksum
     expected_checksum = frame_bytes[-1]
     valid = (checksum == expected_checksum)
     return valid, checksum
@@ -1,16 +1,6 @@
 import serial
-from xor_common import SOF, FRAME_SIZE, verify_frame_checksum
-from serial_utils import choose_serial_port, find_frame_start
-from print_utils import print_frame
-
-
-def parse_frame_exclude_sof(frame_bytes):
-    """
-    Wrapper around verify_frame_checksum to maintain same interface.
-    Returns (valid, checksum)
-    """
-    valid, checksum = verify_frame_checksum(frame_bytes)
-    return valid, checksum
+from serial_utils import choose_serial_port, FrameScanner
+from print_utils import COLOR_CODES, print_frame
 
 
 def main():
@@ -18,30 +8,22 @@ def main():
     ser = serial.Serial(port, baudrate=115200, timeout=1)
     print(f"Reading from {port}...")
 
-    buffer = bytearray()
+    # Keeps the unread bytes and their running XOR between reads, so junk
+    # is skipped in one pass instead of being rescanned on every read.
+    # It only hands out frames whose checksum matched, so everything it
+    # rejects (junk, bad frames) shows up as the red skipped-bytes count.
+    scanner = FrameScanner()
+    discarded = 0
 
     while True:
-        data = ser.read(128)
-        buffer.extend(data)
-
-        while len(buffer) >= FRAME_SIZE:
-            if buffer[0] != SOF:
-                offset = find_frame_start(buffer, parse_frame_exclude_sof)
-                if offset == -1:
-                    buffer = buffer[-FRAME_SIZE:]  # discard junk
-                    break
-                else:
-                    buffer = buffer[offset:]
-
-            frame = buffer[:FRAME_SIZE]
-            valid, checksum = parse_frame_exclude_sof(frame)
-            color = "green" if valid else "red"
-            print_frame(frame, label=f"Checksum {checksum:02X} Valid={valid}", color=color)
-
-            if valid:
-                buffer = buffer[FRAME_SIZE:]
-            else:
-                buffer = buffer[1:]  # try to resync
+        scanner.feed(ser.read(128))
+
+        while (frame := scanner.next_frame()) is not None:
+            if scanner.discarded != discarded:
+                print(f"{COLOR_CODES['red']}Skipped {scanner.discarded - discarded} bytes (junk or bad checksum) "
+                      f"to resync{COLOR_CODES['reset']}")
+                discarded = scanner.discarded
+            print_frame(frame, label=f"Checksum {frame[-1]:02X}", color="green")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,11 @@
 import sys
 
+from xor_fast import frame_checksum
+
 def parse_frame_include_sof(frame_bytes):
     # frame_bytes is a bytes object representing the full 64-byte frame
     # XOR checksum includes the first byte (SOF)
-    checksum = 0
-    for b in frame_bytes[:-1]:  # exclude last byte where checksum is stored
-        checksum ^= b
+    checksum = frame_checksum(frame_bytes)  # exclude last byte where checksum is stored
     expected_checksum = frame_bytes[-1]
     valid = (checksum == expected_checksum)
     return valid, checksum
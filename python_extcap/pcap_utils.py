@@ -0,0 +1,90 @@
+# pcap_utils.py
+# Just enough pcap / pcapng writing for the 64-byte frames (the full batching
+# writer lives in wiresharks_testing/pcap_writer.py, this folder's scripts run
+# on their own, so the few helpers they need are repeated here).
+#
+# The frames have no standard link type, so they go out whole under one of the
+# "user" DLTs (147-162). In Wireshark: Preferences > Protocols > DLT_USER to
+# hand them to a dissector, or just look at the bytes.
+#
+# Every frame in one block gets the same timestamp and length, so every record
+# header in it is the same bytes: pack_records() builds it once and, with
+# numpy, lays all the records out as rows of one (N, record size) array.
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LINKTYPE_USER0 = 147
+SNAPLEN = 65535
+
+PCAP_GLOBAL_HEADER = struct.Struct('<IHHiIII')  # magic, version 2.4, tz, sigfigs, snaplen, linktype
+PCAP_RECORD_HEADER = struct.Struct('<IIII')  # ts_sec, ts_usec, incl_len, orig_len
+
+PCAPNG_SHB_TYPE = 0x0A0D0D0A
+PCAPNG_IDB_TYPE = 0x00000001
+PCAPNG_EPB_TYPE = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+IF_TSRESOL = 9
+TSRESOL_NANOSECONDS = 9
+# block type, total length, interface id, ts high, ts low, captured len, original len
+PCAPNG_EPB_HEADER = struct.Struct('<IIIIIII')
+
+
+def _pad4(n):
+    return (4 - n % 4) % 4
+
+
+def _pcapng_block(block_type, body):
+    total_len = 12 + len(body)
+    return struct.pack('<II', block_type, total_len) + body + struct.pack('<I', total_len)
+
+
+def file_header(linktype=LINKTYPE_USER0, pcapng=False):
+    """What goes at the start of the file: pcap global header, or pcapng SHB + one IDB (nanosecond timestamps)."""
+    if not pcapng:
+        return PCAP_GLOBAL_HEADER.pack(0xA1B2C3D4, 2, 4, 0, 0, SNAPLEN, linktype)
+    shb = _pcapng_block(PCAPNG_SHB_TYPE, struct.pack('<IHHq', PCAPNG_BYTE_ORDER_MAGIC, 1, 0, -1))
+    tsresol = struct.pack('<HHB3x', IF_TSRESOL, 1, TSRESOL_NANOSECONDS)
+    end_of_options = bytes(4)
+    idb = _pcapng_block(PCAPNG_IDB_TYPE, struct.pack('<HHI', linktype, 0, SNAPLEN) + tsresol + end_of_options)
+    return shb + idb
+
+
+def record_framing(ts_ns, length, pcapng=False):
+    """(header, trailer) around one `length`-byte packet: pcap record header, or pcapng EPB header + padding/length."""
+    if not pcapng:
+        ts_sec, ts_rem = divmod(ts_ns, 1_000_000_000)
+        return PCAP_RECORD_HEADER.pack(ts_sec, ts_rem // 1000, length, length), b''
+    pad = _pad4(length)
+    total_len = PCAPNG_EPB_HEADER.size + length + pad + 4
+    header = PCAPNG_EPB_HEADER.pack(PCAPNG_EPB_TYPE, total_len, 0, ts_ns >> 32, ts_ns & 0xFFFFFFFF, length, length)
+    return header, bytes(pad) + struct.pack('<I', total_len)
+
+
+def pack_records(buf, count, frame_size, keep, ts_ns, pcapng=False):
+    """
+    The records for the frames of `buf` (`count` back-to-back frames) where `keep` is True
+    (all of them for keep=None), all stamped `ts_ns`, as one bytes-like object ready to write.
+    """
+    header, trailer = record_framing(ts_ns, frame_size, pcapng)
+    if np is not None:
+        frames = np.frombuffer(buf, dtype=np.uint8, count=count * frame_size).reshape(count, frame_size)
+        if keep is not None:
+            frames = frames[np.asarray(keep, dtype=bool)]
+        records = np.empty((len(frames), len(header) + frame_size + len(trailer)), dtype=np.uint8)
+        records[:, :len(header)] = np.frombuffer(header, dtype=np.uint8)
+        records[:, len(header):len(header) + frame_size] = frames
+        if trailer:
+            records[:, len(header) + frame_size:] = np.frombuffer(trailer, dtype=np.uint8)
+        return records.data
+    out = bytearray()
+    view = memoryview(buf)
+    for i, ok in enumerate(keep if keep is not None else [True] * count):
+        if ok:
+            out += header
+            out += view[i * frame_size:(i + 1) * frame_size]
+            out += trailer
+    return out
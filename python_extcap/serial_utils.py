@@ -1,8 +1,24 @@
 # serial_utils.py
 import sys
+from itertools import accumulate
+from operator import xor
+
 import serial.tools.list_ports
 
-from common import SOF, FRAME_SIZE
+from xor_common import SOF, FRAME_SIZE, INCLUDE_SOF_IN_CHECKSUM
+
+# Finding frames without re-checksumming every candidate:
+# P[k] = XOR of the first k bytes (running XOR, itertools.accumulate does it in C).
+# The XOR of the window buf[i:i + FRAME_SIZE] is then just P[i] ^ P[i + FRAME_SIZE],
+# one operation per offset instead of 63. A frame is valid when the XOR of the bytes
+# the checksum covers equals the checksum byte, i.e. when the whole window XORs to
+# 0 (SOF included in the checksum) or to the SOF (SOF excluded), wherever in the
+# frame the checksum byte sits.
+WINDOW_XOR_SOF_INCLUDED = 0
+WINDOW_XOR_SOF_EXCLUDED = SOF
+
+COMPACT_AFTER = 4096  # consumed bytes FrameScanner keeps before moving the rest to the front
+
 
 def choose_serial_port():
     ports = list(serial.tools.list_ports.comports())
@@ -22,11 +38,90 @@ def choose_serial_port():
         print("Invalid choice.")
         sys.exit(1)
 
-def find_frame_start(buf, parse_frame_exclude_sof):
-    for i in range(len(buf)):
-        if buf[i] == SOF and (i + FRAME_SIZE) <= len(buf):
-            candidate = buf[i:i + FRAME_SIZE]
-            valid, _ = parse_frame_exclude_sof(candidate)
+
+def _window_targets(include_sof):
+    return (WINDOW_XOR_SOF_INCLUDED,) if include_sof else (WINDOW_XOR_SOF_EXCLUDED,)
+
+
+def find_frame_start(buf, parse_frame_exclude_sof=None):
+    """
+    Offset of the first valid frame in `buf`, -1 if there isn't one.
+    One pass: the running XOR says which SOF positions can be frames at all, only
+    those get `parse_frame_exclude_sof` (returns (valid, checksum)) as a final check.
+    Without it the running XOR decides alone, with INCLUDE_SOF_IN_CHECKSUM.
+    """
+    if parse_frame_exclude_sof is None:
+        targets = _window_targets(INCLUDE_SOF_IN_CHECKSUM)
+    else:
+        # Don't know which way the parser counts the SOF, let both through to it
+        targets = (WINDOW_XOR_SOF_INCLUDED, WINDOW_XOR_SOF_EXCLUDED)
+    prefix = list(accumulate(buf, xor, initial=0))
+    last_start = len(buf) - FRAME_SIZE
+    i = buf.find(SOF) if last_start >= 0 else -1
+    while i != -1 and i <= last_start:
+        if prefix[i] ^ prefix[i + FRAME_SIZE] in targets:
+            if parse_frame_exclude_sof is None:
+                return i
+            valid, _ = parse_frame_exclude_sof(buf[i:i + FRAME_SIZE])
             if valid:
                 return i
+        i = buf.find(SOF, i + 1)
     return -1
+
+
+class FrameScanner:
+    """
+    find_frame_start for a stream: feed() it whatever ser.read() returned, then call
+    next_frame() until it returns None. Keeps the bytes and their running XOR across
+    chunks, and remembers how far it got, so no byte is looked at twice (a candidate
+    that needs bytes that haven't arrived yet is picked up where it left off).
+    `discarded` counts the junk bytes skipped to get to frames.
+    chained=True also wants the byte after a frame to be the next frame's SOF (and waits
+    for it): cuts the 1-in-256 windows that start at a SOF value inside a payload and
+    XOR right by chance, at the cost of the frame just before a damaged one.
+    """
+
+    def __init__(self, include_sof=INCLUDE_SOF_IN_CHECKSUM, frame_size=FRAME_SIZE, chained=False):
+        self.frame_size = frame_size
+        self.target = _window_targets(include_sof)[0]
+        self.chained = chained
+        self.buf = bytearray()
+        self.prefix = [0]  # prefix[k] = XOR of buf[:k], only differences matter so it never needs rebasing
+        self.pos = 0  # first byte not consumed or ruled out yet
+        self.discarded = 0
+
+    def feed(self, data):
+        self.buf += data
+        # accumulate() yields `initial` first, so it puts back the entry popped here
+        self.prefix += accumulate(data, xor, initial=self.prefix.pop())
+
+    def next_frame(self):
+        """The next valid frame (bytes), or None until more data comes in."""
+        buf = self.buf
+        prefix = self.prefix
+        frame_size = self.frame_size
+        target = self.target
+        chained = self.chained
+        last_start = len(buf) - frame_size - chained
+        i = buf.find(SOF, self.pos)
+        while i != -1 and i <= last_start:
+            if prefix[i] ^ prefix[i + frame_size] == target and (not chained or buf[i + frame_size] == SOF):
+                self.discarded += i - self.pos
+                self.pos = i + frame_size
+                frame = bytes(buf[i:self.pos])
+                self._compact()
+                return frame
+            i = buf.find(SOF, i + 1)
+        # Nothing more yet: everything before the next SOF is junk, keep the rest for the next feed()
+        stop = len(buf) if i == -1 else i
+        self.discarded += stop - self.pos
+        self.pos = stop
+        self._compact()
+        return None
+
+    def _compact(self):
+        """Drops consumed bytes once there are enough of them (one copy per COMPACT_AFTER bytes)."""
+        if self.pos >= COMPACT_AFTER or self.pos == len(self.buf):
+            del self.buf[:self.pos]
+            del self.prefix[:self.pos]
+            self.pos = 0
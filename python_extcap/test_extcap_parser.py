@@ -0,0 +1,83 @@
+# test_extcap_parser.py
+# --pcap mode must only ever write real frames, also after the stream slips
+# by a byte (a window straddling two frames XORs to 0 as well, the two SOFs cancel).
+# Run with: python -m pytest test_extcap_parser.py
+import io
+import random
+import struct
+
+import pytest
+
+from extcap_parser import FRAME_SIZE, stream_to_pcap
+from pcap_utils import PCAP_RECORD_HEADER
+from xor_common import SOF
+from xor_fast import frame_checksum
+
+
+def make_frames(n, include_sof, seed=1):
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(n):
+        frame = bytearray([SOF]) + bytearray(rng.randbytes(FRAME_SIZE - 1))
+        frame[-1] = frame_checksum(frame, -1, include_sof)
+        frames.append(bytes(frame))
+    return frames
+
+
+def pcap_packets(data):
+    packets = []
+    pos = 24
+    while pos < len(data):
+        incl_len = PCAP_RECORD_HEADER.unpack_from(data, pos)[2]
+        pos += PCAP_RECORD_HEADER.size
+        packets.append(data[pos:pos + incl_len])
+        pos += incl_len
+    return packets
+
+
+def run(stream, include_sof, block_frames=16):
+    out = io.BytesIO()
+    counts = stream_to_pcap(io.BytesIO(stream), out, include_sof, block_frames=block_frames)
+    return pcap_packets(out.getvalue()), counts
+
+
+@pytest.mark.parametrize("include_sof", [True, False])
+def test_clean_stream(include_sof):
+    frames = make_frames(100, include_sof)
+    packets, (valid, resyncs, skipped) = run(b''.join(frames), include_sof)
+    assert packets == frames
+    assert (valid, resyncs, skipped) == (100, 0, 0)
+
+
+@pytest.mark.parametrize("include_sof", [True, False])
+def test_dropped_byte_mid_stream(include_sof):
+    frames = make_frames(100, include_sof)
+    damaged = bytearray(frames[40])
+    del damaged[20]
+    packets, (valid, resyncs, _) = run(b''.join(frames[:40]) + damaged + b''.join(frames[41:]), include_sof)
+    assert packets == frames[:40] + frames[41:]
+    assert valid == 99 and resyncs == 1
+
+
+@pytest.mark.parametrize("include_sof", [True, False])
+def test_extra_bytes_mid_stream(include_sof):
+    frames = make_frames(100, include_sof)
+    stream = b''.join(frames[:33]) + bytes((SOF, 0x00, SOF)) + b''.join(frames[33:])
+    packets, (valid, resyncs, skipped) = run(stream, include_sof)
+    assert packets == frames
+    assert (valid, resyncs, skipped) == (100, 1, 3)
+
+
+@pytest.mark.parametrize("include_sof", [True, False])
+def test_damaged_frame_that_still_xors_right(include_sof):
+    frames = make_frames(100, include_sof)
+    # Checksum byte equal to the SOF, then the checksum byte goes missing: the frame's
+    # first 63 bytes plus the next frame's SOF are byte for byte a good frame
+    frame = bytearray(frames[40])
+    frame[1] ^= frame[-1] ^ SOF
+    frame[-1] = SOF
+    frames[40] = bytes(frame)
+    stream = b''.join(frames[:40]) + frames[40][:-1] + b''.join(frames[41:])
+    packets, (valid, resyncs, _) = run(stream, include_sof)
+    assert packets == frames[:40] + frames[41:]
+    assert valid == 99 and resyncs == 1
@@ -1,6 +1,9 @@
-# common.py
+# xor_common.py
+
+from xor_fast import frame_checksum, verify_xor_batch
 
 SOF = 0x69  # Can still be used symbolically
+FRAME_SIZE = 64  # SOF, ID, DLC, data, zero padding, checksum
 INCLUDE_SOF_IN_CHECKSUM = True
 
 def calculate_checksum(frame_bytes, checksum_index=-1):
@@ -9,16 +12,9 @@ def calculate_checksum(frame_bytes, checksum_index=-1):
     - `frame_bytes`: full buffer (including SOF and checksum byte).
     - `checksum_index`: where the checksum is stored. Defaults to last byte.
     """
-    # Exclude the checksum byte itself from the calculation
-    start_index = 0 if INCLUDE_SOF_IN_CHECKSUM else 1
-
-    # Use a slice that excludes the checksum byte
-    relevant = frame_bytes[start_index:checksum_index] + frame_bytes[checksum_index+1:]
-
-    checksum = 0
-    for b in relevant:
-        checksum ^= b
-    return checksum
+    # Everything except the checksum byte itself (and the SOF, if it isn't included),
+    # folded as one wide int instead of byte by byte (xor_fast.py)
+    return frame_checksum(frame_bytes, checksum_index, INCLUDE_SOF_IN_CHECKSUM)
 
 
 def verify_frame_checksum(frame_bytes, checksum_index=-1):
@@ -29,3 +25,11 @@ def verify_frame_checksum(frame_bytes, checksum_index=-1):
     computed = calculate_checksum(frame_bytes, checksum_index=checksum_index)
     expected = frame_bytes[checksum_index]
     return (computed == expected), computed
+
+
+def verify_frame_checksums(buf, count, offset=0, frame_size=FRAME_SIZE, checksum_index=-1):
+    """
+    verify_frame_checksum for `count` back-to-back frames in `buf` at once (numpy if it's there).
+    Returns (valid, computed), one entry per frame.
+    """
+    return verify_xor_batch(buf, count, offset, frame_size, checksum_index, INCLUDE_SOF_IN_CHECKSUM)
@@ -1,3 +1,7 @@
+import sys
+from array import array
+
+
 def generate_crc16_ccitt_table(poly=0x1021):
     table = []
     for byte in range(256): # this goes from 0-255
@@ -44,6 +48,31 @@ def generate_crc16_ccitt_table(poly=0x1021):
 #     writer = csv.writer(f)
 #     writer.writerow(table)
 
+def generate_crc16_slicing_tables(table, n=8):
+    """
+    Slicing-by-N tables built from the classic 256-entry table.
+    tables[0] is the classic table, tables[k][i] is what byte i does to the CRC
+    when k more bytes follow it, so N bytes can be folded in with N lookups XORed together:
+        crc = T[N-1][(crc >> 8) ^ b0] ^ T[N-2][(crc & 0xFF) ^ b1] ^ T[N-3][b2] ^ ... ^ T[0][b(N-1)]
+    """
+    tables = [array('H', table)]
+    for _ in range(1, n):
+        prev = tables[-1]
+        # push each entry through one more zero byte
+        tables.append(array('H', (((val << 8) & 0xFFFF) ^ table[val >> 8] for val in prev)))
+    return tables
+
+
+def generate_crc16_wide_table(slicing_tables):
+    """
+    65536-entry table that eats two bytes per step:
+        crc = wide[crc ^ ((b0 << 8) | b1)]
+    It's just the slicing-by-2 lookups (T[1] and T[0]) pre-combined for every 16-bit value.
+    """
+    t1, t0 = slicing_tables[1], slicing_tables[0]
+    return array('H', (t1[hi] ^ t0[lo] for hi in range(256) for lo in range(256)))
+
+
 def write_crc_h(table, filename="crc16_ccitt_table.h"):
     with open(filename, "w") as f:
         f.write("#pragma once\n\n")
@@ -68,8 +97,58 @@ def write_crc_py(table, filename="crc16_ccitt_table.py"):
         f.write("]\n")
 
 
+def write_crc_slicing_h(tables, filename="crc16_ccitt_slicing_table.h"):
+    with open(filename, "w") as f:
+        f.write("#pragma once\n\n")
+        f.write("#include <stdint.h>\n\n")
+        f.write(f"// Auto-generated CRC-16 slicing-by-{len(tables)} Tables (CCITT)\n")
+        f.write(f"const uint16_t crc16_slicing_table[{len(tables)}][256] = {{\n")
+        for table in tables:
+            f.write("  {\n")
+            for i in range(0, 256, 8):
+                line = ", ".join(f"0x{table[i+j]:04X}" for j in range(8))
+                f.write(f"    {line},\n")
+            f.write("  },\n")
+        f.write("};\n")
+
+
+def write_crc_slicing_py(tables, filename="crc16_ccitt_slicing_table.py"):
+    # Stored as little-endian hex bytes and loaded straight into array('H'),
+    # so importing it doesn't build thousands of Python int objects in a list
+    with open(filename, "w") as f:
+        f.write(f"# Auto-generated CRC-16 slicing-by-{len(tables)} Tables (CCITT)\n")
+        f.write("# crc16_slicing_tables[0] is the classic crc16_table\n")
+        f.write("import sys\n")
+        f.write("from array import array\n\n")
+        f.write("_TABLES_HEX = (\n")
+        for table in tables:
+            raw = table.tobytes() if sys.byteorder == "little" else _swapped(table).tobytes()
+            hex_str = raw.hex()
+            f.write("    (\n")
+            for i in range(0, len(hex_str), 64):
+                f.write(f"        \"{hex_str[i:i+64]}\"\n")
+            f.write("    ),\n")
+        f.write(")\n\n")
+        f.write("crc16_slicing_tables = []\n")
+        f.write("for _hex in _TABLES_HEX:\n")
+        f.write("    _table = array('H', bytes.fromhex(_hex))\n")
+        f.write("    if sys.byteorder == 'big':\n")
+        f.write("        _table.byteswap()\n")
+        f.write("    crc16_slicing_tables.append(_table)\n")
+        f.write("del _hex, _table\n")
+
+
+def _swapped(table):
+    copy = array('H', table)
+    copy.byteswap()
+    return copy
+
+
 if __name__ == "__main__":
     table = generate_crc16_ccitt_table()
     write_crc_h(table)
     write_crc_py(table)
-    print("✅ Generated: crc_table.h and crc_table.py")
+    slicing_tables = generate_crc16_slicing_tables(table, n=8)
+    write_crc_slicing_h(slicing_tables)
+    write_crc_slicing_py(slicing_tables)
+    print("✅ Generated: crc_table.h, crc_table.py, crc16_ccitt_slicing_table.h and crc16_ccitt_slicing_table.py")
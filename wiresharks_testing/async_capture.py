@@ -0,0 +1,118 @@
+# async_capture.py
+# asyncio capture engine: no blocking ser.read loops, no sleep() polling,
+# no thread per device.
+#
+# Each serial port's file descriptor is registered with the event loop
+# (loop.add_reader). When the OS says it's readable, whatever bytes are
+# waiting get read and decoded right there. The FIFO is driven through an
+# asyncio write-pipe transport, so a slow Wireshark never blocks decoding.
+# The flush timer and the stats timer are plain call_later() timers on the
+# same loop. Several ports can be added to one engine.
+#
+# POSIX only: add_reader() needs a real fd, which pyserial doesn't give you
+# on Windows (use --pipelined there instead).
+import asyncio
+
+from capture_log import DEFAULT_SUMMARY_INTERVAL
+
+
+class TransportFile:
+    """Lets PcapBatchWriter write into an asyncio write transport as if it were a file."""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def write(self, data):
+        # The writer reuses its buffer right after this returns, and the transport
+        # may hold on to what we give it until the pipe drains, so hand over a copy
+        self.transport.write(bytes(data))
+
+    def flush(self):
+        pass # The transport sends as fast as the pipe takes it
+
+
+class AsyncCapture:
+    """
+    Event-loop capture engine.
+
+    add_port() registers a serial port together with the framer for its bytes
+    and the callback that turns frames into pcap records (write_frames).
+    run() opens the FIFO transport and runs until stop() or a read error.
+    """
+
+    def __init__(self, writer, log, flush_age, stats_interval=DEFAULT_SUMMARY_INTERVAL):
+        self.writer = writer
+        self.log = log
+        self.flush_age = flush_age
+        self.stats_interval = stats_interval
+        self._ports = [] # (ser, framer, on_frames)
+        self._loop = None
+        self._done = None
+        self._flush_handle = None
+        self._stats_handle = None
+
+    def add_port(self, ser, framer, on_frames):
+        self._ports.append((ser, framer, on_frames))
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._done = self._loop.create_future()
+
+        # Everything already in the writer (the global header) goes out blocking, then switch to the transport
+        self.writer.flush()
+        try:
+            transport, _ = await self._loop.connect_write_pipe(asyncio.BaseProtocol, self.writer.fifo)
+        except ValueError:
+            # Not a pipe (e.g. a regular file for testing): keep the blocking writes
+            transport = None
+            self.log.info("FIFO is not a pipe, writing to it directly.")
+        if transport is not None:
+            self.writer.fifo = TransportFile(transport)
+
+        for ser, framer, on_frames in self._ports:
+            ser.timeout = 0 # Only ever read what's already there
+            self._loop.add_reader(ser.fileno(), self._on_readable, ser, framer, on_frames)
+        self._stats_handle = self._loop.call_later(self.stats_interval, self._on_stats_timer)
+
+        try:
+            await self._done
+        finally:
+            for ser, _, _ in self._ports:
+                self._loop.remove_reader(ser.fileno())
+            self._stats_handle.cancel()
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+            self.writer.flush()
+            if transport is not None:
+                # Let whatever the transport still holds drain into the FIFO
+                while transport.get_write_buffer_size() and not transport.is_closing():
+                    await asyncio.sleep(0.01)
+                transport.close()
+
+    def stop(self):
+        if self._done is not None and not self._done.done():
+            self._done.set_result(None)
+
+    def _on_readable(self, ser, framer, on_frames):
+        try:
+            data = ser.read(ser.in_waiting or 1)
+        except Exception as e:
+            if not self._done.done():
+                self._done.set_exception(e)
+            return
+        if not data:
+            return
+        framer.feed(data)
+        on_frames(framer, self.writer, self.log)
+        self.writer.poll()
+        if self.writer.pending() and self._flush_handle is None:
+            # Something is buffered: make sure it goes out within flush_age even if the line goes quiet
+            self._flush_handle = self._loop.call_later(self.flush_age, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._flush_handle = None
+        self.writer.flush()
+
+    def _on_stats_timer(self):
+        self.log.tick()
+        self._stats_handle = self._loop.call_later(self.stats_interval, self._on_stats_timer)
@@ -0,0 +1,199 @@
+# bench_decoder.py
+# End-to-end decoder benchmark: how many frames/s can the capture pipeline take?
+#
+# Runs the same code as capture_loop's direct loop (CanFramer -> write_frames ->
+# PcapBatchWriter) over synthetic streams from teensy_traffic.py, fed in
+# `--chunk`-byte pieces like ser.read() would hand them over, into a FIFO
+# stand-in that throws the bytes away. For each scenario it reports:
+#   frames/s, bytes/s     - best of --repeat runs
+#   resync us/byte        - extra time per discarded byte, against the clean scenario
+#                           (or canfd, for the CAN FD ones)
+#   peak KiB              - most extra heap in use during a run (tracemalloc)
+#   retained blocks/frame - heap blocks still alive afterwards per frame (should be ~0)
+# CPython has no counter for every allocation, so the last two are what can be
+# measured: buffer growth and leaks, not the short-lived temporaries.
+#
+# Each run is appended to --results (JSON lines) with the git commit it ran on,
+# and compared against the last saved run of the same scenario, so a regression
+# shows up as a negative percentage.
+#
+# Usage: python bench_decoder.py [--frames 100000] [--chunk 4096] [--scenario noisy]
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from can_framer import CanFramer, CanFdFramer
+from capture_log import CaptureLog, LOG_OFF
+from crc16_batch import HAVE_NUMPY
+from pcap_writer import PcapBatchWriter
+from socketcan_encoder import SocketCanEncoder, CanFdEncoder
+from teensy_traffic import generate_stream
+from wiresharkscan_4_tables import write_frames
+
+DEFAULT_RESULTS = "bench_results.jsonl"
+
+# name -> generate_stream() knobs
+SCENARIOS = {
+    "clean": {},
+    "payload_sof": {"false_sof_rate": 0.2},
+    "bit_errors": {"bit_error_rate": 0.01},
+    "dropped": {"drop_rate": 0.01},
+    "noisy": {"bit_error_rate": 0.01, "drop_rate": 0.01, "false_sof_rate": 0.2},
+    "canfd": {"fd": True},
+    "canfd_noisy": {"fd": True, "bit_error_rate": 0.01, "drop_rate": 0.01, "false_sof_rate": 0.2},
+}
+
+
+class NullFifo:
+    """Stands in for the Wireshark FIFO, counts and drops what it gets."""
+
+    def __init__(self):
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+
+    def flush(self):
+        pass
+
+
+def decode(stream, chunk, fd=False):
+    """One pass over `stream`, returns (seconds, log with the counters)."""
+    log = CaptureLog(LOG_OFF)
+    framer = CanFdFramer(log=log) if fd else CanFramer(log=log)
+    writer = PcapBatchWriter(NullFifo())
+    encoder = CanFdEncoder() if fd else SocketCanEncoder()
+    view = memoryview(stream)
+    start = time.perf_counter()
+    for pos in range(0, len(stream), chunk):
+        framer.feed(view[pos:pos + chunk])
+        write_frames(framer, writer, log, encoder)
+        writer.poll()
+    writer.flush()
+    return time.perf_counter() - start, log
+
+
+def memory_profile(stream, chunk, fd=False):
+    """(peak extra KiB, blocks left alive) for one pass."""
+    decode(stream[:chunk * 4], chunk, fd) # warm up caches/imports so they don't count
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    decode(stream, chunk, fd)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024, sys.getallocatedblocks() - blocks_before
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def last_results(path):
+    """Most recent saved result per (scenario, frames, chunk)."""
+    previous = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    result = json.loads(line)
+                    previous[(result["scenario"], result["frames"], result["chunk"])] = result
+    return previous
+
+
+def run_scenario(name, frames, chunk, repeat, clean_us_per_frame=None):
+    stream, intact = generate_stream(frames, **SCENARIOS[name])
+    fd = SCENARIOS[name].get("fd", False)
+    # Warm up, and don't make the first timed run pay for collecting the generator's garbage
+    decode(stream[:chunk * 4], chunk, fd)
+    gc.collect()
+    best = None
+    for _ in range(repeat):
+        elapsed, log = decode(stream, chunk, fd)
+        best = elapsed if best is None else min(best, elapsed)
+    peak_kib, retained = memory_profile(stream, chunk, fd)
+    resync = None
+    if clean_us_per_frame is not None and log.discarded_bytes:
+        extra_us = best * 1e6 - log.frames * clean_us_per_frame
+        resync = extra_us / log.discarded_bytes
+    return {
+        "scenario": name,
+        "frames": frames,
+        "chunk": chunk,
+        "decoded": log.frames,
+        "expected": len(intact),
+        "discarded_bytes": log.discarded_bytes,
+        "crc_errors": log.crc_errors,
+        "frames_per_s": log.frames / best,
+        "bytes_per_s": len(stream) / best,
+        "us_per_frame": best * 1e6 / max(1, log.frames),
+        "resync_us_per_byte": resync,
+        "peak_kib": peak_kib,
+        "retained_blocks_per_frame": retained / frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decoder throughput benchmark on synthetic Teensy traffic")
+    parser.add_argument("--frames", type=int, default=100000, help="Frames per scenario (default: 100000)")
+    parser.add_argument("--chunk", type=int, default=4096, help="Bytes per simulated ser.read() (default: 4096)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario, best one counts (default: 3)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Only run these (repeatable)")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help=f"JSON lines file to append results to (default: {DEFAULT_RESULTS})")
+    parser.add_argument("--no-save", action="store_true", help="Don't append this run to --results")
+    args = parser.parse_args()
+
+    names = args.scenario or list(SCENARIOS)
+    previous = last_results(args.results)
+    common = {
+        "version": git_version(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": HAVE_NUMPY,
+    }
+    print(f"{common['version']}  python {common['python']}  numpy {'yes' if HAVE_NUMPY else 'no'}  "
+          f"{args.frames} frames, {args.chunk}-byte reads")
+    print(f"{'scenario':<12} {'frames/s':>10} {'MB/s':>7} {'us/frame':>9} {'resync us/B':>11} "
+          f"{'peak KiB':>9} {'blk/frame':>9}  vs last")
+
+    # The clean runs are the baselines the resync cost is measured against
+    clean = run_scenario("clean", args.frames, args.chunk, args.repeat)
+    baselines = {"clean": clean}
+    if any(SCENARIOS[name].get("fd") for name in names):
+        baselines["canfd"] = run_scenario("canfd", args.frames, args.chunk, args.repeat)
+    results = []
+    for name in names:
+        baseline = baselines["canfd" if SCENARIOS[name].get("fd") else "clean"]
+        result = baselines.get(name) or run_scenario(name, args.frames, args.chunk, args.repeat,
+                                                     baseline["us_per_frame"])
+        result.update(common)
+        results.append(result)
+        last = previous.get((name, args.frames, args.chunk))
+        change = ""
+        if last:
+            change = f"{(result['frames_per_s'] / last['frames_per_s'] - 1) * 100:+.1f}% ({last['version']})"
+        resync = f"{result['resync_us_per_byte']:.2f}" if result["resync_us_per_byte"] is not None else "-"
+        print(f"{name:<12} {result['frames_per_s']:>10.0f} {result['bytes_per_s'] / 1e6:>7.2f} "
+              f"{result['us_per_frame']:>9.2f} {resync:>11} {result['peak_kib']:>9.1f} "
+              f"{result['retained_blocks_per_frame']:>9.4f}  {change}")
+        if result["decoded"] != result["expected"]:
+            print(f"  warning: decoded {result['decoded']} frames, stream had {result['expected']} intact")
+
+    if not args.no_save:
+        with open(args.results, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        print(f"Saved to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
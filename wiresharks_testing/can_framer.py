@@ -0,0 +1,281 @@
+# can_framer.py
+# Finds the custom 17-byte Teensy frames in the serial byte stream.
+# Custom Packet Format: 0xAA | 0x69 | CAN_ID(4) | DLC(1) | CAN_DATA(8) | CRC(2)
+# Indices:              0      1      2-5         6        7-14          15-16
+# or, with timestamped=True, the 21-byte variant with the device's micros() after 0x69
+# (see crc16_common.py).
+# ProtocolFramer runs the same stages for any format described in
+# frame_protocols.py (CanFdFramer is it, for the length-prefixed CAN FD frames),
+# and make_framer() picks the right framer for a protocol.
+from crc16_common import (
+    SOF_FLOAT, SOF_WRAPPED, PACKET_LEN_TOTAL, PACKET_LEN_TOTAL_TS, CRC_LEN,
+)
+from crc16_fast import crc16_ccitt_frame
+from frame_protocols import AA69, AA69_TS, AA69_FD, AA69_FD_TS, SLCAN
+from crc16_batch import HAVE_NUMPY, verify_crc16_batch, leading_valid_run
+from frame_ring import FrameRing
+from capture_log import CaptureLog
+from device_clock import DeviceClock
+from slcan_framer import SlcanFramer
+
+# Start of every frame. Searched for as a pair: 0xAA alone shows up in payloads all the time
+SYNC = bytes((SOF_FLOAT, SOF_WRAPPED))
+
+# Only bother with the numpy batch check when at least this many back-to-back
+# candidates are waiting; below that the per-frame loop is just as fast.
+BATCH_MIN_FRAMES = 8
+
+
+class CanFramer:
+    """
+    Pulls validated 17-byte frames out of a FrameRing.
+
+    feed() the raw serial bytes in, then call next_frame() until it returns
+    None. Each frame comes back as a memoryview into the ring (no copy), so
+    use it before the next feed().
+    Discards, false syncs and CRC errors are counted in `log` (a CaptureLog).
+    """
+
+    def __init__(self, ring_size=None, log=None, timestamped=False, clock=None):
+        self.ring = FrameRing(ring_size) if ring_size else FrameRing()
+        self.log = log or CaptureLog()
+        self.timestamped = timestamped
+        self.frame_len = PACKET_LEN_TOTAL_TS if timestamped else PACKET_LEN_TOTAL
+        self.crc_covered = self.frame_len - 1 - CRC_LEN # 0x69 up to the last data byte
+        # Maps the device's micros() in each frame to host time (device_clock.py)
+        self.clock = (clock or DeviceClock()) if timestamped else None
+        # Frames at the head of the ring that the batch check already passed
+        self._verified = 0
+        # Batch only while in sync: once a batch's first candidate fails, every
+        # resync byte would redo the whole ring, so go per frame until a frame passes again
+        self._batch_ok = True
+        # Stats, updated once per feed()
+        self.bytes_in = 0
+        self.ring_high_water = 0 # most unread bytes ever waiting in the ring
+        self.read_sizes = None # optional metrics.Histogram of the chunk sizes fed in
+
+    def feed(self, data):
+        self.ring.feed(data)
+        n = len(data)
+        self.bytes_in += n
+        if len(self.ring) > self.ring_high_water:
+            self.ring_high_water = len(self.ring)
+        if self.read_sizes is not None:
+            self.read_sizes.observe(n)
+
+    def next_frame(self):
+        ring = self.ring
+        frame_len = self.frame_len
+        if self._verified:
+            # Already checked by verify_crc16_batch, hand it straight out
+            self._verified -= 1
+            candidate = ring.peek(frame_len)
+            ring.skip(frame_len)
+            self.log.frame_ok()
+            return candidate
+
+        while True:
+            # Stage 1: Find the AA 69 sync pair
+            if not self._sync():
+                return None
+
+            # Stage 2: Check if enough bytes for a full packet
+            if len(ring) < frame_len:
+                return None # Not enough data for a full packet, wait for more
+
+            # Stage 3: Chain check, before paying for a CRC on this candidate
+            # Frames come back to back, so a real one is followed by the next AA 69 exactly frame_len later.
+            # If this one isn't, but another AA 69 inside it is, this one is most likely an AA 69 out of
+            # a payload: check the one that chains first, and if it's good, skip this one without a CRC.
+            if len(ring) >= frame_len + 2 and (ring[frame_len] != SOF_FLOAT or ring[frame_len + 1] != SOF_WRAPPED):
+                alt = ring.find(SYNC, 1, frame_len)
+                while alt != -1 and alt + frame_len + 2 <= len(ring):
+                    if ring[alt + frame_len] == SOF_FLOAT and ring[alt + frame_len + 1] == SOF_WRAPPED:
+                        break
+                    alt = ring.find(SYNC, alt + 1, frame_len)
+                else:
+                    alt = -1
+                if alt != -1:
+                    candidate = ring.peek(frame_len, alt)
+                    if self._crc_ok(candidate):
+                        self.log.false_sync(alt)
+                        ring.skip(alt + frame_len)
+                        self.log.frame_ok()
+                        self._batch_ok = True
+                        return candidate
+                    # The chained one is junk too, so judge this one on its own CRC after all
+
+            # Stage 4: Validate CRC
+            # If lots of data is waiting, check every back-to-back candidate in one numpy call
+            # and keep handing out the leading run of good frames without looking at them again
+            n_candidates = len(ring) // frame_len
+            if HAVE_NUMPY and self._batch_ok and n_candidates >= BATCH_MIN_FRAMES:
+                run = leading_valid_run(verify_crc16_batch(ring.peek(n_candidates * frame_len), n_candidates,
+                                                            frame_len=frame_len))
+                if run:
+                    self._verified = run - 1
+                    candidate = ring.peek(frame_len)
+                    ring.skip(frame_len)
+                    self.log.frame_ok()
+                    return candidate
+                # First candidate is bad: out of sync, resync per frame (the mismatch gets logged like before)
+                self._batch_ok = False
+
+            # CRC is calculated over bytes from SOF_WRAPPED (index 1) to end of data (index 14, or 18 timestamped)
+            candidate = ring.peek(frame_len)
+            # Reconstruct received CRC (big-endian because Teensy sends MSB then LSB)
+            received_crc = (candidate[frame_len - 2] << 8) | candidate[frame_len - 1]
+            calculated_crc = crc16_ccitt_frame(candidate[1:1 + self.crc_covered])
+
+            if received_crc != calculated_crc:
+                self.log.crc_error(calculated_crc, received_crc)
+                ring.skip(1) # Discard SOF_FLOAT and re-scan
+                continue
+
+            # Valid: move the read cursor past it, the view stays readable until the next feed()
+            ring.skip(frame_len)
+            self.log.frame_ok()
+            self._batch_ok = True
+            return candidate
+
+    def _sync(self):
+        """Drops everything before the next AA 69, False if there isn't one yet."""
+        ring = self.ring
+        # One C-level search for both bytes, so a lone 0xAA in a payload never becomes a candidate
+        sync_idx = ring.find(SYNC)
+        if sync_idx == -1:
+            # No sync pair, drop the junk but keep a trailing 0xAA, its 0x69 may come in the next read
+            keep = 1 if len(ring) and ring[len(ring) - 1] == SOF_FLOAT else 0
+            if len(ring) > keep:
+                self.log.discard(len(ring) - keep)
+                ring.keep_tail(keep)
+            return False
+
+        # Discard data before the sync pair
+        if sync_idx > 0:
+            self.log.discard(sync_idx)
+            ring.skip(sync_idx)
+        return True
+
+    def _crc_ok(self, candidate):
+        received_crc = (candidate[self.frame_len - 2] << 8) | candidate[self.frame_len - 1]
+        return crc16_ccitt_frame(candidate[1:1 + self.crc_covered]) == received_crc
+
+
+class ProtocolFramer(CanFramer):
+    """
+    Pulls validated frames of any FrameProtocol (frame_protocols.py) out of the ring:
+    its sync pattern, its length rule (fixed, or read from each frame's header),
+    its checksum. Same stages as CanFramer, including the chain check, just without
+    the CRC-16 specific fast paths (table CRC on a fixed span, numpy batches).
+    timestamped=True uses the protocol's device timestamp (protocol.ts_pos) for
+    packet times, through `clock`.
+    """
+
+    def __init__(self, protocol, ring_size=None, log=None, timestamped=False, clock=None):
+        super().__init__(ring_size, log, timestamped, clock)
+        self.protocol = protocol
+        self.sync = protocol.sync
+        self.frame_len = protocol.frame_len # None if it varies per frame
+        self._length = protocol.length
+        self._checksum = protocol.checksum
+
+    def _sync(self):
+        """Drops everything before the next sync pattern, False if there isn't one yet."""
+        ring = self.ring
+        sync = self.sync
+        sync_idx = ring.find(sync)
+        if sync_idx == -1:
+            # Keep a tail that could be the start of a sync pattern cut off by the read
+            keep = 0
+            for n in range(min(len(sync) - 1, len(ring)), 0, -1):
+                if ring.peek(n, len(ring) - n) == sync[:n]:
+                    keep = n
+                    break
+            if len(ring) > keep:
+                self.log.discard(len(ring) - keep)
+                ring.keep_tail(keep)
+            return False
+        if sync_idx > 0:
+            self.log.discard(sync_idx)
+            ring.skip(sync_idx)
+        return True
+
+    def _length_at(self, pos):
+        """Total length of the frame starting at `pos`, None until its header is in."""
+        if self.frame_len:
+            return self.frame_len
+        return self._length(self.ring, pos)
+
+    def _chains(self, pos, frame_len):
+        """Is the frame at `pos` followed by another sync pattern right after it?"""
+        return self.ring.peek(len(self.sync), pos + frame_len) == self.sync
+
+    def next_frame(self):
+        ring = self.ring
+        sync = self.sync
+        while True:
+            # Stage 1: Find the sync pattern
+            if not self._sync():
+                return None
+
+            # Stage 2: Enough bytes for the frame (for the header first, if its length varies)
+            frame_len = self._length_at(0)
+            if frame_len is None or len(ring) < frame_len:
+                return None
+
+            # Stage 3: Chain check (see CanFramer), each alternative with its own length
+            if len(ring) >= frame_len + len(sync) and not self._chains(0, frame_len):
+                alt = ring.find(sync, 1, frame_len)
+                while alt != -1:
+                    alt_len = self._length_at(alt)
+                    if alt_len is None or alt + alt_len + len(sync) > len(ring):
+                        alt = -1
+                        break
+                    if self._chains(alt, alt_len):
+                        break
+                    alt = ring.find(sync, alt + 1, frame_len)
+                if alt != -1:
+                    candidate = ring.peek(alt_len, alt)
+                    if self._crc_ok(candidate):
+                        self.log.false_sync(alt)
+                        ring.skip(alt + alt_len)
+                        self.log.frame_ok()
+                        return candidate
+
+            # Stage 4: Checksum
+            candidate = ring.peek(frame_len)
+            calculated, received = self._checksum(candidate)
+            if calculated != received:
+                self.log.crc_error(calculated, received)
+                ring.skip(1) # Discard the first sync byte and re-scan
+                continue
+
+            ring.skip(frame_len)
+            self.log.frame_ok()
+            return candidate
+
+    def _crc_ok(self, candidate):
+        calculated, received = self._checksum(candidate)
+        return calculated == received
+
+
+class CanFdFramer(ProtocolFramer):
+    """The length-prefixed CAN FD frames (crc16_common.py), classic ones in the same format included."""
+
+    def __init__(self, ring_size=None, log=None, timestamped=False, clock=None):
+        super().__init__(AA69_FD_TS if timestamped else AA69_FD, ring_size, log, timestamped, clock)
+
+
+def make_framer(protocol, log=None, timestamped=False, clock=None):
+    """
+    The framer for `protocol` (a FrameProtocol). timestamped=True uses the device timestamps
+    of a protocol that has them optionally (crc32-25, ignored for the ones without), the -ts
+    variants always do.
+    """
+    if protocol is AA69 or protocol is AA69_TS:
+        return CanFramer(log=log, timestamped=protocol is AA69_TS, clock=clock)
+    if protocol is SLCAN:
+        return SlcanFramer(log=log)
+    timestamped = (timestamped and protocol.ts_pos is not None) or protocol is AA69_FD_TS
+    return ProtocolFramer(protocol, log=log, timestamped=timestamped, clock=clock)
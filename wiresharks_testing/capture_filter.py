@@ -0,0 +1,356 @@
+# capture_filter.py
+# The --extcap-capture-filter language: drop frames before they're encoded
+# and written, instead of sending Wireshark everything and display-filtering.
+#
+#   id in 0x100-0x1FF and not id 0x123 and data[0:2] & 0xF0FF == 0x1002
+#
+# Tests (combine with and / or / not / parentheses, && || ! work too):
+#   id 0x123, id == 0x123, id != / < / <= / > / >= 0x123
+#   id in 0x100-0x1FF, 0x300        IDs and inclusive ranges, {...} around them optional
+#   dlc >= 4
+#   data[i], data[i:n], data[i-j]   one byte / n bytes from offset i / bytes i..j
+#                                   (same as Wireshark's slices), read big-endian,
+#                                   optionally "& MASK", compared with == != < <= > >=
+# The data bytes past the DLC are the zero padding the Teensy sends. CAN FD
+# frames (fd=True) have up to 64 data bytes and no padding: a test on bytes
+# past the end of a frame's data is false.
+#
+# The text is compiled once into one Python function for the frame layout
+# (the FrameProtocol's id/dlc/data offsets, see frame_protocols.py):
+#   - the top-level "and" terms that only look at the ID are evaluated for every
+#     11-bit ID up front into a 2048-entry bitmap, so for standard IDs all of them
+#     cost one index; 29-bit IDs run them as range comparisons
+#   - the "data[...] (& mask) == value" terms are folded into one mask and value
+#     over the data bytes (64-bit for classic frames), so however many there
+#     are it's one int.from_bytes, one &, one ==
+#   - anything else (or, not, dlc, other comparisons) becomes a plain expression
+import re
+import struct
+
+from crc16_common import CRC_LEN
+from frame_protocols import AA69
+
+CAN_EFF_MASK = 0x1FFFFFFF
+STANDARD_IDS = 0x800
+CAN_DATA_LEN = 8
+
+_CAN_ID = struct.Struct('<I')
+_CAN_ID_BE = struct.Struct('>I')
+
+_TOKEN = re.compile(r"\s*(?:(0[xX][0-9a-fA-F]+|\d+)|([A-Za-z_]+)|(==|!=|<=|>=|&&|\|\||[<>!&\[\]():,{}-]))")
+_ALIASES = {"&&": "and", "||": "or", "!": "not", "eq": "==", "ne": "!="}
+_COMPARISONS = ("==", "!=", "<", "<=", ">", ">=")
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise ValueError(f"unexpected {text[pos:].strip()[:10]!r} at column {pos + 1}")
+        number, word, symbol = match.groups()
+        if number is not None:
+            tokens.append(int(number, 0))
+        else:
+            token = (word or symbol).lower() if word else symbol
+            tokens.append(_ALIASES.get(token, token))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent over the tokens. Nodes are tuples:
+    ("or", a, b), ("and", a, b), ("not", a), ("id", [(low, high), ...]),
+    ("dlc", op, value), ("data", offset, length, mask, op, value)
+    """
+
+    def __init__(self, text, data_len=CAN_DATA_LEN):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.data_len = data_len
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("empty filter")
+        node = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"unexpected {self.tokens[self.pos]!r}")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self, what="more"):
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"filter ends where {what} was expected")
+        self.pos += 1
+        return token
+
+    def _expect(self, token):
+        if self._next(repr(token)) != token:
+            raise ValueError(f"expected {token!r} before {self.tokens[self.pos - 1]!r}")
+
+    def _number(self):
+        token = self._next("a number")
+        if not isinstance(token, int):
+            raise ValueError(f"expected a number, got {token!r}")
+        return token
+
+    def _or(self):
+        node = self._and()
+        while self._peek() == "or":
+            self.pos += 1
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._peek() == "and":
+            self.pos += 1
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self):
+        if self._peek() == "not":
+            self.pos += 1
+            return ("not", self._not())
+        if self._peek() == "(":
+            self.pos += 1
+            node = self._or()
+            self._expect(")")
+            return node
+        return self._test()
+
+    def _test(self):
+        field = self._next("a test")
+        if field == "id":
+            return self._id_test()
+        if field == "dlc":
+            op = self._comparison()
+            value = self._number()
+            if not 0 <= value <= 15:
+                raise ValueError(f"dlc {value} out of range")
+            return ("dlc", op, value)
+        if field == "data":
+            return self._data_test()
+        raise ValueError(f"unknown test {field!r} (id, dlc or data)")
+
+    def _comparison(self):
+        op = self._next("a comparison")
+        if op not in _COMPARISONS:
+            raise ValueError(f"expected one of {' '.join(_COMPARISONS)}, got {op!r}")
+        return op
+
+    def _id_test(self):
+        token = self._peek()
+        if token == "in":
+            self.pos += 1
+            return ("id", self._id_list())
+        if isinstance(token, int):
+            return ("id", [self._id_range()])
+        op = self._comparison()
+        value = _check_id(self._number())
+        # Every ID comparison is a set of ranges, so they all end up in the bitmap
+        ranges = {
+            "==": [(value, value)],
+            "!=": [(0, value - 1), (value + 1, CAN_EFF_MASK)],
+            "<": [(0, value - 1)],
+            "<=": [(0, value)],
+            ">": [(value + 1, CAN_EFF_MASK)],
+            ">=": [(value, CAN_EFF_MASK)],
+        }[op]
+        return ("id", [(low, high) for low, high in ranges if low <= high])
+
+    def _id_list(self):
+        braces = self._peek() == "{"
+        if braces:
+            self.pos += 1
+        ranges = [self._id_range()]
+        while self._peek() == "," or (braces and isinstance(self._peek(), int)):
+            if self._peek() == ",":
+                self.pos += 1
+            ranges.append(self._id_range())
+        if braces:
+            self._expect("}")
+        return ranges
+
+    def _id_range(self):
+        low = high = _check_id(self._number())
+        if self._peek() == "-":
+            self.pos += 1
+            high = _check_id(self._number())
+            if high < low:
+                raise ValueError(f"empty ID range 0x{low:X}-0x{high:X}")
+        return (low, high)
+
+    def _data_test(self):
+        self._expect("[")
+        offset = self._number()
+        length = 1
+        if self._peek() == ":":
+            self.pos += 1
+            length = self._number()
+        elif self._peek() == "-":
+            self.pos += 1
+            length = self._number() - offset + 1
+        self._expect("]")
+        if length < 1 or offset + length > self.data_len:
+            raise ValueError(f"data slice past the {self.data_len} data bytes")
+        full = (1 << (8 * length)) - 1
+        mask = full
+        if self._peek() == "&":
+            self.pos += 1
+            mask = self._number()
+        op = self._comparison()
+        value = self._number()
+        if mask > full or value > full:
+            raise ValueError(f"mask/value wider than data[{offset}:{length}]")
+        return ("data", offset, length, mask, op, value)
+
+
+def _check_id(value):
+    if value > CAN_EFF_MASK:
+        raise ValueError(f"ID 0x{value:X} is more than 29 bits")
+    return value
+
+
+def _conjuncts(node):
+    if node[0] == "and":
+        return _conjuncts(node[1]) + _conjuncts(node[2])
+    return [node]
+
+
+def _id_only(node):
+    if node[0] == "id":
+        return True
+    if node[0] in ("and", "or", "not"):
+        return all(_id_only(child) for child in node[1:])
+    return False
+
+
+def _eval_id(node, can_id):
+    kind = node[0]
+    if kind == "id":
+        return any(low <= can_id <= high for low, high in node[1])
+    if kind == "not":
+        return not _eval_id(node[1], can_id)
+    if kind == "and":
+        return _eval_id(node[1], can_id) and _eval_id(node[2], can_id)
+    return _eval_id(node[1], can_id) or _eval_id(node[2], can_id)
+
+
+class CaptureFilter:
+    """
+    A compiled capture filter for frames of `protocol` (a FrameProtocol, its field
+    layout says where the ID, DLC and data are).
+    match(frame) takes the framer's frame (memoryview) and says whether it goes to
+    Wireshark; `rejected` counts the ones that didn't, for the metrics.
+    Raises ValueError on a bad filter.
+    """
+
+    def __init__(self, text, protocol=AA69):
+        self.text = text
+        self.rejected = 0
+        self.fd = protocol.fd
+        self.data_len = protocol.data_len
+        tree = _Parser(text, self.data_len).parse()
+        self._id_pos = protocol.id_pos
+        self._dlc_pos = protocol.dlc_pos
+        self._data_pos = protocol.data_pos
+        self._unpack_id = (_CAN_ID_BE if protocol.id_big_endian else _CAN_ID).unpack_from
+
+        id_terms = []
+        data_terms = []
+        other_terms = []
+        for term in _conjuncts(tree):
+            if _id_only(term):
+                id_terms.append(term)
+            elif term[0] == "data" and term[4] == "==":
+                data_terms.append(term)
+            else:
+                other_terms.append(term)
+
+        self.bitmap = bytearray(STANDARD_IDS)
+        for can_id in range(STANDARD_IDS):
+            self.bitmap[can_id] = all(_eval_id(term, can_id) for term in id_terms)
+        self.data_mask, self.data_value, never = self._fold_data(data_terms)
+
+        lines = ["def match(frame):"]
+        if id_terms or any(self._uses_id(term) for term in other_terms):
+            lines.append(f"    can_id = _unpack_id(frame, {self._id_pos})[0] & {CAN_EFF_MASK}")
+        if never:
+            lines.append("    return False")
+        if id_terms:
+            extended = " and ".join(self._expr(term) for term in id_terms)
+            lines.append(f"    if can_id < {STANDARD_IDS}:")
+            lines.append("        if not _bitmap[can_id]: return False")
+            lines.append(f"    elif not ({extended}): return False")
+        checks = []
+        if self.data_mask:
+            # Only the bytes the folded terms look at are read
+            data_len = self.data_len
+            first = (self.data_mask.bit_length() - 1) // 8
+            last = (self.data_mask & -self.data_mask).bit_length() - 1
+            start, end = data_len - 1 - first, data_len - last // 8
+            shift = (data_len - end) * 8
+            checks.append(self._in_frame(end, f"(int.from_bytes(frame[{self._data_pos + start}:{self._data_pos + end}], 'big') & "
+                                              f"{self.data_mask >> shift}) == {self.data_value >> shift}"))
+        checks += [self._expr(term) for term in other_terms]
+        lines.append(f"    return {' and '.join(checks) if checks else 'True'}")
+        self.source = "\n".join(lines)
+        namespace = {"_unpack_id": self._unpack_id, "_bitmap": self.bitmap}
+        exec(self.source, namespace)
+        self.match = namespace["match"]
+
+    def _fold_data(self, terms):
+        """All the data[...] == terms as one (mask, value) over the data bytes, and whether they can never match."""
+        mask = value = 0
+        never = False
+        for _, offset, length, term_mask, _, term_value in terms:
+            shift = (self.data_len - offset - length) * 8
+            if term_value & ~term_mask:
+                never = True # e.g. data[0] & 0x0F == 0x10
+            term_mask <<= shift
+            term_value <<= shift
+            if (value ^ term_value) & mask & term_mask:
+                never = True # two terms want different values for the same bits
+            mask |= term_mask
+            value |= term_value & term_mask
+        return mask, value, never
+
+    def _uses_id(self, node):
+        if node[0] == "id":
+            return True
+        return node[0] in ("and", "or", "not") and any(self._uses_id(child) for child in node[1:])
+
+    def _expr(self, node):
+        kind = node[0]
+        if kind in ("and", "or"):
+            return f"({self._expr(node[1])} {kind} {self._expr(node[2])})"
+        if kind == "not":
+            return f"(not {self._expr(node[1])})"
+        if kind == "id":
+            return "(" + " or ".join(
+                f"can_id == {low}" if low == high else f"{low} <= can_id <= {high}" for low, high in node[1]
+            ) + ")"
+        if kind == "dlc":
+            return f"(frame[{self._dlc_pos}] {node[1]} {node[2]})"
+        _, offset, length, mask, op, value = node
+        start = self._data_pos + offset
+        if length == 1:
+            data = f"frame[{start}]"
+        else:
+            data = f"int.from_bytes(frame[{start}:{start + length}], 'big')"
+        if mask != (1 << (8 * length)) - 1:
+            data = f"({data} & {mask})"
+        return self._in_frame(offset + length, f"({data} {op} {value})")
+
+    def _in_frame(self, data_end, expr):
+        """FD frames are only as long as their data: guard tests on bytes that may not be there."""
+        if not self.fd or data_end == 0:
+            return expr
+        return f"(len(frame) >= {self._data_pos + data_end + CRC_LEN} and {expr})"
@@ -0,0 +1,122 @@
+# capture_log.py
+# Leveled, rate-limited diagnostics for the capture loop.
+#
+# Writing + flushing stderr (with .hex() formatting) for every frame costs
+# more than decoding the frame. Levels:
+#   off     - only startup/shutdown/errors
+#   summary - one aggregated line per interval, e.g.
+#             "last 1.0 s: 5120 frames, discarded 1432 bytes, 17 CRC errors, 3 false syncs"
+#   frame   - the old per-frame/per-discard trace, only when asked for
+# Messages are passed as a format string + args, so nothing is formatted
+# unless the level actually prints it.
+# With a MetricsRegistry (metrics.py) the interval counts are also added to
+# its running totals on every tick, so the hot path still only does += 1.
+# Listeners (e.g. the extcap toolbar, extcap_control.py) get the same
+# interval counts on every tick, whatever the level.
+import sys
+import time
+
+LOG_OFF = 0
+LOG_SUMMARY = 1
+LOG_FRAME = 2
+
+LOG_LEVELS = {"off": LOG_OFF, "summary": LOG_SUMMARY, "frame": LOG_FRAME}
+
+DEFAULT_LOG_LEVEL = "summary"
+DEFAULT_SUMMARY_INTERVAL = 1.0 # seconds
+
+
+class CaptureLog:
+    """Counters + lazy stderr logging for one capture."""
+
+    def __init__(self, level=DEFAULT_LOG_LEVEL, interval=DEFAULT_SUMMARY_INTERVAL, stream=None, metrics=None):
+        self.level = LOG_LEVELS[level] if isinstance(level, str) else level
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self._last_summary = time.monotonic()
+        # Counts since the last summary line
+        self.frames = 0
+        self.discarded_bytes = 0
+        self.crc_errors = 0
+        self.false_syncs = 0
+        self.metrics = metrics
+        self.listeners = [] # fn(elapsed, frames, discarded_bytes, crc_errors, false_syncs), once per interval
+        if metrics is not None:
+            self._totals = (
+                metrics.counter("frames_total", "Frames that passed the CRC check"),
+                metrics.counter("discarded_bytes_total", "Serial bytes thrown away while looking for frames"),
+                metrics.counter("crc_errors_total", "Frame candidates that failed the CRC check"),
+                metrics.counter("false_syncs_total", "AA 69 candidates rejected by the chain check, without a CRC"),
+            )
+
+    def info(self, fmt, *args):
+        """Always printed unless the level is off (startup, shutdown, errors)."""
+        if self.level > LOG_OFF:
+            self._write(fmt, args)
+
+    def error(self, fmt, *args):
+        """Printed at every level."""
+        self._write(fmt, args)
+
+    def trace(self, fmt, *args):
+        """Per-frame detail, only formatted at the 'frame' level."""
+        if self.level >= LOG_FRAME:
+            self._write(fmt, args)
+
+    def _write(self, fmt, args):
+        self.stream.write("extcap: " + (fmt % args if args else fmt) + "\n")
+        self.stream.flush()
+
+    # --- Hot-path counters (called from the framer) ---
+
+    def frame_ok(self):
+        self.frames += 1
+
+    def discard(self, n_bytes):
+        self.discarded_bytes += n_bytes
+        if self.level >= LOG_FRAME:
+            self._write("Discarding %d bytes before AA 69.", (n_bytes,))
+
+    def false_sync(self, n_bytes):
+        """An AA 69 rejected without a CRC check, because the next frame doesn't follow it."""
+        self.false_syncs += 1
+        self.discarded_bytes += n_bytes
+        if self.level >= LOG_FRAME:
+            self._write("False sync: no frame follows it, skipping %d bytes to an AA 69 that chains.", (n_bytes,))
+
+    def crc_error(self, calculated, received):
+        self.crc_errors += 1
+        self.discarded_bytes += 1
+        if self.level >= LOG_FRAME:
+            self._write("CRC mismatch! Calculated %04X, Received %04X. Discarding packet.", (calculated, received))
+
+    def tick(self, now=None):
+        """Prints the aggregated summary line once per interval. Cheap to call often."""
+        now = now or time.monotonic()
+        elapsed = now - self._last_summary
+        if elapsed < self.interval:
+            return
+        if self.level >= LOG_SUMMARY and (self.frames or self.discarded_bytes):
+            self._write(
+                "last %.1f s: %d frames, discarded %d bytes, %d CRC errors, %d false syncs",
+                (elapsed, self.frames, self.discarded_bytes, self.crc_errors, self.false_syncs),
+            )
+        for listener in self.listeners:
+            listener(elapsed, self.frames, self.discarded_bytes, self.crc_errors, self.false_syncs)
+        self._last_summary = now
+        self.fold()
+        if self.metrics is not None:
+            try:
+                self.metrics.maybe_publish(now)
+            except OSError as e:
+                self.error("Can't write the metrics file: %s", e)
+
+    def fold(self):
+        """Adds the interval counts to the metrics totals (if any) and starts a new interval."""
+        if self.metrics is not None:
+            for key, count in zip(self._totals, (self.frames, self.discarded_bytes, self.crc_errors, self.false_syncs)):
+                self.metrics.add(key, count)
+        self.frames = 0
+        self.discarded_bytes = 0
+        self.crc_errors = 0
+        self.false_syncs = 0
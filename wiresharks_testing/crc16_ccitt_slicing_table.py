@@ -0,0 +1,159 @@
+# Auto-generated CRC-16 slicing-by-8 Tables (CCITT)
+# crc16_slicing_tables[0] is the classic crc16_table
+import sys
+from array import array
+
+_TABLES_HEX = (
+    (
+        "00002110422063308440a550c660e770088129914aa16bb18cc1add1cee1eff1"
+        "3112100273325222b5529442f772d662399318837bb35aa3bdd39cc3fff3dee3"
+        "6224433420040114e664c774a44485546aa54bb528850995eee5cff5acc58dd5"
+        "5336722611163006d776f6669556b4465bb77aa719973887dff7fee79dd7bcc7"
+        "c448e5588668a7784008611802282338ccc9edd98ee9aff9488969990aa92bb9"
+        "f55ad44ab77a966a711a500a333a122afddbdccbbffb9eeb799b588b3bbb1aab"
+        "a66c877ce44cc55c222c033c600c411caeed8ffdeccdcddd2aad0bbd688d499d"
+        "977eb66ed55ef44e133e322e511e700e9fffbeefdddffccf1bbf3aaf599f788f"
+        "8891a981cab1eba10cd12dc14ef16fe18010a100c230e3200450254046706760"
+        "b9839893fba3dab33dc31cd37fe35ef3b1029012f322d2323542145277625672"
+        "eab5cba5a89589856ef54fe52cd50dc5e234c324a01481046674476424540544"
+        "dba7fab79987b8975fe77ef71dc73cd7d326f2369106b0165766767615463456"
+        "4cd96dc90ef92fe9c899e9898ab9aba94458654806782768c018e1088238a328"
+        "7dcb5cdb3feb1efbf98bd89bbbab9abb754a545a376a167af10ad01ab32a923a"
+        "2efd0fed6cdd4dcdaabd8bade89dc98d267c076c645c454ca23c832ce01cc10c"
+        "1fef3eff5dcf7cdf9bafbabfd98ff89f176e367e554e745e932eb23ed10ef01e"
+    ),
+    (
+        "0000313362665355c4ccf5ffa6aa9799a98998bacbeffadc6d455c760f233e10"
+        "7303423011652056b7cf86fcd5a9e49ada8aebb9b8ec89df1e462f757c204d13"
+        "e606d7358460b55322ca13f940ac719f4f8f7ebc2de91cda8b43ba70e925d816"
+        "9505a436f763c65051c960fa33af029c3c8c0dbf5eea6fd9f840c9739a26ab15"
+        "cc0dfd3eae6b9f5808c139f26aa75b94658454b707e236d1a148907bc32ef21d"
+        "bf0e8e3ddd68ec5b7bc24af119a42897168727b474e145d2d24be378b02d811e"
+        "2a0b1b38486d795eeec7dff48ca1bd928382b2b1e1e4d0d7474e767d2528141b"
+        "5908683b3b6e0a5d9dc4acf7ffa2ce91f081c1b292e7a3d4344d057e562b6718"
+        "981ba928fa7dcb4e5cd76de43eb10f82319200a153f462c7f55ec46d9738a60b"
+        "eb18da2b897eb84d2fd41ee74db27c81429173a220f711c4865db76ee43bd508"
+        "7e1d4f2e1c7b2d48bad18be2d8b7e984d794e6a7b5f284c11358226b713e400d"
+        "0d1e3c2d6f785e4bc9d2f8e1abb49a87a49795a4c6f1f7c2605b5168023d330e"
+        "541665253670074390daa1e9f2bcc38ffd9fccac9ff9aeca395308605b356a06"
+        "2715162645737440e3d9d2ea81bfb08c8e9cbfafecfaddc94a507b6328361905"
+        "b2108323d076e14576dc47ef14ba25891b992aaa79ff48ccdf55ee66bd338c00"
+        "c113f020a375924605df34ec67b9568a689a59a90afc3bcfac569d65ce30ff03"
+    ),
+    (
+        "00003037606e5059c0dcf0eba0b29085a1a9919ec1c7f1f061755142011b312c"
+        "63435374032d331aa39f93a8c3f1f3c6c2eaf2dda28492b3023632016258526f"
+        "c686f6b1a6e896df065a366d66345603672f571807413776a7f397c4c79df7aa"
+        "a5c595f2c5abf59c6519552e05773540046c345b64025435c4b0f487a4de94e9"
+        "ad1d9d2acd73fd446dc15df60daf3d980cb43c836cda5cedcc68fc5fac069c31"
+        "ce5efe69ae309e070e823eb56eec5edb6ff75fc00f993faeaf2b9f1ccf45ff72"
+        "6b9b5bac0bf53bc2ab479b70cb29fb1eca32fa05aa5c9a6b0aee3ad96a805ab7"
+        "08d838ef68b65881c804f833a86a985da9719946c91ff92869ad599a09c339f4"
+        "5a3b6a0c3a550a629ae7aad0fa89cabefb92cba59bfcabcb3b4e0b795b206b17"
+        "3978094f59166921f9a4c99399caa9fd98d1a8e6f8bfc888580d683a38630854"
+        "9cbdac8afcd3cce45c616c563c0f0c383d140d235d7a6d4dfdc8cdff9da6ad91"
+        "fffecfc99f90afa73f220f155f4c6f7b5e576e603e390e0e9e8baebcfee5ced2"
+        "f726c7119748a77f37fa07cd579467a3568f66b836e106d69653a664f63dc60a"
+        "9465a452f40bc43c54b9648e34d704e035cc05fb55a26595f510c527957ea549"
+        "31a0019751ce61f9f17cc14b9112a1259009a03ef067c05050d560e230bb008c"
+        "52e362d4328d02ba923fa208f251c266f34ac37d9324a313339603a153f863cf"
+    ),
+    (
+        "0000b47668eddc9bf1ca45bc99272d51c38577f3ab681f1e324f86395aa2eed4"
+        "a71b136dcff67b8056d1e2a73e3c8a4a649ed0e80c73b80595542122fdb949cf"
+        "4e37fa4126da92acbffd0b8bd71063668db239c4e55f51297c78c80e1495a0e3"
+        "e92c5d5a81c135b718e6ac90700bc47d2aa99edf4244f632db636f15b38e07f8"
+        "9c6e2818f48340f56da4d9d20549b13f5febeb9d37068370ae211a57c6cc72ba"
+        "3b758f035398e7eecabf7ec9a2521624f8f04c86901d246b093abd4c61d7d5a1"
+        "d259662fbab40ec2239397e54b7eff0811dca5aa7931cd47e016546088fb3c8d"
+        "7542c1341dafa9d9848830feec655813b6c702b1de2a6a5c470df37b2fe09b96"
+        "38dd8cab5030e446c9177d61a1fa158cfb584f2e93b527c30a92bee4627fd609"
+        "9fc62bb0f72b435d6e0cda7a06e1b2975c43e83534ae80d8ad8919ffc5647112"
+        "76eac29c1e07aa7187203356efcd5bbbb56f0119dd8269f444a5f0d32c48983e"
+        "d1f16587b91c0d6a203b944d48d6fca01274a6027a99ceefe3be57c88b533f25"
+        "a4b310c5cc5e78285579e10f3d9489e26736d3400fdbbbad96fc228afe114a67"
+        "03a8b7de6b45df33f26246149a8f2ef9c02d745ba8c01cb631e78591590aed7c"
+        "ea845ef28269361f1b4eaf3873a3c7d529019d7741ecf59ad8cb6cbdb0260450"
+        "4d9ff9e925729104bc550823d4b860ce8e1a3a6ce6f752817fd0cba6173da34b"
+    ),
+    (
+        "000051aa8344d2ee0689572385cdd4672d027ca8ae46ffec2b8b7a21a8cff965"
+        "5a040baed94088ea5c8d0d27dfc98e63770626acf442a5e8718f2025f2cba361"
+        "b408e5a2374c66e6b281e32b31c5606f990ac8a01a4e4be49f83ce291cc74d6d"
+        "ee0cbfa66d483ce2e885b92f6bc13a6bc30e92a4404a11e0c587942d46c31769"
+        "681139bbeb55baff6e983f32eddcbc76451314b9c65797fd439a1230c0de9174"
+        "321563bfb151e0fb349c6536b7d8e6721f174ebd9c53cdf9199e48349adacb70"
+        "dc198db35f5d0ef7da908b3a59d4087ef11ba0b1725f23f5f792a63874d6257c"
+        "861dd7b7055954f38094d13e03d0527aab1ffab5285b79f1ad96fc3c2ed27f78"
+        "d0228188536602ccd6ab870155ef0445fd20ac8a7e642fcefba9aa0378ed2947"
+        "8a26db8c096258c88cafdd050feb5e41a724f68e246075caa1adf00722e97343"
+        "642a3580e76eb6c462a33309e1e7b04d49281882ca6c9bc64fa11e0bcce59d4f"
+        "3e2e6f84bd6aecc038a7690dbbe3ea49132c42869068c1c215a5440f96e1c74b"
+        "b833e9993b776addbebaef103dfe6c549531c49b167547df93b8c21210fc4156"
+        "e237b39d617330d9e4beb51467fa3650cf359e9f4c711ddbc9bc98164af81b52"
+        "0c3b5d918f7fded50ab25b1889f6d85c21397093a27df3d727b0761aa4f4f55e"
+        "563f0795d57b84d150b6011cd3f282587b3d2a97f879a9d37db42c1efef0af5a"
+    ),
+    (
+        "0000a045408be0cea1060143e18d41c8420de2480286a2c3e30b434ea38003c5"
+        "841a245fc49164d4251c85596597c5d2c6176652869c26d96711c754279a87df"
+        "0835a87048bee8fba9330976e9b849fd4a38ea7d0ab3aaf6eb3e4b7babb50bf0"
+        "8c2f2c6acca46ce12d298d6c6da2cde7ce226e678ea92eec6f24cf612faf8fea"
+        "106ab02f50e1f0a4b16c1129f1e751a25267f22212ecb2a9f3615324b3ea13af"
+        "94703435d4fb74be3576953375fdd5b8d67d763896f636b3777bd73e37f097b5"
+        "185fb81a58d4f891b959191cf9d259975a52fa171ad9ba9cfb545b11bbdf1b9a"
+        "9c453c00dcce7c8b3d439d067dc8dd8dde487e0d9ec33e867f4edf0b3fc59f80"
+        "20d48091605fc01a81d22197c159611c62d9c29c22528217c3df639a83542311"
+        "a4ce048be445440005c8a58d4543e506e6c34686a648060d47c5e780074ea70b"
+        "28e188a4686ac82f89e729a2c96c69296aeccaa92a678a22cbea6baf8b612b24"
+        "acfb0cbeec704c350dfdadb84d76ed33eef64eb3ae7d0e384ff0efb50f7baf3e"
+        "30be90fb7035d07091b831fdd133717672b3d2f63238927dd3b573f0933e337b"
+        "b4a414e1f42f546a15a2b5e75529f56cf6a956ecb622166757aff7ea1724b761"
+        "388b98ce7800d845998d39c8d90679437a86dac33a0d9a48db807bc59b0b3b4e"
+        "bc911cd4fc1a5c5f1d97bdd25d1cfd59fe9c5ed9be171e525f9affdf1f11bf54"
+    ),
+    (
+        "000061b8e36082d8c6c1a77925a14419ad93cc2b4ef32f4b6b520aea8832e98a"
+        "7b371a8f9857f9efbdf6dc4e5e963f2ed6a4b71c35c4547c106571ddf30592bd"
+        "f66e97d6150e74b630af5117d3cfb2775bfd3a45b89dd9259d3cfc847e5c1fe4"
+        "8d59ece16e390f814b982a20a8f8c94020ca4172c3aaa212e60b87b3056b64d3"
+        "ecdd8d650fbd6e052a1c4ba4c97ca8c4414e20f6a22ec396878fe63764ef0557"
+        "97eaf652748a1532512b3093b24bd3f33a795bc1d919b8a1fcb89d001fd87e60"
+        "1ab37b0bf9d3986bdc72bdca3f125eaab720d698544035f871e110599281f339"
+        "6184003c82e4e35ca745c6fd4425259dcc17adaf2f774ecf0ad66b6ee9b6880e"
+        "f9ab98131acb7b733f6a5ed2dc0abdb254383580b758d6e092f9f34171991021"
+        "829ce32461fc0044445d25e5a73dc6852f0f4eb7cc6fadd7e9ce88760aae6b16"
+        "0fc56e7deca58d1dc904a8bc2a644bdca256c3ee4136208e6497052f87f7e64f"
+        "74f2154a9792f62ab233d38b515330ebd961b8d93a015bb91fa07e18fcc09d78"
+        "157674cef61697aed3b7b20f30d7516fb8e5d95d5b853a3d7e241f9c9d44fcfc"
+        "6e410ff98d21ec99a880c9384be02a58c3d2a26a20b2410a051364abe67387cb"
+        "e31882a0007861c025d94461c6b9a7014e8b2f33adebcc53884ae9f26b2a0a92"
+        "982ff9977b4f1af75eee3f56bd8edc3635bc5404d6dcb764f37d92c5101d71a5"
+    ),
+    (
+        "0000d347a68f75c86d0fbe48cb8018c7da1e09597c91afd6b7116456119ec2d9"
+        "b43d677a12b2c1f5d9320a757fbdacfa6e23bd64c8ac1beb032cd06ba5a376e4"
+        "687bbb3ccef41db30574d633a3fb70bcb265612214eac7addf6a0c2d79e5aaa2"
+        "dc460f017ac9a98eb149620e17c6c4810658d51fa0d773906b57b810cdd81e9f"
+        "d0f603b17679a53ebdf96ebe1b76c8310ae8d9afac677f2067e7b4a0c168122f"
+        "64cbb78cc244110309c4da83af4b7c0cbed56d92185acb1dd3da009d7555a612"
+        "b88d6bca1e02cd45d58206c5730da04a6293b1d4c41c175b0f9cdcdba9137a54"
+        "0cb0dff7aa3f797861bfb2f8c7301477d6ae05e97021a366bba168e61d2ece69"
+        "81fd52ba2772f435ecf23fb54a7d993a5be388a4fd6c2e2b36ece5ab90634324"
+        "35c0e687934f400858cf8b88fe402d07efde3c9949519a1682d15196245ef719"
+        "e9863ac14f099c4e848957ce2206f1413398e0df951746505e978dd0f8182b5f"
+        "5dbb8efcfb34287330b4e3f3963b457c87a554e2212af26deaaa39ed4c259f62"
+        "510b824cf78424c33c04ef439a8b49cc8b1558522d9afedde61a355d409593d2"
+        "e536367143b990fe88395b7e2eb6fdf13f28ec6f99a74ae052278160f4a827ef"
+        "3970ea379fff4cb8547f8738f2f021b7e36e302945e196a68e615d2628eefba9"
+        "8d4d5e0a2bc2f885e042330546cd958a57538414f1dc229b3a5ce91b9cd34f94"
+    ),
+)
+
+crc16_slicing_tables = []
+for _hex in _TABLES_HEX:
+    _table = array('H', bytes.fromhex(_hex))
+    if sys.byteorder == 'big':
+        _table.byteswap()
+    crc16_slicing_tables.append(_table)
+del _hex, _table
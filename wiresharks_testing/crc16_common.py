@@ -0,0 +1,63 @@
+# crc16_common.py
+# Custom Teensy protocol constants + the table-driven CRC-16, shared by the
+# framer (can_framer.py) and the batch verifier (crc16_batch.py).
+# Custom Packet Format: 0xAA | 0x69 | CAN_ID(4) | DLC(1) | CAN_DATA(8) | CRC(2)
+# Indices:              0      1      2-5         6        7-14          15-16
+from crc16_ccitt_table import crc16_table
+
+# --- Your Custom Protocol Constants ---
+SOF_FLOAT = 0xAA # First Start-of-Frame byte (floating preamble)
+SOF_WRAPPED = 0x69 # Second Start-of-Frame byte (wrapped, part of CRC)
+
+# This is the size of the *actual* CAN content within your serial protocol
+# (ID(4), DLC(1), 8 data bytes)
+CUSTOM_CAN_CONTENT_LEN = 13
+
+CRC_LEN = 2 # Length of the CRC-16
+
+PACKET_LEN_CRC_COVERED = 1 + CUSTOM_CAN_CONTENT_LEN # Length of data covered by CRC (0x69 + custom CAN content) = 1 + 13 = 14 bytes
+PACKET_LEN_TOTAL = 1 + PACKET_LEN_CRC_COVERED + CRC_LEN # Total custom packet length (0xAA + 14 bytes + 2 bytes CRC) = 1 + 14 + 2 = 17 bytes
+
+# Timestamped variant: the Teensy puts its free-running micros() counter right after 0x69
+# 0xAA | 0x69 | TIMESTAMP_US(4, little-endian) | CAN_ID(4) | DLC(1) | CAN_DATA(8) | CRC(2)
+# The CRC covers 0x69 through the last data byte, same as the plain frame, just 4 bytes longer
+DEVICE_TS_LEN = 4
+PACKET_LEN_TOTAL_TS = PACKET_LEN_TOTAL + DEVICE_TS_LEN # 21 bytes
+
+# CAN FD variant (--canfd): length-prefixed, same sync pair and CRC
+# 0xAA | 0x69 | [TIMESTAMP_US(4)] | CAN_ID(4) | FLAGS(1) | DLC(1) | CAN_DATA(0-64) | CRC(2)
+# FLAGS has the Linux canfd_frame bits: BRS (bit rate switch), ESI (error state), FDF (it's an FD frame).
+# The data length comes from the DLC: CANFD_DLC_TO_LEN for FD frames, min(DLC, 8) for classic
+# frames (no FDF), which the FD firmware sends in the same format.
+# The CRC covers 0x69 through the last data byte, like the fixed-size frames.
+CANFD_BRS = 0x01
+CANFD_ESI = 0x02
+CANFD_FDF = 0x04
+CANFD_DLC_TO_LEN = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+CANFD_MAX_DLEN = 64
+FD_HEADER_LEN = 2 + 4 + 1 + 1 # sync pair, ID, FLAGS, DLC
+PACKET_LEN_MAX_FD = FD_HEADER_LEN + DEVICE_TS_LEN + CANFD_MAX_DLEN + CRC_LEN # 78 bytes, timestamped
+
+
+def canfd_data_len(flags, dlc):
+    """Data bytes that follow the DLC byte of an FD-format frame."""
+    dlc &= 0x0F
+    return CANFD_DLC_TO_LEN[dlc] if flags & CANFD_FDF else min(dlc, 8)
+
+# --- CRC-16 CCITT Parameters (matching your Teensy code) ---
+# CRC16_POLY = 0x1021 # No longer directly used in the table-driven function, but good to keep for reference
+CRC16_INIT = 0xFFFF
+
+
+def crc16_ccitt_lookup(data_bytes: bytes, initial_value: int = CRC16_INIT) -> int:
+    """
+    Calculates CRC-16 CCITT using the pre-computed lookup table,
+    matching the logic of your Teensy code.
+    """
+    crc = initial_value
+    for byte_val in data_bytes:
+        # byte_val is an integer (0-255) when iterating over bytes
+        tbl_idx = ((crc >> 8) ^ byte_val) & 0xFF # high byte XOR input, ensure it's 8-bit index
+        crc = (crc << 8) ^ crc16_table[tbl_idx]
+        crc &= 0xFFFF # Ensure CRC stays 16-bit
+    return crc
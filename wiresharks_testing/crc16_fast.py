@@ -0,0 +1,106 @@
+# crc16_fast.py
+# CRC-16 CCITT engines that fold in 2, 4 or 8 bytes per loop iteration
+# instead of one. Same polynomial/init/no-reflection as crc16_ccitt_lookup,
+# so the results are identical, just fewer trips through the interpreter.
+#
+# Tables come from testing_tables/crc16_ccitt_test1.py
+# (crc16_ccitt_slicing_table.py is generated there and copied here, same as crc16_ccitt_table.py).
+import struct
+from array import array
+
+from crc16_ccitt_slicing_table import crc16_slicing_tables
+from crc16_common import CRC16_INIT
+
+_T0, _T1, _T2, _T3, _T4, _T5, _T6, _T7 = crc16_slicing_tables
+
+# 65536-entry "two bytes per step" table: wide[crc ^ ((b0 << 8) | b1)]
+# (same as generate_crc16_wide_table in crc16_ccitt_test1.py, 128 KB, built once at import)
+crc16_wide_table = array('H', [_T1[hi] ^ _T0[lo] for hi in range(256) for lo in range(256)])
+
+
+# Big-endian 16-bit words, one precompiled Struct per word count.
+# Unpacking all the pairs in one C call beats building (b0 << 8) | b1 in Python.
+_BE16_STRUCTS = {}
+
+
+def _be16_struct(n_words):
+    s = _BE16_STRUCTS.get(n_words)
+    if s is None:
+        s = _BE16_STRUCTS[n_words] = struct.Struct(f">{n_words}H")
+    return s
+
+
+def crc16_ccitt_wide(data_bytes, initial_value: int = CRC16_INIT) -> int:
+    """Two bytes per iteration using the 65536-entry table."""
+    wide = crc16_wide_table
+    crc = initial_value
+    n = len(data_bytes)
+    for word in _be16_struct(n >> 1).unpack_from(data_bytes):
+        crc = wide[crc ^ word]
+    if n & 1:
+        crc = ((crc << 8) & 0xFFFF) ^ _T0[(crc >> 8) ^ data_bytes[-1]]
+    return crc
+
+
+def crc16_ccitt_slice4(data_bytes, initial_value: int = CRC16_INIT) -> int:
+    """Slicing-by-4: four bytes per iteration, then the leftovers one at a time."""
+    crc = initial_value
+    n = len(data_bytes)
+    end4 = n - (n % 4)
+    for i in range(0, end4, 4):
+        crc = (_T3[(crc >> 8) ^ data_bytes[i]] ^ _T2[(crc & 0xFF) ^ data_bytes[i + 1]]
+               ^ _T1[data_bytes[i + 2]] ^ _T0[data_bytes[i + 3]])
+    for i in range(end4, n):
+        crc = ((crc << 8) & 0xFFFF) ^ _T0[(crc >> 8) ^ data_bytes[i]]
+    return crc
+
+
+def crc16_ccitt_slice8(data_bytes, initial_value: int = CRC16_INIT) -> int:
+    """Slicing-by-8: eight bytes per iteration, then the leftovers one at a time."""
+    crc = initial_value
+    n = len(data_bytes)
+    end8 = n - (n % 8)
+    for i in range(0, end8, 8):
+        crc = (_T7[(crc >> 8) ^ data_bytes[i]] ^ _T6[(crc & 0xFF) ^ data_bytes[i + 1]]
+               ^ _T5[data_bytes[i + 2]] ^ _T4[data_bytes[i + 3]]
+               ^ _T3[data_bytes[i + 4]] ^ _T2[data_bytes[i + 5]]
+               ^ _T1[data_bytes[i + 6]] ^ _T0[data_bytes[i + 7]])
+    for i in range(end8, n):
+        crc = ((crc << 8) & 0xFFFF) ^ _T0[(crc >> 8) ^ data_bytes[i]]
+    return crc
+
+
+_FRAME_SPAN = struct.Struct(">7H")
+
+
+def crc16_ccitt_frame(data_bytes, initial_value: int = CRC16_INIT) -> int:
+    """
+    For the 14-byte CRC span of a frame (0x69 + ID + DLC + 8 data bytes):
+    one unpack into 7 big-endian words, then 7 wide-table lookups, no loop.
+    """
+    if len(data_bytes) != 14:
+        return crc16_ccitt_wide(data_bytes, initial_value)
+    w0, w1, w2, w3, w4, w5, w6 = _FRAME_SPAN.unpack(data_bytes)
+    wide = crc16_wide_table
+    return wide[wide[wide[wide[wide[wide[wide[initial_value ^ w0] ^ w1] ^ w2] ^ w3] ^ w4] ^ w5] ^ w6]
+
+
+if __name__ == "__main__":
+    # Quick self-check + timing against the original one-byte-per-step function
+    import os
+    import timeit
+    from crc16_common import crc16_ccitt_lookup
+
+    for length in (0, 1, 2, 3, 7, 8, 13, 14, 15, 64, 255):
+        for _ in range(50):
+            sample = os.urandom(length)
+            expected = crc16_ccitt_lookup(sample)
+            for func in (crc16_ccitt_wide, crc16_ccitt_slice4, crc16_ccitt_slice8, crc16_ccitt_frame):
+                got = func(sample)
+                assert got == expected, f"{func.__name__} len={length}: {got:04X} != {expected:04X}"
+    print("All CRC engines match crc16_ccitt_lookup")
+
+    span = memoryview(os.urandom(14))
+    for func in (crc16_ccitt_lookup, crc16_ccitt_wide, crc16_ccitt_slice4, crc16_ccitt_slice8, crc16_ccitt_frame):
+        seconds = timeit.timeit(lambda: func(span), number=100_000)
+        print(f"{func.__name__:20s} {seconds * 10:.3f} us per 14-byte span")
@@ -0,0 +1,124 @@
+# device_clock.py
+# Maps the Teensy's micros() counter (sent in the timestamped 21-byte frame)
+# onto host time, so pcap timestamps say when the frame was on the CAN bus
+# instead of when Python got around to decoding it.
+#
+# Three problems to deal with:
+#   - micros() is 32 bits and wraps every ~71.6 minutes -> unwrap it into a
+#     64-bit counter (a backwards step of more than half the range is a wrap;
+#     a smaller one means the Teensy reset, so start over).
+#   - the two clocks start at unrelated points -> offset.
+#   - the Teensy crystal isn't exactly 1 MHz -> drift (tens of ppm).
+# Serial/USB latency only ever makes a frame arrive *later* than it was sent,
+# so the lowest (arrival - device time) seen in each window is the best
+# estimate of the true offset. A straight line through those window minima
+# gives offset + drift.
+#
+# Arrival times come from time.monotonic_ns(), read once per chunk by the
+# caller (not per frame), and the result is converted to epoch ns with an
+# offset taken once at startup, so there's no clock syscall per frame.
+#
+# fit=False skips all that and just trusts the device: the offset is taken
+# from the first frame and never changes. That's for replayed dumps, where
+# the "arrival" times are made up and the device's own spacing is the
+# only real timing information there is.
+import time
+from collections import deque
+
+DEVICE_COUNTER_BITS = 32
+DEFAULT_WINDOW_S = 2.0 # one offset sample (the minimum) per window
+DEFAULT_WINDOWS = 30 # fit over the last minute
+
+
+class DeviceClock:
+    """Converts raw device microsecond counters to epoch nanoseconds."""
+
+    def __init__(self, counter_bits=DEVICE_COUNTER_BITS, window_s=DEFAULT_WINDOW_S, windows=DEFAULT_WINDOWS, fit=True):
+        self.wrap = 1 << counter_bits
+        self.fit = fit
+        self.window_ns = int(window_s * 1_000_000_000)
+        # monotonic -> epoch, taken once
+        self.mono_to_epoch = time.time_ns() - time.monotonic_ns()
+        self._points = deque(maxlen=windows) # (device ns, min offset ns) per finished window
+        self.resets = 0 # device restarts seen (counter jumped back without wrapping)
+        self._reset()
+
+    def _reset(self):
+        self._last_raw = None
+        self._high = 0 # wraps so far, times self.wrap
+        self._points.clear()
+        self._win_start = None
+        self._win_min = None
+        self._win_dev = None
+        self._offset = None # fitted: host_mono_ns = device_ns * (1 + drift) + offset
+        self._drift = 0.0
+        self._anchor = 0 # device ns the fit is centered on
+
+    def unwrap(self, raw_us):
+        """64-bit device time in microseconds."""
+        last = self._last_raw
+        if last is not None and raw_us < last:
+            if last - raw_us > self.wrap >> 1:
+                self._high += self.wrap
+            else:
+                # Went backwards without wrapping: the device restarted
+                self.resets += 1
+                self._reset()
+        self._last_raw = raw_us
+        return self._high + raw_us
+
+    def stamp(self, raw_us, arrival_mono_ns):
+        """
+        Epoch nanoseconds for a frame the device stamped `raw_us`, received
+        (as part of a chunk read) at `arrival_mono_ns` (time.monotonic_ns()).
+        """
+        dev_ns = self.unwrap(raw_us) * 1000
+        sample = arrival_mono_ns - dev_ns
+        if not self.fit:
+            if self._offset is None:
+                self._offset = sample
+            return dev_ns + self._offset + self.mono_to_epoch
+        self._observe(dev_ns, sample)
+        predicted = self._anchor_offset(dev_ns)
+        if sample < predicted:
+            # Arrived earlier than the fit allows: the fit is too late, pull it down now
+            self._offset -= predicted - sample
+            predicted = sample
+        return dev_ns + predicted + self.mono_to_epoch
+
+    def _anchor_offset(self, dev_ns):
+        return self._offset + int((dev_ns - self._anchor) * self._drift)
+
+    def _observe(self, dev_ns, sample):
+        if self._offset is None:
+            self._offset = sample
+            self._anchor = dev_ns
+        if self._win_start is None:
+            self._win_start = dev_ns
+        if self._win_min is None or sample < self._win_min:
+            self._win_min = sample
+            self._win_dev = dev_ns
+        if dev_ns - self._win_start >= self.window_ns:
+            self._points.append((self._win_dev, self._win_min))
+            self._win_start = dev_ns
+            self._win_min = None
+            self._fit()
+
+    def _fit(self):
+        """Least-squares line through the window minima."""
+        n = len(self._points)
+        if n < 2:
+            self._anchor, self._offset = self._points[-1]
+            return
+        mean_x = sum(p[0] for p in self._points) / n
+        mean_y = sum(p[1] for p in self._points) / n
+        sxx = sum((p[0] - mean_x) ** 2 for p in self._points)
+        if not sxx:
+            return
+        sxy = sum((p[0] - mean_x) * (p[1] - mean_y) for p in self._points)
+        self._drift = sxy / sxx
+        self._anchor = int(mean_x)
+        self._offset = int(mean_y)
+
+    def drift_ppm(self):
+        return self._drift * 1e6
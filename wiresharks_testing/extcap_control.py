@@ -0,0 +1,221 @@
+# extcap_control.py
+# The extcap interface toolbar (View > Interface Toolbars > wowcan2shark in
+# Wireshark) for a running capture: change the log level, set an ID filter,
+# pause/resume the output, and see the frame rate and error counts live.
+#
+# Wireshark passes two more FIFOs on --capture, --extcap-control-in (it writes
+# to us) and --extcap-control-out (we write to it). Both carry the same
+# messages, see doc/extcap.adoc / extcap_example.py in the Wireshark sources:
+#   'T' | LENGTH(3, big-endian) | CONTROL(1) | COMMAND(1) | PAYLOAD(LENGTH - 2)
+# The controls themselves are announced with `control {...}` lines in the
+# --extcap-interfaces output (control_interface_lines() below).
+#
+# Neither pipe is ever touched from the capture thread. Opening a FIFO blocks
+# until the other end opens it and Wireshark may be slow to read its end, so
+# there's one thread reading control-in and one writing control-out from a
+# small queue. The capture side only ever does:
+#   - read `paused` / `id_filter` once per batch of frames (write_frames),
+#     the reader thread swaps them by plain assignment
+#   - put_nowait() the stats line once per summary interval, dropped if the
+#     queue is full (nobody is reading the toolbar anyway)
+import queue
+import struct
+import threading
+
+from capture_log import LOG_LEVELS
+
+SYNC = ord('T')
+_HEADER = struct.Struct('>B3sBB') # sync, length (3 bytes), control, command
+_LENGTH = struct.Struct('>I')
+
+# Commands
+CMD_INITIALIZED = 0
+CMD_SET = 1
+CMD_ADD = 2
+CMD_REMOVE = 3
+CMD_ENABLE = 4
+CMD_DISABLE = 5
+CMD_STATUSBAR = 6
+CMD_INFORMATION = 7
+CMD_WARNING = 8
+CMD_ERROR = 9
+
+# Our controls (the numbers are what goes in the CONTROL byte)
+CTRL_LOG_LEVEL = 0
+CTRL_ID_FILTER = 1
+CTRL_PAUSE = 2
+CTRL_STATS = 3
+
+OUT_QUEUE_SIZE = 64 # messages waiting for Wireshark to read control-out
+
+CAN_EFF_MASK = 0x1FFFFFFF
+STANDARD_IDS = 0x800
+
+
+def control_interface_lines(log_level):
+    """The `control {...}` / `value {...}` lines for --extcap-interfaces."""
+    lines = [
+        f"control {{number={CTRL_LOG_LEVEL}}}{{type=selector}}{{display=Log level}}{{tooltip=stderr diagnostics while capturing}}",
+    ]
+    for name in LOG_LEVELS:
+        default = "{default=true}" if name == log_level else ""
+        lines.append(f"value {{control={CTRL_LOG_LEVEL}}}{{value={name}}}{{display={name}}}{default}")
+    lines += [
+        f"control {{number={CTRL_ID_FILTER}}}{{type=string}}{{display=ID filter}}"
+        f"{{tooltip=Only pass these CAN IDs, e.g. 0x100-0x1FF,0x7DF (empty: all)}}",
+        f"control {{number={CTRL_PAUSE}}}{{type=boolean}}{{display=Pause}}{{default=false}}"
+        f"{{tooltip=Keep decoding but stop sending frames to Wireshark}}",
+        f"control {{number={CTRL_STATS}}}{{type=string}}{{display=Stats}}{{tooltip=Updated once per second by the capture}}",
+    ]
+    return lines
+
+
+class IdFilter:
+    """
+    Set of CAN IDs from text like "0x100-0x1FF, 0x7DF, 1234": IDs and inclusive ranges,
+    separated by commas. `can_id in f` is one bytearray lookup for 11-bit IDs, ranges otherwise.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.ranges = []
+        for part in text.replace(" ", "").split(","):
+            if not part:
+                continue
+            low, _, high = part.partition("-")
+            low = int(low, 0)
+            high = int(high, 0) if high else low
+            if not 0 <= low <= high <= CAN_EFF_MASK:
+                raise ValueError(f"bad ID range {part!r}")
+            self.ranges.append((low, high))
+        self.standard = bytearray(STANDARD_IDS)
+        for low, high in self.ranges:
+            if low < STANDARD_IDS:
+                end = min(high, STANDARD_IDS - 1) + 1
+                self.standard[low:end] = b'\x01' * (end - low)
+
+    def __contains__(self, can_id):
+        can_id &= CAN_EFF_MASK # the frame's ID may carry the EFF/RTR/ERR flag bits
+        if can_id < STANDARD_IDS:
+            return bool(self.standard[can_id])
+        return any(low <= can_id <= high for low, high in self.ranges)
+
+
+class ExtcapControl:
+    """
+    Both control pipes of one capture. Call start() once the capture is set up,
+    stop() when it ends; the toolbar settings show up in `paused` and `id_filter`
+    (None = everything passes) and `log.level` is changed in place.
+    """
+
+    def __init__(self, control_in, control_out, log):
+        self.control_in = control_in
+        self.control_out = control_out
+        self.log = log
+        self.paused = False
+        self.id_filter = None
+        self.filtered = 0 # frames dropped by the ID filter, since the last stats line
+        self._out = queue.Queue(maxsize=OUT_QUEUE_SIZE)
+        self._threads = []
+
+    def start(self):
+        if self.control_out:
+            self._threads.append(threading.Thread(target=self._write_loop, name="extcap-control-out", daemon=True))
+        if self.control_in:
+            self._threads.append(threading.Thread(target=self._read_loop, name="extcap-control-in", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        # The reader sits in a blocking read until Wireshark closes its end, it's a daemon thread so just leave it
+        try:
+            self._out.put_nowait(None)
+        except queue.Full:
+            pass
+
+    # --- To Wireshark (never blocks the caller) ---
+
+    def send(self, control, command, payload=b''):
+        if not self.control_out:
+            return
+        if isinstance(payload, str):
+            payload = payload.encode()
+        try:
+            self._out.put_nowait(_HEADER.pack(SYNC, _LENGTH.pack(len(payload) + 2)[1:], control, command) + payload)
+        except queue.Full:
+            pass
+
+    def on_summary(self, elapsed, frames, discarded_bytes, crc_errors, false_syncs):
+        """CaptureLog listener: puts the last interval's numbers in the Stats control."""
+        filtered, self.filtered = self.filtered, 0
+        text = (f"{frames / elapsed:.0f} frames/s, {crc_errors} CRC errors, {false_syncs} false syncs, "
+                f"{discarded_bytes} bytes discarded")
+        if self.id_filter is not None:
+            text += f", {filtered} filtered"
+        if self.paused:
+            text += " (paused)"
+        self.send(CTRL_STATS, CMD_SET, text)
+
+    def _send_current(self):
+        """Shows our current settings once Wireshark's toolbar is up."""
+        for name, level in LOG_LEVELS.items():
+            if level == self.log.level:
+                self.send(CTRL_LOG_LEVEL, CMD_SET, name)
+        self.send(CTRL_ID_FILTER, CMD_SET, self.id_filter.text if self.id_filter is not None else "")
+        self.send(CTRL_PAUSE, CMD_SET, b'\x01' if self.paused else b'\x00')
+
+    def _write_loop(self):
+        try:
+            with open(self.control_out, 'wb', buffering=0) as pipe:
+                while (message := self._out.get()) is not None:
+                    pipe.write(message)
+        except OSError as e:
+            self.log.error("Control pipe (out) closed: %s", e)
+
+    # --- From Wireshark ---
+
+    def _read_loop(self):
+        try:
+            with open(self.control_in, 'rb', buffering=0) as pipe:
+                while header := _read_exact(pipe, _HEADER.size):
+                    sync, length, control, command = _HEADER.unpack(header)
+                    length = _LENGTH.unpack(b'\0' + length)[0]
+                    payload = _read_exact(pipe, length - 2) if length > 2 else b''
+                    if sync != SYNC or payload is None:
+                        self.log.error("Control pipe (in): bad message, ignoring the rest.")
+                        return
+                    self._handle(control, command, payload)
+        except OSError as e:
+            self.log.error("Control pipe (in) closed: %s", e)
+
+    def _handle(self, control, command, payload):
+        if command == CMD_INITIALIZED:
+            self._send_current()
+        elif command != CMD_SET:
+            return
+        elif control == CTRL_LOG_LEVEL:
+            level = payload.decode(errors="replace")
+            if level in LOG_LEVELS:
+                self.log.level = LOG_LEVELS[level]
+        elif control == CTRL_ID_FILTER:
+            text = payload.decode(errors="replace").strip()
+            try:
+                self.id_filter = IdFilter(text) if text else None
+            except ValueError as e:
+                self.send(CTRL_ID_FILTER, CMD_STATUSBAR, f"ID filter not applied: {e}")
+                return
+            self.send(CTRL_ID_FILTER, CMD_STATUSBAR, f"ID filter: {text or 'off'}")
+        elif control == CTRL_PAUSE:
+            self.paused = payload[:1] == b'\x01'
+            self.send(CTRL_PAUSE, CMD_STATUSBAR, "Output paused" if self.paused else "Output resumed")
+
+
+def _read_exact(pipe, n):
+    """n bytes, or None at end of file."""
+    data = b''
+    while len(data) < n:
+        chunk = pipe.read(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
@@ -0,0 +1,172 @@
+# frame_protocols.py
+# Every serial format the Teensy firmware has spoken over the life of this
+# repo, described in one place, so they all go through the same capture
+# pipeline (FrameRing -> framer -> capture filter -> SocketCAN encoder ->
+# PcapBatchWriter) instead of each having its own byte-at-a-time loop.
+#
+#   aa69        0xAA 0x69 ID(4) DLC DATA(8) CRC16(2)                 wiresharkscan_4_tables.py
+#   aa69-ts     0xAA 0x69 TS_US(4) ID(4) DLC DATA(8) CRC16(2)        --device-timestamps
+#   aa69-fd     0xAA 0x69 [TS_US(4)] ID(4) FLAGS DLC DATA(n) CRC16   --canfd (crc16_common.py)
+#   xor16       0x69 FLAGS ID(4, BE) LEN DATA(8) XOR                 old_tests/test_extcap.py
+#   crc32-25    0x69 TS_US(4) ID(4) DLC pad(3) DATA(8) CRC32(4)      old_tests/sync6925byte.py
+#   xor64       0x69 ID(4) DLC DATA(8) zero padding XOR              python_extcap/ (XOR includes the SOF)
+#   slcan       "t<id><len><data>\r" text lines, see slcan_framer.py gemini_python_test*.py
+#
+# A FrameProtocol says how to find a frame (sync pattern, length rule,
+# checksum) and where its CAN fields are (field layout). Nothing in here
+# decodes anything itself:
+#   - can_framer.make_framer() picks the framer: the tuned CanFramer for the
+#     fixed CRC-16 formats, ProtocolFramer (same stages, driven by the
+#     description) for the others, SlcanFramer for the text one
+#   - socketcan_encoder.make_encoder() picks the encoder the same way
+#   - CaptureFilter compiles against the field layout
+# New formats are added with register_protocol().
+import struct
+import zlib
+from functools import reduce
+from operator import xor
+
+from crc16_common import (
+    SOF_FLOAT, SOF_WRAPPED, PACKET_LEN_TOTAL, PACKET_LEN_TOTAL_TS, DEVICE_TS_LEN, CRC_LEN,
+    FD_HEADER_LEN, canfd_data_len,
+)
+from crc16_fast import crc16_ccitt_wide
+
+DEFAULT_PROTOCOL = "aa69"
+
+_CRC32 = struct.Struct('<I')
+
+
+class FrameProtocol:
+    """
+    One serial frame format.
+
+    Framing:
+      sync        bytes every frame starts with (None for line-based text formats)
+      frame_len   total length, or None if it varies per frame
+      header_len  bytes needed before length() can tell the frame's length
+      length      fn(ring, pos) -> total length of the frame at `pos` (variable-length formats)
+      checksum    fn(frame) -> (calculated, received), the frame is good when they're equal
+    Field layout (offsets into the frame):
+      id_pos, id_big_endian, dlc_pos, data_pos, data_len (max data bytes)
+      ext_flag    (offset, mask) of an "extended ID" bit, if the format has one
+      ts_pos      offset of a 32-bit little-endian device micros() counter, or None
+      fd          CAN FD (FLAGS byte before the DLC, canfd_frame output)
+    """
+
+    def __init__(self, name, description, sync, frame_len, checksum, id_pos, dlc_pos, data_pos,
+                 id_big_endian=False, data_len=8, ext_flag=None, ts_pos=None, fd=False,
+                 header_len=None, length=None):
+        self.name = name
+        self.description = description
+        self.sync = sync
+        self.frame_len = frame_len
+        self.checksum = checksum
+        self.id_pos = id_pos
+        self.id_big_endian = id_big_endian
+        self.dlc_pos = dlc_pos
+        self.data_pos = data_pos
+        self.data_len = data_len
+        self.ext_flag = ext_flag
+        self.ts_pos = ts_pos
+        self.fd = fd
+        self.header_len = header_len or frame_len
+        self.length = length
+
+    def __repr__(self):
+        return f"FrameProtocol({self.name!r})"
+
+
+# --- Checksums: fn(frame) -> (calculated, received) ---
+
+def crc16_checksum(frame):
+    """CRC-16 CCITT over 0x69 up to the last data byte, sent big-endian in the last 2 bytes."""
+    n = len(frame)
+    return crc16_ccitt_wide(frame[1:n - CRC_LEN]), (frame[n - 2] << 8) | frame[n - 1]
+
+
+def xor16_checksum(frame):
+    """XOR of everything between the SOF and the checksum byte (test_extcap.py)."""
+    return reduce(xor, frame[1:15], 0), frame[15]
+
+
+def crc32_checksum(frame):
+    """zlib CRC-32 of bytes 1..20, inverted once more, little-endian at 21 (sync6925byte.py)."""
+    return zlib.crc32(frame[1:21]) ^ 0xFFFFFFFF, _CRC32.unpack_from(frame, 21)[0]
+
+
+def xor64_checksum(frame):
+    """XOR of bytes 0..62, SOF included (python_extcap, INCLUDE_SOF_IN_CHECKSUM = True)."""
+    return reduce(xor, frame[0:63], 0), frame[63]
+
+
+def fd_length(field):
+    """Length rule of the CAN FD format: header + the data length its FLAGS/DLC say + CRC."""
+    header_len = FD_HEADER_LEN + field
+    dlc_pos = header_len - 1
+
+    def length(ring, pos):
+        if len(ring) <= pos + dlc_pos:
+            return None
+        return header_len + canfd_data_len(ring[pos + dlc_pos - 1], ring[pos + dlc_pos]) + CRC_LEN
+    return length
+
+
+# --- The registry ---
+
+PROTOCOLS = {}
+
+
+def register_protocol(protocol):
+    PROTOCOLS[protocol.name] = protocol
+    return protocol
+
+
+def get_protocol(name, device_timestamps=False, canfd=False):
+    """
+    The protocol called `name`. The aa69 family is one name on the command line:
+    --device-timestamps / --canfd pick its timestamped / FD variant.
+    Raises ValueError for unknown names and for timestamps on a format without them.
+    """
+    if name == DEFAULT_PROTOCOL and canfd:
+        name = "aa69-fd"
+    if name in ("aa69", "aa69-fd") and device_timestamps:
+        name += "-ts"
+    if name not in PROTOCOLS:
+        raise ValueError(f"unknown protocol {name!r} (one of {', '.join(sorted(PROTOCOLS))})")
+    protocol = PROTOCOLS[name]
+    if device_timestamps and protocol.ts_pos is None:
+        raise ValueError(f"protocol {name!r} has no device timestamps")
+    return protocol
+
+
+SYNC_AA69 = bytes((SOF_FLOAT, SOF_WRAPPED))
+SYNC_69 = bytes((SOF_WRAPPED,))
+
+AA69 = register_protocol(FrameProtocol(
+    "aa69", "0xAA 0x69 ID DLC DATA(8) CRC-16 (17 bytes)", SYNC_AA69, PACKET_LEN_TOTAL, crc16_checksum,
+    id_pos=2, dlc_pos=6, data_pos=7))
+AA69_TS = register_protocol(FrameProtocol(
+    "aa69-ts", "0xAA 0x69 TIMESTAMP ID DLC DATA(8) CRC-16 (21 bytes)", SYNC_AA69, PACKET_LEN_TOTAL_TS, crc16_checksum,
+    id_pos=2 + DEVICE_TS_LEN, dlc_pos=6 + DEVICE_TS_LEN, data_pos=7 + DEVICE_TS_LEN, ts_pos=2))
+AA69_FD = register_protocol(FrameProtocol(
+    "aa69-fd", "0xAA 0x69 ID FLAGS DLC DATA(0-64) CRC-16 (CAN FD)", SYNC_AA69, None, crc16_checksum,
+    id_pos=2, dlc_pos=7, data_pos=8, data_len=64, fd=True, header_len=FD_HEADER_LEN, length=fd_length(0)))
+AA69_FD_TS = register_protocol(FrameProtocol(
+    "aa69-fd-ts", "0xAA 0x69 TIMESTAMP ID FLAGS DLC DATA(0-64) CRC-16 (CAN FD)", SYNC_AA69, None, crc16_checksum,
+    id_pos=2 + DEVICE_TS_LEN, dlc_pos=7 + DEVICE_TS_LEN, data_pos=8 + DEVICE_TS_LEN, data_len=64, ts_pos=2, fd=True,
+    header_len=FD_HEADER_LEN + DEVICE_TS_LEN, length=fd_length(DEVICE_TS_LEN)))
+XOR16 = register_protocol(FrameProtocol(
+    "xor16", "0x69 FLAGS ID(BE) LEN DATA(8) XOR (16 bytes)", SYNC_69, 16, xor16_checksum,
+    id_pos=2, id_big_endian=True, dlc_pos=6, data_pos=7, ext_flag=(1, 0x01)))
+CRC32_25 = register_protocol(FrameProtocol(
+    "crc32-25", "0x69 TIMESTAMP ID DLC pad DATA(8) CRC-32 (25 bytes)", SYNC_69, 25, crc32_checksum,
+    id_pos=5, dlc_pos=9, data_pos=13, ts_pos=1))
+XOR64 = register_protocol(FrameProtocol(
+    "xor64", "0x69 ID DLC DATA(8) padding XOR (64 bytes)", SYNC_69, 64, xor64_checksum,
+    id_pos=1, dlc_pos=5, data_pos=6))
+# SLCAN is text: SlcanFramer turns each line into this fixed record,
+# CAN_ID(4, little-endian, with the EFF/RTR flag bits) | DLC | DATA(8), which is what gets filtered and encoded
+SLCAN = register_protocol(FrameProtocol(
+    "slcan", "SLCAN text lines (t/T/r/R), e.g. t1238DEADBEEF00000000", None, 13, None,
+    id_pos=0, dlc_pos=4, data_pos=5))
@@ -0,0 +1,93 @@
+# frame_ring.py
+# Preallocated receive buffer for the serial framers.
+#
+# The old capture loop kept an immutable bytes object and did
+# ``partial_packet += data`` / ``partial_packet[1:]`` / ``partial_packet[17:]``,
+# which copies everything still waiting in the buffer on every step.
+# FrameRing keeps one bytearray plus a read cursor (start) and a write cursor
+# (end). Skipping or consuming bytes only moves the read cursor, and the
+# leftover bytes are moved back to the front only when there's no room left
+# at the tail (compaction), so that copy happens once per buffer-full instead
+# of once per frame.
+
+DEFAULT_RING_SIZE = 64 * 1024
+
+
+class FrameRing:
+    """
+    Byte buffer with a read cursor and occasional compaction.
+    Offsets passed to find/peek/skip are relative to the read cursor.
+    """
+
+    def __init__(self, capacity=DEFAULT_RING_SIZE):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0  # read cursor: first unread byte
+        self._end = 0    # write cursor: one past the last byte written
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, offset):
+        """Returns the byte (as an int) at `offset` past the read cursor."""
+        return self._buf[self._start + offset]
+
+    def feed(self, data):
+        """Appends `data` to the tail, compacting or growing if it doesn't fit."""
+        n = len(data)
+        if self._end + n > len(self._buf):
+            self._make_room(n)
+        self._buf[self._end:self._end + n] = data
+        self._end += n
+
+    def _make_room(self, n):
+        pending = self._end - self._start
+        if pending + n > len(self._buf):
+            # Not even an empty buffer would fit it, so grow (rare: only when
+            # the reader falls way behind). A new bytearray is used instead of
+            # resizing, because frames handed out by peek() still point at the old one.
+            new_buf = bytearray(max(pending + n, len(self._buf) * 2))
+            new_buf[:pending] = self._view[self._start:self._end]
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+        else:
+            # Compaction: move the unread bytes back to the front
+            self._buf[:pending] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = pending
+
+    def find(self, sub, start=0, end=None):
+        """Like bytes.find, but only over unread bytes. Returns -1 if not found."""
+        stop = self._end if end is None else min(self._end, self._start + end)
+        idx = self._buf.find(sub, self._start + start, stop)
+        if idx == -1:
+            return -1
+        return idx - self._start
+
+    def rfind(self, sub):
+        """Like bytes.rfind, over all unread bytes. Returns -1 if not found."""
+        idx = self._buf.rfind(sub, self._start, self._end)
+        if idx == -1:
+            return -1
+        return idx - self._start
+
+    def peek(self, n, offset=0):
+        """
+        Zero-copy memoryview of `n` unread bytes starting at `offset`.
+        Only valid until the next feed(), since feed() may compact the buffer.
+        """
+        begin = self._start + offset
+        return self._view[begin:begin + n]
+
+    def skip(self, n):
+        """Drops `n` bytes from the front. O(1), nothing gets copied."""
+        self._start += n
+        if self._start >= self._end:
+            # Buffer drained, rewind both cursors for free
+            self._start = 0
+            self._end = 0
+
+    def keep_tail(self, n):
+        """Drops everything except the last `n` unread bytes."""
+        if len(self) > n:
+            self.skip(len(self) - n)
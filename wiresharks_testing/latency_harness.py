@@ -0,0 +1,138 @@
+# latency_harness.py
+# End-to-end latency of the extcap, from the byte going into the "serial port"
+# to the pcap record coming out of the FIFO, without a Teensy.
+#
+# Starts teensy_emulator.py's pty, runs wiresharkscan_4_tables.py --capture on
+# it (as its own process, the way Wireshark does), and reads the FIFO like
+# Wireshark would. Each emulated frame carries its send time (monotonic ns) in
+# its data bytes, and is timed again the moment its record is read off the
+# FIFO, so latency = read time - send time, on the same clock.
+# Anything after -- is passed on to the extcap (e.g. -- --pipelined --pcapng).
+#
+# Usage: python latency_harness.py --rate 2000 --duration 10 [-- --asyncio]
+import argparse
+import os
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from teensy_emulator import TeensyEmulator, DEFAULT_RATE
+
+EXTCAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wiresharkscan_4_tables.py")
+PERCENTILES = (50, 90, 99, 99.9)
+
+PCAP_GLOBAL_HEADER_LEN = 24
+PCAP_RECORD_HEADER = struct.Struct('<IIII')
+PCAPNG_BLOCK_HEADER = struct.Struct('<II')
+PCAPNG_EPB_TYPE = 6
+PCAPNG_EPB_DATA_OFFSET = 28
+SOCKETCAN_DATA_OFFSET = 8 # data[8] in struct can_frame
+SEND_NS = struct.Struct('<Q')
+
+
+class FifoLatencyReader(threading.Thread):
+    """Reads pcap or pcapng from the FIFO and records the latency of every packet in it."""
+
+    def __init__(self, fifo_path):
+        super().__init__(name="fifo-reader", daemon=True)
+        self.fifo_path = fifo_path
+        self.latencies_ns = []
+
+    def run(self):
+        buf = bytearray()
+        pcapng = None
+        with open(self.fifo_path, 'rb', buffering=0) as fifo:
+            while chunk := fifo.read(65536):
+                now_ns = time.monotonic_ns()
+                buf += chunk
+                if pcapng is None:
+                    if len(buf) < 4:
+                        continue
+                    pcapng = buf[:4] == b'\x0a\x0d\x0d\x0a'
+                    if not pcapng:
+                        del buf[:PCAP_GLOBAL_HEADER_LEN] # enough of it always comes in the first write
+                used = self._parse_pcapng(buf, now_ns) if pcapng else self._parse_pcap(buf, now_ns)
+                del buf[:used]
+
+    def _record(self, payload, now_ns):
+        # Single port, no link header: payload is the 16-byte can_frame (or canfd_frame, data at the same offset)
+        self.latencies_ns.append(now_ns - SEND_NS.unpack_from(payload, SOCKETCAN_DATA_OFFSET)[0])
+
+    def _parse_pcap(self, buf, now_ns):
+        pos = 0
+        while pos + PCAP_RECORD_HEADER.size <= len(buf):
+            incl_len = PCAP_RECORD_HEADER.unpack_from(buf, pos)[2]
+            end = pos + PCAP_RECORD_HEADER.size + incl_len
+            if end > len(buf):
+                break
+            self._record(buf[pos + PCAP_RECORD_HEADER.size:end], now_ns)
+            pos = end
+        return pos
+
+    def _parse_pcapng(self, buf, now_ns):
+        pos = 0
+        while pos + PCAPNG_BLOCK_HEADER.size <= len(buf):
+            block_type, block_len = PCAPNG_BLOCK_HEADER.unpack_from(buf, pos)
+            if pos + block_len > len(buf):
+                break
+            if block_type == PCAPNG_EPB_TYPE:
+                self._record(buf[pos + PCAPNG_EPB_DATA_OFFSET:pos + block_len], now_ns)
+            pos += block_len
+        return pos
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure extcap latency against an emulated Teensy on a pty")
+    parser.add_argument("--format", choices=("17", "21", "fd"), default="17",
+                        help="Wire format the extcap decodes (21 adds --device-timestamps, fd adds --canfd) (default: 17)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help=f"Frames per second (default: {DEFAULT_RATE})")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to send for (default: 10)")
+    parser.add_argument("extcap_args", nargs=argparse.REMAINDER, help="-- then extra arguments for the extcap")
+    args = parser.parse_args()
+    extcap_args = [arg for arg in args.extcap_args if arg != "--"]
+    if args.format == "21":
+        extcap_args.append("--device-timestamps")
+    elif args.format == "fd":
+        extcap_args.append("--canfd")
+
+    emulator = TeensyEmulator(args.format, args.rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        fifo_path = os.path.join(tmp, "capture.fifo")
+        os.mkfifo(fifo_path)
+        reader = FifoLatencyReader(fifo_path)
+        reader.start()
+        extcap = subprocess.Popen(
+            [sys.executable, EXTCAP, "--capture", "--serial-port", emulator.port, "--fifo", fifo_path,
+             "--log-level", "off"] + extcap_args)
+        try:
+            time.sleep(0.5) # let it open the port and write the header
+            frames = "CAN FD" if args.format == "fd" else f"{args.format}-byte"
+            print(f"Sending {frames} frames at {args.rate:g}/s for {args.duration:g} s on {emulator.port}, "
+                  f"extcap args: {' '.join(extcap_args) or '(none)'}")
+            emulator.start()
+            time.sleep(args.duration)
+            emulator.stop()
+            time.sleep(0.5) # let the last frames through
+        finally:
+            extcap.send_signal(signal.SIGINT)
+            extcap.wait()
+            reader.join()
+            emulator.close()
+
+    latencies = sorted(reader.latencies_ns)
+    print(f"Sent {emulator.frames_sent}, received {len(latencies)}, lost {emulator.frames_sent - len(latencies)}")
+    if latencies:
+        summary = ", ".join(f"p{p:g} {percentile(latencies, p) / 1e6:.3f}" for p in PERCENTILES)
+        print(f"Latency ms: {summary}, max {latencies[-1] / 1e6:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# metrics.py
+# Counters, gauges and histograms for the capture process, published as a
+# Prometheus text file (exposition format 0.0.4) and summarized on exit.
+#
+# Nothing here sits on the per-frame path. The per-frame counting is still
+# the plain attribute increments in CaptureLog, which folds them in here once
+# per summary interval (CaptureLog.tick). Numbers that other objects already
+# keep (writer flushes, reader queue depth, ring high-water mark...) are
+# registered as callbacks and only read when the file is written. The two
+# histograms get one observe() per serial read / FIFO write, not per frame.
+#
+# The file is written to a temp name and renamed over the old one, so a
+# scraper (e.g. node_exporter's textfile collector) never sees half of it.
+import bisect
+import os
+import time
+
+METRIC_PREFIX = "can_extcap_"
+DEFAULT_METRICS_INTERVAL = 5.0 # seconds between metrics file writes
+
+# Seconds per FIFO write: anything past 10 ms means Wireshark isn't keeping up
+FIFO_WRITE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+# Bytes per serial read
+READ_SIZE_BUCKETS = (1, 16, 64, 256, 1024, 4096, 16384, 65536)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Histogram:
+    """Fixed-bucket histogram, same semantics as a Prometheus one (cumulative on output)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Holds the capture's metrics. counter()/gauge() take either nothing (the
+    registry keeps the value, update it with add()/set()) or a function
+    that returns the current value when the metrics are written.
+    """
+
+    def __init__(self, path=None, interval=DEFAULT_METRICS_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._metrics = {} # (name, labels string) -> [type, help, value or fn or Histogram]
+        self._last_publish = time.monotonic()
+        self._last_rates = (self._last_publish, 0, 0) # time, frames, serial bytes at the last publish
+
+    def _register(self, kind, name, help_text, value, labels):
+        key = (METRIC_PREFIX + name, _labels(labels))
+        if key not in self._metrics:
+            self._metrics[key] = [kind, help_text, value]
+        return key
+
+    def counter(self, name, help_text, fn=None, labels=None):
+        return self._register("counter", name, help_text, fn if fn else 0, labels)
+
+    def gauge(self, name, help_text, fn=None, labels=None):
+        return self._register("gauge", name, help_text, fn if fn else 0, labels)
+
+    def histogram(self, name, help_text, buckets, labels=None):
+        key = self._register("histogram", name, help_text, Histogram(buckets), labels)
+        return self._metrics[key][2]
+
+    def add(self, key, n):
+        self._metrics[key][2] += n
+
+    def set(self, key, value):
+        self._metrics[key][2] = value
+
+    def value(self, key):
+        value = self._metrics[key][2]
+        return value() if callable(value) else value
+
+    # --- Output ---
+
+    def render(self):
+        """All metrics in Prometheus text exposition format."""
+        lines = []
+        described = set()
+        # All samples of one metric have to be together under its HELP/TYPE lines
+        for (name, labels), (kind, help_text, value) in sorted(self._metrics.items(), key=lambda item: item[0][0]):
+            if name not in described:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+            if kind == "histogram":
+                cumulative = 0
+                inner = labels[1:-1] + "," if labels else ""
+                for bound, count in zip(value.buckets + ("+Inf",), value.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{inner}le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{labels} {value.sum:g}")
+                lines.append(f"{name}_count{labels} {value.count}")
+            else:
+                lines.append(f"{name}{labels} {value() if callable(value) else value:g}")
+        return "\n".join(lines) + "\n"
+
+    def _update_rates(self, now):
+        """Per-second throughput gauges, from the frame / serial byte counters' change since the last publish."""
+        frames_key = (METRIC_PREFIX + "frames_total", "")
+        bytes_key = (METRIC_PREFIX + "serial_bytes_total", "")
+        if frames_key not in self._metrics or bytes_key not in self._metrics:
+            return
+        last_time, last_frames, last_bytes = self._last_rates
+        frames, serial_bytes = self.value(frames_key), self.value(bytes_key)
+        elapsed = now - last_time
+        if elapsed > 0:
+            self.set(self.gauge("frames_per_second", "Frames decoded per second since the last publish"),
+                     (frames - last_frames) / elapsed)
+            self.set(self.gauge("serial_bytes_per_second", "Serial bytes read per second since the last publish"),
+                     (serial_bytes - last_bytes) / elapsed)
+        self._last_rates = (now, frames, serial_bytes)
+
+    def maybe_publish(self, now=None):
+        """Writes the metrics file if `interval` has passed. Cheap to call often."""
+        now = now or time.monotonic()
+        if self.path and now - self._last_publish >= self.interval:
+            self.publish(now)
+
+    def publish(self, now=None):
+        """Updates the throughput gauges and writes the metrics file (if there is one)."""
+        self._last_publish = now or time.monotonic()
+        self._update_rates(self._last_publish)
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.path)
+
+    def summary_lines(self):
+        """One line per metric, for the log at exit (histograms as count / mean)."""
+        lines = []
+        for (name, labels), (kind, _, value) in self._metrics.items():
+            short = name[len(METRIC_PREFIX):] + labels
+            if kind == "histogram":
+                mean = value.sum / value.count if value.count else 0
+                lines.append(f"{short}: {value.count} observations, mean {mean:g}")
+            else:
+                lines.append(f"{short}: {value() if callable(value) else value:g}")
+        return lines
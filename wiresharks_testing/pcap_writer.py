@@ -0,0 +1,183 @@
+# pcap_writer.py
+# Coalesces pcap records before they go into the Wireshark FIFO.
+#
+# Writing + flushing the FIFO for every single CAN frame means two write
+# calls and a flush (a syscall) per frame. Here the records get packed into
+# one preallocated buffer, and the buffer is handed to the FIFO when either
+#   - it holds at least `flush_bytes` bytes, or
+#   - the oldest record in it is `flush_age` seconds old (checked by poll()),
+# whichever comes first. Wireshark still sees frames within a few ms.
+#
+# It can write either legacy pcap records or pcapng Enhanced Packet Blocks
+# (pcapng=True), see write_packet(). The pcapng header blocks are built by
+# pcapng_section_header() / pcapng_interface_block() below.
+# https://www.ietf.org/archive/id/draft-ietf-opsawg-pcapng-02.html
+import struct
+import time
+
+DEFAULT_FLUSH_BYTES = 4096
+DEFAULT_FLUSH_AGE = 0.005 # 5 ms
+
+# Room left over past flush_bytes so a record never has to be split
+RECORD_SLACK = 256
+
+# A FIFO write taking longer than this counts as a stall (Wireshark not keeping up)
+FIFO_STALL_SECONDS = 0.01
+
+PCAP_RECORD_HEADER = struct.Struct('<IIII') # ts_sec, ts_usec, incl_len, orig_len
+
+# --- pcapng ---
+PCAPNG_SHB_TYPE = 0x0A0D0D0A # Section Header Block
+PCAPNG_IDB_TYPE = 0x00000001 # Interface Description Block
+PCAPNG_EPB_TYPE = 0x00000006 # Enhanced Packet Block
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# Option codes
+OPT_ENDOFOPT = 0
+IF_NAME = 2
+IF_DESCRIPTION = 3
+IF_TSRESOL = 9
+TSRESOL_NANOSECONDS = 9 # 10^-9 s per timestamp tick
+
+# block type, total length, interface id, ts high, ts low, captured len, original len
+PCAPNG_EPB_HEADER = struct.Struct('<IIIIIII')
+PCAPNG_EPB_TRAILER = struct.Struct('<I') # total length again
+
+
+def _pad4(n):
+    return (4 - n % 4) % 4
+
+
+def _pcapng_option(code, value):
+    return struct.pack('<HH', code, len(value)) + value + bytes(_pad4(len(value)))
+
+
+def _pcapng_block(block_type, body):
+    total_len = 12 + len(body)
+    return struct.pack('<II', block_type, total_len) + body + struct.pack('<I', total_len)
+
+
+def pcapng_section_header():
+    """Section Header Block: byte-order magic, version 1.0, section length unknown (-1)."""
+    return _pcapng_block(PCAPNG_SHB_TYPE, struct.pack('<IHHq', PCAPNG_BYTE_ORDER_MAGIC, 1, 0, -1))
+
+
+def pcapng_interface_block(linktype, name=None, description=None, snaplen=65535):
+    """
+    Interface Description Block for one source (serial port), with nanosecond
+    timestamps (if_tsresol = 9). Interfaces get ids 0, 1, 2... in the order
+    their blocks are written.
+    """
+    options = _pcapng_option(IF_TSRESOL, bytes([TSRESOL_NANOSECONDS]))
+    if name:
+        options += _pcapng_option(IF_NAME, name.encode())
+    if description:
+        options += _pcapng_option(IF_DESCRIPTION, description.encode())
+    options += _pcapng_option(OPT_ENDOFOPT, b'')
+    return _pcapng_block(PCAPNG_IDB_TYPE, struct.pack('<HHI', linktype, 0, snaplen) + options)
+
+
+class PcapBatchWriter:
+    """Buffers pcap output and writes it to `fifo` in big chunks."""
+
+    def __init__(self, fifo, flush_bytes=DEFAULT_FLUSH_BYTES, flush_age=DEFAULT_FLUSH_AGE, pcapng=False):
+        self.fifo = fifo
+        self.pcapng = pcapng
+        self.flush_bytes = flush_bytes
+        self.flush_age = flush_age
+        self._buf = bytearray(flush_bytes + RECORD_SLACK)
+        self._view = memoryview(self._buf)
+        self._len = 0
+        self._oldest = None # time.monotonic() of the first record still waiting in the buffer
+        # Stats
+        self.flush_count = 0
+        self.bytes_written = 0
+        self.stalls = 0
+        self.stall_time = 0.0
+        self.write_times = None # optional metrics.Histogram of seconds per FIFO write
+
+    def write(self, data):
+        """Queues raw bytes (e.g. the pcap global header)."""
+        n = len(data)
+        if self._len + n > len(self._buf):
+            self.flush()
+            if n > len(self._buf):
+                # Bigger than the whole buffer, nothing to coalesce with, send it as is
+                self._write_out(data)
+                return
+        self._buf[self._len:self._len + n] = data
+        self._mark(n)
+
+    def write_record(self, ts_sec, ts_usec, payload, orig_len=None):
+        """Queues one pcap packet header + payload (orig_len: the packet's real length, if it was cut short)."""
+        n = len(payload)
+        if self._len + PCAP_RECORD_HEADER.size + n > len(self._buf):
+            self.flush()
+        pos = self._len
+        PCAP_RECORD_HEADER.pack_into(self._buf, pos, ts_sec, ts_usec, n, orig_len or n)
+        pos += PCAP_RECORD_HEADER.size
+        self._buf[pos:pos + n] = payload
+        self._mark(PCAP_RECORD_HEADER.size + n)
+
+    def write_packet(self, ts_ns, payload, if_id=0, orig_len=None):
+        """
+        Queues one packet stamped with `ts_ns` (nanoseconds since the epoch, e.g. time.time_ns()),
+        as a pcapng Enhanced Packet Block on interface `if_id`, or as a legacy pcap record
+        (microseconds, no interface) when not in pcapng mode.
+        orig_len: the packet's real length when `payload` is only the start of it (truncated CAN FD).
+        """
+        if not self.pcapng:
+            ts_sec, ts_rem = divmod(ts_ns, 1_000_000_000)
+            self.write_record(ts_sec, ts_rem // 1000, payload, orig_len)
+            return
+        n = len(payload)
+        pad = _pad4(n)
+        total_len = PCAPNG_EPB_HEADER.size + n + pad + PCAPNG_EPB_TRAILER.size
+        if self._len + total_len > len(self._buf):
+            self.flush()
+        pos = self._len
+        PCAPNG_EPB_HEADER.pack_into(self._buf, pos, PCAPNG_EPB_TYPE, total_len, if_id,
+                                    ts_ns >> 32, ts_ns & 0xFFFFFFFF, n, orig_len or n)
+        pos += PCAPNG_EPB_HEADER.size
+        self._buf[pos:pos + n] = payload
+        pos += n
+        if pad:
+            self._buf[pos:pos + pad] = bytes(pad)
+            pos += pad
+        PCAPNG_EPB_TRAILER.pack_into(self._buf, pos, total_len)
+        self._mark(total_len)
+
+    def _mark(self, n):
+        if self._len == 0:
+            self._oldest = time.monotonic()
+        self._len += n
+        if self._len >= self.flush_bytes:
+            self.flush()
+
+    def pending(self):
+        """Bytes waiting in the buffer."""
+        return self._len
+
+    def poll(self, now=None):
+        """Flushes if the oldest buffered record is older than flush_age. Call this often."""
+        if self._len and ((now or time.monotonic()) - self._oldest) >= self.flush_age:
+            self.flush()
+
+    def flush(self):
+        if self._len:
+            self._write_out(self._view[:self._len])
+            self._len = 0
+            self._oldest = None
+
+    def _write_out(self, data):
+        start = time.perf_counter()
+        self.fifo.write(data)
+        self.fifo.flush()
+        elapsed = time.perf_counter() - start
+        self.flush_count += 1
+        self.bytes_written += len(data)
+        if elapsed >= FIFO_STALL_SECONDS:
+            self.stalls += 1
+            self.stall_time += elapsed
+        if self.write_times is not None:
+            self.write_times.observe(elapsed)
@@ -0,0 +1,90 @@
+# protocol_detect.py
+# --protocol auto: work out which serial format (frame_protocols.py) a port
+# is speaking from the first few KB it sends, instead of finding out from a
+# flood of CRC errors that the wrong one was picked.
+#
+# Every registered protocol gets the same sample run through its own framer
+# (make_framer, so exactly the sync / length / chain / checksum rules the
+# capture will use) and is scored on two things:
+#   - checksum pass rate: good frames / (good frames + checksum failures)
+#   - periodicity: how much of the sample the good frames cover. The right
+#     format syncs on every frame, back to back, and covers nearly all of it.
+#     A wrong one only "finds" the odd frame by chance (1 in 256 for the XOR
+#     formats), so its coverage stays near zero even when a few pass.
+# score = coverage * pass rate, the best one wins if it's convincing enough.
+# Some formats also decode cleanly as a longer one: four xor16 frames in a row
+# XOR to zero, so they pass as one xor64 frame too. When scores are that close
+# the one with more good frames wins, it explains the same bytes with more
+# independent checksums.
+#
+# The sample isn't thrown away: the capture feeds it to the winner's framer
+# before the first read, so the frames in it are written like any others.
+import time
+
+from can_framer import make_framer
+from capture_log import CaptureLog
+from frame_protocols import PROTOCOLS
+
+PROTOCOL_AUTO = "auto"
+
+DETECT_BYTES = 4096 # sample size: 240 classic frames, 64 of the biggest fixed ones
+DETECT_TIMEOUT = 5.0 # seconds to wait for the sample before deciding on what's there
+MIN_FRAMES = 4 # fewer good frames than this decides nothing
+MIN_SCORE = 0.5
+TIE_MARGIN = 0.05 # scores this close are decided on the number of good frames
+
+
+def score_protocol(protocol, sample):
+    """(score, good frames) of `sample` decoded as `protocol`, see above."""
+    log = CaptureLog("off")
+    framer = make_framer(protocol, log=log)
+    framer.feed(sample)
+    covered = 0
+    while (frame := framer.next_frame()) is not None:
+        if protocol.sync is None:
+            covered += framer.wire_len # text lines: their length on the wire, not the record's
+        else:
+            covered += framer.frame_len or len(frame)
+    if not log.frames:
+        return 0.0, 0
+    pass_rate = log.frames / (log.frames + log.crc_errors)
+    return min(1.0, covered / len(sample)) * pass_rate, log.frames
+
+
+def detect_protocol(sample, candidates=None):
+    """
+    The FrameProtocol that `sample` (raw serial bytes) is most likely in, or None if
+    nothing decodes convincingly. Also returns every candidate's score, by name.
+    candidates: the FrameProtocols to try (default: all registered ones, ties go to
+    the first one registered).
+    """
+    scores = {}
+    contenders = []
+    for protocol in candidates or PROTOCOLS.values():
+        score, frames = score_protocol(protocol, sample)
+        scores[protocol.name] = score
+        if frames >= MIN_FRAMES and score >= MIN_SCORE:
+            contenders.append((score, frames, protocol))
+    if not contenders:
+        return None, scores
+    top_score = max(score for score, _, _ in contenders)
+    best = None
+    best_frames = 0
+    for score, frames, protocol in contenders:
+        if score >= top_score - TIE_MARGIN and frames > best_frames:
+            best, best_frames = protocol, frames
+    return best, scores
+
+
+def read_sample(ser, size=DETECT_BYTES, timeout=DETECT_TIMEOUT):
+    """
+    Up to `size` bytes from `ser` (a serial port or ReplaySource), whatever has come
+    in after `timeout` seconds, or until a replayed dump runs out.
+    """
+    sample = bytearray()
+    deadline = time.monotonic() + timeout
+    while len(sample) < size and time.monotonic() < deadline:
+        sample += ser.read(min(size - len(sample), max(ser.in_waiting, 1)))
+        if getattr(ser, "at_eof", False):
+            break
+    return bytes(sample)
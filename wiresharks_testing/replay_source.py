@@ -0,0 +1,85 @@
+# replay_source.py
+# Plays a raw serial dump (the exact bytes the Teensy sent, e.g. saved with
+# `cat /dev/ttyACM0 > dump.bin`) back through the capture pipeline in place
+# of a serial.Serial.
+#
+# It has the bits of the serial.Serial interface capture_loop and
+# SerialReader use (port, timeout, in_waiting, read(), is_open, close()),
+# so framing, CRC checks and pcap output run exactly as they do live.
+# The file is memory-mapped and handed out in big chunks:
+#   paced=False - as fast as the decoder takes it (hours of traffic in seconds)
+#   paced=True  - at the line rate (baudrate / 10 bytes per second, 8N1), like the real port
+#
+# A raw dump doesn't say when each byte arrived, so time is *virtual*:
+# the replay starts "now" and every byte advances the clock by one byte time
+# at the line rate. time_ns()/monotonic_ns() return that clock, and
+# write_frames uses them instead of the time module for replayed ports.
+# With --device-timestamps the device's own spacing is used as is instead
+# (DeviceClock(fit=False)), anchored at the replay start.
+import mmap
+import time
+
+DEFAULT_REPLAY_CHUNK = 64 * 1024
+BITS_PER_BYTE = 10 # start + 8 data + stop
+
+
+class ReplaySource:
+    """Read-only, serial.Serial-like view of a raw dump file."""
+
+    def __init__(self, path, baudrate, paced=False, chunk_size=DEFAULT_REPLAY_CHUNK, timeout=0.1):
+        self.port = path
+        self.timeout = timeout
+        self.paced = paced
+        self.chunk_size = chunk_size
+        self.byte_ns = BITS_PER_BYTE * 1_000_000_000 / baudrate # line time per byte
+        self._file = open(path, 'rb')
+        self._size = self._file.seek(0, 2)
+        # mmap can't map an empty file, there's nothing to replay then anyway
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else b''
+        self._pos = 0
+        self._start_mono_ns = time.monotonic_ns()
+        self._start_epoch_ns = time.time_ns()
+        self.is_open = True
+
+    @property
+    def at_eof(self):
+        """True once every byte has been read."""
+        return self._pos >= self._size
+
+    def _due(self):
+        """Bytes the line would have delivered by now (paced) or all remaining bytes."""
+        if not self.paced:
+            return self._size - self._pos
+        elapsed_ns = time.monotonic_ns() - self._start_mono_ns
+        return min(self._size, int(elapsed_ns / self.byte_ns)) - self._pos
+
+    @property
+    def in_waiting(self):
+        return max(0, min(self._due(), self.chunk_size))
+
+    def read(self, size=1):
+        size = min(size, self.chunk_size)
+        due = self._due()
+        if due <= 0 and self.paced and not self.at_eof:
+            # Nothing on the "line" yet: block like a serial read would, up to the timeout
+            time.sleep(min(self.timeout or 0, self.byte_ns * size / 1e9))
+            due = self._due()
+        n = max(0, min(size, due))
+        chunk = self._data[self._pos:self._pos + n]
+        self._pos += n
+        return chunk
+
+    # --- Virtual clock (see above) ---
+
+    def monotonic_ns(self):
+        return self._start_mono_ns + int(self._pos * self.byte_ns)
+
+    def time_ns(self):
+        return self._start_epoch_ns + int(self._pos * self.byte_ns)
+
+    def close(self):
+        if self.is_open:
+            if self._size:
+                self._data.close()
+            self._file.close()
+            self.is_open = False
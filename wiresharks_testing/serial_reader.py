@@ -0,0 +1,102 @@
+# serial_reader.py
+# Reader thread for the pipelined capture mode.
+#
+# In the single-loop mode, while the loop is busy decoding or blocked
+# flushing to Wireshark nobody is reading the serial port, and the OS
+# buffer can overrun. Here one thread does nothing but drain serial.Serial
+# into chunks and put them on a bounded queue; the capture loop (decoder)
+# takes them off. pyserial reads release the GIL, so the two overlap.
+# With several ports, each gets its own reader and they all share one queue;
+# every chunk is tagged with the reader's `tag` so the decoder knows where it came from.
+import queue
+import threading
+import time
+
+DEFAULT_QUEUE_CHUNKS = 256
+
+# Put on the queue (as (tag, END_OF_STREAM)) when a reader stops (error or stop()), after its last chunk
+END_OF_STREAM = None
+
+
+class SerialReader(threading.Thread):
+    """
+    Drains `ser` into a bounded queue of (tag, chunk) items.
+    Pass `out_queue` to share one queue between several readers.
+    Instrumentation (read them any time, they're only written by this thread):
+      chunks / bytes_read   - totals handed to the queue
+      depth_high_water      - most chunks ever waiting in the queue
+      stalls / stall_time   - how often / how long put() blocked on a full queue
+    """
+
+    def __init__(self, ser, queue_size=DEFAULT_QUEUE_CHUNKS, out_queue=None, tag=None):
+        super().__init__(name=f"serial-reader-{ser.port}", daemon=True)
+        self.ser = ser
+        self.tag = tag
+        self.queue = out_queue if out_queue is not None else queue.Queue(maxsize=queue_size)
+        self.error = None # exception that stopped the reader, if any
+        self._stop_event = threading.Event()
+        self.chunks = 0
+        self.bytes_read = 0
+        self.depth_high_water = 0
+        self.stalls = 0
+        self.stall_time = 0.0
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                data = self.ser.read(self.ser.in_waiting or 1)
+                if data:
+                    self._put(data)
+                elif getattr(self.ser, 'at_eof', False):
+                    break # Replayed dump (replay_source.py) is used up
+        except Exception as e:
+            # Let the decoder side report it, it owns the log
+            self.error = e
+        finally:
+            self._put(END_OF_STREAM)
+
+    def _put(self, data):
+        item = (self.tag, data)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Decoder is behind: block, but keep checking for stop() so shutdown can't hang here
+            self.stalls += 1
+            start = time.monotonic()
+            while True:
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    if self._stop_event.is_set():
+                        break
+            self.stall_time += time.monotonic() - start
+        if data is not END_OF_STREAM:
+            self.chunks += 1
+            self.bytes_read += len(data)
+            depth = self.queue.qsize()
+            if depth > self.depth_high_water:
+                self.depth_high_water = depth
+
+    def get(self, timeout):
+        """See get_chunk()."""
+        return get_chunk(self.queue, timeout)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats_line(self):
+        return (f"Reader {self.ser.port}: {self.chunks} chunks, {self.bytes_read} bytes, "
+                f"max depth {self.depth_high_water}/{self.queue.maxsize}, "
+                f"stalled {self.stalls} times for {self.stall_time:.3f} s")
+
+
+def get_chunk(chunk_queue, timeout):
+    """
+    Next (tag, chunk) from a reader queue: chunk is b'' if nothing arrived
+    within `timeout` seconds, or END_OF_STREAM once that reader has stopped.
+    """
+    try:
+        return chunk_queue.get(timeout=timeout)
+    except queue.Empty:
+        return None, b''
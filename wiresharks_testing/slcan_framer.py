@@ -0,0 +1,153 @@
+# slcan_framer.py
+# SLCAN (Lawicel) text frames, from an off-the-shelf SLCAN adapter or the
+# firmware gemini_python_test*.py was written against, turned into fixed
+# binary records so they go through the same capture filter / SocketCAN
+# encoder / pcap writer as the binary formats.
+#
+# One frame per '\r'-terminated line:
+#   tIIILDD..          standard ID (3 hex digits), length digit, 2 hex digits per data byte
+#   TIIIIIIIILDD..     extended ID (8 hex digits)
+#   rIIIL / RIIIIIIIIL remote (RTR) frames, no data
+#   tIII#DD..          the "ID#DATA" form the gemini scripts parse, length from the data
+# A 4-digit timestamp after the data (SLCAN "Z1" mode) is ignored. Anything
+# else (command replies, '\a' errors, blank lines) is discarded.
+#
+# The gemini scripts read one byte per ser.read(1), grow the line with
+# `buffer += byte` and convert the data one int(pair, 16) at a time, which
+# tops out far below a loaded 1 Mbit bus. Here every complete line waiting in
+# the ring is taken in one go: one decode, one str.split('\r'), then per line
+# one int() for the ID and one bytes.fromhex() for all the data.
+#
+# Record handed out by next_frame() (frame_protocols.SLCAN layout):
+#   CAN_ID(4, little-endian, with CAN_EFF_FLAG / CAN_RTR_FLAG) | DLC(1) | DATA(8, zero padded)
+import struct
+
+from capture_log import CaptureLog, LOG_FRAME
+from frame_ring import FrameRing
+
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+
+SLCAN_RECORD_LEN = 13
+MAX_LINE_LEN = 64 # longest real line is T + 8 + 1 + 16 + 4 = 30, more than this is junk
+TIMESTAMP_LEN = 4
+
+# Frame type letter -> (ID digits, flag bits)
+_KINDS = {
+    't': (3, 0),
+    'T': (8, CAN_EFF_FLAG),
+    'r': (3, CAN_RTR_FLAG),
+    'R': (8, CAN_EFF_FLAG | CAN_RTR_FLAG),
+}
+
+# Bus bit rate -> adapter command
+SLCAN_BITRATES = {
+    "10k": "S0", "20k": "S1", "50k": "S2", "100k": "S3", "125k": "S4",
+    "250k": "S5", "500k": "S6", "800k": "S7", "1M": "S8",
+}
+SLCAN_CLOSE_COMMAND = b"C\r"
+
+_RECORD_ID_DLC = struct.Struct('<IB')
+
+
+def slcan_open_commands(bitrate):
+    """
+    What to send an SLCAN adapter so it starts reporting frames at `bitrate`
+    (a SLCAN_BITRATES key): close the channel in case it's still open, set the bit rate, open.
+    """
+    return SLCAN_CLOSE_COMMAND + f"{SLCAN_BITRATES[bitrate]}\rO\r".encode()
+
+
+class SlcanFramer:
+    """
+    Pulls SLCAN lines out of a FrameRing and hands each valid one back as a
+    13-byte record (memoryview into one reused buffer, use it before the next call).
+    Same feed()/next_frame() interface and stats as CanFramer.
+    """
+
+    def __init__(self, ring_size=None, log=None):
+        self.ring = FrameRing(ring_size) if ring_size else FrameRing()
+        self.log = log or CaptureLog()
+        self.clock = None # SLCAN timestamps (if any) are milliseconds mod 60 s, not worth syncing to
+        self.frame_len = SLCAN_RECORD_LEN
+        self._record = bytearray(SLCAN_RECORD_LEN)
+        self._view = memoryview(self._record)
+        self.wire_len = 0 # bytes the last frame took on the line, '\r' included
+        # Complete lines already taken out of the ring, and the next one to hand out
+        self._lines = []
+        self._next_line = 0
+        self.bytes_in = 0
+        self.ring_high_water = 0
+        self.read_sizes = None
+
+    def feed(self, data):
+        self.ring.feed(data)
+        n = len(data)
+        self.bytes_in += n
+        if len(self.ring) > self.ring_high_water:
+            self.ring_high_water = len(self.ring)
+        if self.read_sizes is not None:
+            self.read_sizes.observe(n)
+
+    def next_frame(self):
+        lines = self._lines
+        while True:
+            if self._next_line == len(lines):
+                # Take every complete line at once, the partial one after the last '\r' stays in the ring
+                ring = self.ring
+                end = ring.rfind(b'\r')
+                if end == -1:
+                    if len(ring) > MAX_LINE_LEN:
+                        # No line end anywhere near: not SLCAN, or we joined mid-line long ago
+                        self.log.discard(len(ring))
+                        ring.keep_tail(0)
+                    return None
+                # latin-1 maps every byte to one character, so junk can't fail the decode
+                lines = self._lines = str(ring.peek(end), 'latin-1').split('\r')
+                self._next_line = 0
+                ring.skip(end + 1)
+
+            line = lines[self._next_line]
+            self._next_line += 1
+            text = line.strip() # the '\n' of "\r\n" line ends, stray spaces
+            if self._parse(text):
+                self.wire_len = len(line) + 1
+                self.log.frame_ok()
+                return self._view
+            if text:
+                self.log.discard(len(line) + 1)
+                if self.log.level >= LOG_FRAME:
+                    self.log.trace("Not an SLCAN frame: %r", text)
+
+    def _parse(self, line):
+        """Fills the record from one line, False if it isn't a frame."""
+        kind = _KINDS.get(line[:1])
+        if kind is None:
+            return False
+        id_len, flags = kind
+        try:
+            hash_pos = line.find('#', 1)
+            if hash_pos != -1:
+                # gemini_python_test form: ID#DATA, any number of ID digits
+                can_id = int(line[1:hash_pos], 16)
+                data = bytes.fromhex(line[hash_pos + 1:])
+                dlc = len(data)
+            else:
+                can_id = int(line[1:1 + id_len], 16)
+                dlc = int(line[1 + id_len], 16)
+                data_end = 2 + id_len + (0 if flags & CAN_RTR_FLAG else 2 * dlc)
+                if len(line) != data_end and len(line) != data_end + TIMESTAMP_LEN:
+                    return False
+                data = bytes.fromhex(line[2 + id_len:data_end])
+        except (ValueError, IndexError):
+            return False
+        if dlc > 8 or can_id > (0x1FFFFFFF if flags & CAN_EFF_FLAG else 0x7FF):
+            return False
+        if flags & CAN_RTR_FLAG:
+            data = b''
+        record = self._record
+        _RECORD_ID_DLC.pack_into(record, 0, can_id | flags, dlc)
+        n = len(data)
+        record[5:5 + n] = data
+        record[5 + n:] = bytes(8 - n)
+        return True
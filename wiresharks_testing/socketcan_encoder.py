@@ -0,0 +1,235 @@
+# socketcan_encoder.py
+# Turns a validated custom frame into the 16-byte Linux 'struct can_frame'
+# Wireshark wants, without building new objects for every frame.
+#
+# struct.pack('<IB3x8s', ...) per frame parses the format string, slices
+# the ID and data out of the frame (two new objects), unpacks the ID into
+# an int and returns a brand-new bytes object, and multi-port capture then
+# concatenates the SLL2 header onto it (another one). Over a multi-hour
+# capture that is a lot of garbage for the GC to chase.
+#
+# Here one bytearray per port is allocated up front (link header, if any,
+# already in place) and each frame's ID / DLC / data is copied straight from
+# the framer's memoryview into it with slice assignment. The writer then
+# copies that into its own output buffer (PcapBatchWriter.write_packet packs
+# the record header in place with pack_into), so the hot path allocates
+# next to nothing.
+#
+# struct can_frame:
+#   0-3   can_id
+#   4     can_dlc
+#   5-7   padding (Wireshark expects this for DLT_SOCKETCAN)
+#   8-15  data[8]
+#
+# CanFdEncoder does the same for the CAN FD frames, into struct canfd_frame:
+#   0-3   can_id
+#   4     len (data bytes, not the DLC code)
+#   5     flags (CANFD_BRS / CANFD_ESI / CANFD_FDF)
+#   6-7   reserved
+#   8-71  data[64]
+# Only the header + `len` data bytes go into the record, with the pcap/pcapng
+# original length still saying 72: Wireshark takes a 72-byte SocketCAN packet
+# as CAN FD and just sees a snapped capture, and a 12-byte frame costs 32 bytes
+# of FIFO instead of 88.
+#
+# LayoutEncoder does the plain can_frame for any other format in
+# frame_protocols.py, from the protocol's field layout, and make_encoder()
+# picks the right encoder for a protocol.
+import struct
+
+from crc16_common import CANFD_FDF, CANFD_MAX_DLEN, FD_HEADER_LEN, canfd_data_len
+from frame_protocols import AA69, AA69_TS
+
+SOCKETCAN_FRAME_LEN = 16
+CANFD_FRAME_LEN = 72
+CANFD_HEADER_LEN = 8 # can_id, len, flags, 2 reserved
+
+_CAN_ID_LE = struct.Struct('<I')
+_CAN_ID_BE = struct.Struct('>I')
+_DEVICE_TS = struct.Struct('<I')
+
+CAN_EFF_FLAG = 0x80000000
+
+
+class SocketCanEncoder:
+    """
+    Reusable SocketCAN payload for one port.
+    link_header: bytes put in front of every frame (the port's SLL2 header in multi-port legacy pcap).
+    field: where the CAN fields start past the usual offset (DEVICE_TS_LEN for timestamped frames).
+    encode() returns the same bytearray every time, so use it before the next call.
+    """
+
+    def __init__(self, link_header=None, field=0):
+        header_len = len(link_header) if link_header else 0
+        self.payload = bytearray(header_len + SOCKETCAN_FRAME_LEN)
+        if link_header:
+            self.payload[:header_len] = link_header
+        # DLT_SOCKETCAN reads the CAN ID big-endian, but Wireshark reads a CAN frame behind an SLL2 header
+        # in host order (little-endian). The Teensy sends it little-endian, so it goes in as is behind
+        # SLL2 and gets byte-swapped for bare DLT_SOCKETCAN (same rule as LayoutEncoder).
+        self._swap_id = not link_header
+        # Custom Packet Format: 0xAA | 0x69 | CAN_ID(4) | DLC(1) | CAN_DATA(8) | CRC(2)
+        # Indices:              0      1      2-5         6        7-14          15-16
+        # ID and DLC sit next to each other in both layouts, so they go over in one slice.
+        # The slices are built once here, encode() only does the copies.
+        self._id_pos = header_len
+        self._src_id_pos = 2 + field
+        self._id_dlc = slice(header_len, header_len + 5)
+        self._src_id_dlc = slice(2 + field, 7 + field)
+        self._data = slice(header_len + 8, header_len + 16)
+        self._src_data = slice(7 + field, 15 + field)
+
+    def encode(self, frame):
+        payload = self.payload
+        payload[self._id_dlc] = frame[self._src_id_dlc]
+        payload[self._data] = frame[self._src_data]
+        if self._swap_id:
+            _CAN_ID_BE.pack_into(payload, self._id_pos, _CAN_ID_LE.unpack_from(frame, self._src_id_pos)[0])
+        return payload
+
+    def can_id(self, frame):
+        """The frame's CAN ID as an int (for ID filtering)."""
+        return _CAN_ID_LE.unpack_from(frame, self._src_id_pos)[0]
+
+    @staticmethod
+    def device_ts(frame):
+        """The raw micros() counter of a timestamped frame."""
+        return _DEVICE_TS.unpack_from(frame, 2)[0]
+
+    orig_len = None # whole frames, the record's original length is its captured length
+
+
+class CanFdEncoder:
+    """
+    Reusable SocketCAN payload for one port of a --canfd capture (CanFdFramer frames).
+    FD frames come out as canfd_frame cut down to their data, classic ones (no FDF flag)
+    as the usual 16-byte can_frame. `orig_len` is set on every encode() to the length
+    the record should claim (72 + link header for FD frames, None for classic ones).
+    link_header / fd_link_header: what goes in front of classic / FD frames (the port's
+    SLL2 header with the CAN or CAN FD protocol, in multi-port legacy pcap).
+    encode() returns a view of the same buffer every time, so use it before the next call.
+    """
+
+    def __init__(self, link_header=None, field=0, fd_link_header=None):
+        header_len = len(link_header) if link_header else 0
+        self.payload = bytearray(header_len + CANFD_FRAME_LEN)
+        if link_header:
+            self.payload[:header_len] = link_header
+        self._link_header = link_header
+        # One header for both unless there are two different ones (same length, the payload is sized for link_header)
+        if link_header and fd_link_header and fd_link_header != link_header:
+            self._fd_link_header = fd_link_header
+        else:
+            self._fd_link_header = link_header
+        self._header_in_place = link_header # which of the two is in the payload right now
+        self._swap_id = not link_header # see SocketCanEncoder
+        # 0xAA | 0x69 | [TS] | CAN_ID(4) | FLAGS(1) | DLC(1) | DATA(n) | CRC(2)
+        self._id_pos = header_len
+        self._src_id_pos = 2 + field
+        self._src_flags_pos = 6 + field
+        self._src_data_pos = FD_HEADER_LEN + field
+        self._data_pos = header_len + CANFD_HEADER_LEN
+        self._fd_orig_len = header_len + CANFD_FRAME_LEN
+        # One view per record length, made once, so encode() doesn't create any
+        view = memoryview(self.payload)
+        self._views = [view[:self._data_pos + n] for n in range(CANFD_MAX_DLEN + 1)]
+        self._classic_view = view[:header_len + SOCKETCAN_FRAME_LEN]
+        self._zeros = bytes(8)
+        self.orig_len = None
+
+    def encode(self, frame):
+        payload = self.payload
+        flags = frame[self._src_flags_pos]
+        n = canfd_data_len(flags, frame[self._src_flags_pos + 1])
+        id_pos = self._id_pos
+        data_pos = self._data_pos
+        src = self._src_data_pos
+        payload[data_pos:data_pos + n] = frame[src:src + n]
+        if self._swap_id:
+            _CAN_ID_BE.pack_into(payload, id_pos, _CAN_ID_LE.unpack_from(frame, self._src_id_pos)[0])
+        else:
+            payload[id_pos:id_pos + 4] = frame[self._src_id_pos:self._src_id_pos + 4]
+        payload[id_pos + 4] = n
+        if flags & CANFD_FDF:
+            payload[id_pos + 5] = flags & 0x07
+            if self._header_in_place is not self._fd_link_header:
+                payload[:id_pos] = self._header_in_place = self._fd_link_header
+            self.orig_len = self._fd_orig_len
+            return self._views[n]
+        # Classic frame: can_dlc, padding, data[8] zero-filled past the DLC
+        payload[id_pos + 5] = 0
+        payload[data_pos + n:data_pos + 8] = self._zeros[n:]
+        if self._header_in_place is not self._link_header:
+            payload[:id_pos] = self._header_in_place = self._link_header
+        self.orig_len = None
+        return self._classic_view
+
+    def can_id(self, frame):
+        """The frame's CAN ID as an int (for ID filtering)."""
+        return _CAN_ID_LE.unpack_from(frame, self._src_id_pos)[0]
+
+    device_ts = staticmethod(SocketCanEncoder.device_ts)
+
+
+
+class LayoutEncoder:
+    """
+    Reusable SocketCAN can_frame for one port, for any fixed-layout FrameProtocol:
+    ID (either byte order, plus the format's extended-ID bit as CAN_EFF_FLAG), DLC, and
+    up to 8 data bytes (zero-filled past the DLC) from wherever the protocol keeps them.
+    encode() returns the same bytearray every time, so use it before the next call.
+    """
+
+    def __init__(self, protocol, link_header=None):
+        header_len = len(link_header) if link_header else 0
+        self.payload = bytearray(header_len + SOCKETCAN_FRAME_LEN)
+        if link_header:
+            self.payload[:header_len] = link_header
+        # _unpack_id gives the real ID, so it goes in the byte order the reader expects
+        # (see SocketCanEncoder): big-endian for DLT_SOCKETCAN, little-endian behind SLL2.
+        self._pack_id = (_CAN_ID_LE if link_header else _CAN_ID_BE).pack_into
+        self._unpack_id = (_CAN_ID_BE if protocol.id_big_endian else _CAN_ID_LE).unpack_from
+        self._id_pos = header_len
+        self._src_id_pos = protocol.id_pos
+        self._src_dlc_pos = protocol.dlc_pos
+        self._src_data_pos = protocol.data_pos
+        self._data_pos = header_len + 8
+        self._ext_flag = protocol.ext_flag
+        self._ts_pos = protocol.ts_pos
+        self._zeros = bytes(8)
+
+    def encode(self, frame):
+        payload = self.payload
+        can_id = self._unpack_id(frame, self._src_id_pos)[0]
+        if self._ext_flag is not None and frame[self._ext_flag[0]] & self._ext_flag[1]:
+            can_id |= CAN_EFF_FLAG
+        self._pack_id(payload, self._id_pos, can_id)
+        dlc = frame[self._src_dlc_pos]
+        payload[self._id_pos + 4] = dlc
+        n = min(dlc, 8)
+        data_pos = self._data_pos
+        payload[data_pos:data_pos + n] = frame[self._src_data_pos:self._src_data_pos + n]
+        payload[data_pos + n:data_pos + 8] = self._zeros[n:]
+        return payload
+
+    def can_id(self, frame):
+        """The frame's CAN ID as an int (for ID filtering)."""
+        return self._unpack_id(frame, self._src_id_pos)[0]
+
+    def device_ts(self, frame):
+        """The raw micros() counter of a timestamped frame."""
+        return _DEVICE_TS.unpack_from(frame, self._ts_pos)[0]
+
+    orig_len = None
+
+
+def make_encoder(protocol, link_header=None, fd_link_header=None):
+    """
+    The SocketCAN encoder for `protocol` (a FrameProtocol). link_header / fd_link_header:
+    what goes in front of classic / CAN FD frames (see CanFdEncoder).
+    """
+    if protocol is AA69 or protocol is AA69_TS:
+        return SocketCanEncoder(link_header, protocol.id_pos - AA69.id_pos)
+    if protocol.fd:
+        return CanFdEncoder(link_header, protocol.id_pos - AA69.id_pos, fd_link_header)
+    return LayoutEncoder(protocol, link_header)
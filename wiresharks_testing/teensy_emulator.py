@@ -0,0 +1,142 @@
+# teensy_emulator.py
+# Pretends to be the Teensy on a Linux pseudo-terminal, so the extcap can be
+# run end to end (latency, correctness) without hardware.
+#
+# It opens a pty, and the slave side (/dev/pts/N) is what you give the extcap
+# as --serial-port. Frames go out at a target rate, and every frame carries
+# the time.monotonic_ns() it was written at in its 8 data bytes (little-endian),
+# so whoever reads the other end on this machine can work out the latency.
+#
+# Wire formats (--format):
+#   17 - 0xAA 0x69 ID(4) DLC DATA(8) CRC16(2)              (wiresharkscan_4_tables.py)
+#   21 - same + TIMESTAMP_US(4) after 0x69                 (--device-timestamps)
+#   16 - 0x69 FLAGS ID(4, BE) LEN DATA(8) XOR              (old_tests/test_extcap.py)
+#   25 - 0x69 TIMESTAMP_US(4) ID(4) DLC pad(3) DATA(8) CRC32(4)   (old_tests/sync6925byte.py)
+#   64 - 0x69 ID(4) DLC DATA(8) zero padding XOR           (python_extcap, XOR includes the SOF)
+#   fd - 0xAA 0x69 ID(4) FLAGS DLC DATA(n) CRC16(2)        (--canfd, sent as FD frames with BRS)
+#   slcan - "t<ID><LEN><DATA>\r" text lines (T + 8-digit ID above 0x7FF)  (--protocol slcan)
+#
+# Usage: python teensy_emulator.py --format 17 --rate 2000
+#        (then: wiresharkscan_4_tables.py --capture --serial-port /dev/pts/N --fifo ...)
+import argparse
+import os
+import struct
+import threading
+import time
+import tty
+import zlib
+
+from crc16_common import CANFD_BRS, CANFD_FDF
+from teensy_traffic import build_frame, build_fd_frame
+
+DEFAULT_RATE = 1000 # frames/s
+TICK = 0.001 # how often the sender wakes up to write whatever frames are due
+
+FRAME_FORMATS = ("17", "21", "16", "25", "64", "fd", "slcan")
+
+_SEND_NS = struct.Struct('<Q')
+
+
+def _xor(data):
+    checksum = 0
+    for b in data:
+        checksum ^= b
+    return checksum
+
+
+def encode_frame(frame_format, can_id, send_ns):
+    """One frame in `frame_format`, DLC 8, data = send_ns."""
+    data = _SEND_NS.pack(send_ns)
+    device_us = (send_ns // 1000) & 0xFFFFFFFF
+    if frame_format == "17":
+        return build_frame(can_id, 8, data)
+    if frame_format == "21":
+        return build_frame(can_id, 8, data, device_us)
+    if frame_format == "16":
+        frame = bytes((0x69, 0)) + struct.pack('>IB', can_id, 8) + data
+        return frame + bytes((_xor(frame[1:]),))
+    if frame_format == "25":
+        frame = bytes((0x69,)) + struct.pack('<IIB3x', device_us, can_id, 8) + data
+        # Same check as sync6925byte.py: zlib's CRC-32 of bytes 1..20, inverted once more
+        return frame + struct.pack('<I', zlib.crc32(frame[1:21]) ^ 0xFFFFFFFF)
+    if frame_format == "64":
+        frame = (bytes((0x69,)) + struct.pack('<IB', can_id, 8) + data).ljust(63, b'\0')
+        return frame + bytes((_xor(frame),))
+    if frame_format == "fd":
+        return build_fd_frame(can_id, CANFD_FDF | CANFD_BRS, 8, data)
+    if frame_format == "slcan":
+        if can_id > 0x7FF:
+            return f"T{can_id:08X}8{data.hex().upper()}\r".encode()
+        return f"t{can_id:03X}8{data.hex().upper()}\r".encode()
+    raise ValueError(f"unknown frame format {frame_format!r}")
+
+
+class TeensyEmulator:
+    """
+    Owns the pty pair and a sender thread.
+    `port` is the slave device path to hand to the extcap.
+    """
+
+    def __init__(self, frame_format="17", rate=DEFAULT_RATE, ids=(0x100, 0x123, 0x2A0, 0x7DF)):
+        self.frame_format = frame_format
+        self.rate = rate
+        self.ids = ids
+        self.master, self._slave = os.openpty()
+        # Raw on both ends: no echo, no newline translation, no ^C handling in the byte stream
+        tty.setraw(self.master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.frames_sent = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="teensy-emulator", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def close(self):
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _run(self):
+        start = time.monotonic()
+        n_ids = len(self.ids)
+        while not self._stop_event.is_set():
+            due = int((time.monotonic() - start) * self.rate) - self.frames_sent
+            if due > 0:
+                # Stamp the batch right before it's written, all of it goes out in one write
+                send_ns = time.monotonic_ns()
+                batch = b''.join(
+                    encode_frame(self.frame_format, self.ids[(self.frames_sent + i) % n_ids], send_ns)
+                    for i in range(due)
+                )
+                os.write(self.master, batch)
+                self.frames_sent += due
+            time.sleep(TICK)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate the Teensy CAN bridge on a pseudo-terminal")
+    parser.add_argument("--format", choices=FRAME_FORMATS, default="17", help="Wire format (default: 17)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help=f"Frames per second (default: {DEFAULT_RATE})")
+    args = parser.parse_args()
+
+    emulator = TeensyEmulator(args.format, args.rate)
+    print(f"Emulating {args.format}-byte frames at {args.rate:g}/s on {emulator.port} (Ctrl-C to stop)", flush=True)
+    emulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        emulator.close()
+        print(f"Sent {emulator.frames_sent} frames.")
+
+
+if __name__ == "__main__":
+    main()
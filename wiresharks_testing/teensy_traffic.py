@@ -0,0 +1,149 @@
+# teensy_traffic.py
+# Makes synthetic Teensy serial streams (the custom 17-byte frames, the
+# 21-byte timestamped ones, or the length-prefixed CAN FD ones) for
+# benchmarking and for --replay-file.
+#
+# Knobs, all per frame:
+#   ID mix           - a pool of CAN IDs with weights (a few chatty IDs, many quiet ones)
+#   DLC spread       - weights for DLC 0..8 (unused data bytes are sent as 0, like the firmware),
+#                      0..15 for CAN FD
+#   bit errors       - probability a frame gets one random bit flipped
+#   dropped bytes    - probability a frame loses one random byte
+#   false 0xAA bytes - probability each payload byte is 0xAA (or the AA 69 pair),
+#                      which the framer has to skip past when it resyncs
+#
+# Usage: python teensy_traffic.py dump.bin --frames 100000 --bit-errors 0.01
+import argparse
+import random
+import struct
+
+from crc16_common import (
+    SOF_FLOAT, SOF_WRAPPED, CANFD_BRS, CANFD_ESI, CANFD_FDF, canfd_data_len, crc16_ccitt_lookup,
+)
+
+DEFAULT_ID_COUNT = 32
+# Mostly full frames, like most real bus traffic
+DEFAULT_DLC_WEIGHTS = (1, 1, 2, 1, 4, 1, 2, 1, 30)
+# CAN FD: a spread over all 16 DLCs (8 = 8 bytes ... 15 = 64 bytes), weighted to the big ones
+FD_DLC_WEIGHTS = (1, 1, 1, 1, 2, 1, 1, 1, 4, 2, 4, 2, 4, 4, 4, 8)
+FD_CLASSIC_RATE = 0.1 # share of classic frames mixed into an FD stream
+FD_BRS_RATE = 0.8
+FD_ESI_RATE = 0.01
+
+FRAME_CAN_ID = struct.Struct('<I')
+
+
+def build_frame(can_id, dlc, data, device_ts_us=None):
+    """One custom frame: 0xAA | 0x69 | [TIMESTAMP_US(4)] | CAN_ID(4) | DLC(1) | CAN_DATA(8) | CRC(2)."""
+    body = bytearray((SOF_WRAPPED,))
+    if device_ts_us is not None:
+        body += struct.pack('<I', device_ts_us & 0xFFFFFFFF)
+    body += FRAME_CAN_ID.pack(can_id)
+    body.append(dlc)
+    body += bytes(data[:dlc]).ljust(8, b'\0')
+    crc = crc16_ccitt_lookup(body)
+    return bytes((SOF_FLOAT,)) + bytes(body) + bytes((crc >> 8, crc & 0xFF))
+
+
+def build_fd_frame(can_id, flags, dlc, data, device_ts_us=None):
+    """One CAN FD format frame: 0xAA | 0x69 | [TIMESTAMP_US(4)] | CAN_ID(4) | FLAGS | DLC | DATA | CRC(2)."""
+    n = canfd_data_len(flags, dlc)
+    body = bytearray((SOF_WRAPPED,))
+    if device_ts_us is not None:
+        body += struct.pack('<I', device_ts_us & 0xFFFFFFFF)
+    body += FRAME_CAN_ID.pack(can_id)
+    body.append(flags)
+    body.append(dlc)
+    body += bytes(data[:n]).ljust(n, b'\0')
+    crc = crc16_ccitt_lookup(body)
+    return bytes((SOF_FLOAT,)) + bytes(body) + bytes((crc >> 8, crc & 0xFF))
+
+
+def default_id_pool(count=DEFAULT_ID_COUNT, rng=None):
+    """`count` random 11-bit IDs, weighted 1/rank so a few of them carry most of the traffic."""
+    rng = rng or random.Random(0)
+    ids = rng.sample(range(0x800), count)
+    return [(can_id, 1.0 / rank) for rank, can_id in enumerate(ids, 1)]
+
+
+def generate_stream(n_frames, id_pool=None, dlc_weights=None, bit_error_rate=0.0,
+                    drop_rate=0.0, false_sof_rate=0.0, timestamped=False, frame_interval_us=100, seed=1, fd=False):
+    """
+    Returns (stream bytes, list of the (can_id, dlc, data) frames that went out intact).
+    Corrupted frames (bit flip / dropped byte) are in the stream but not in the list,
+    so a decoder run over the stream should find exactly the frames in the list.
+    fd=True makes CAN FD format frames (mostly FD, some classic) and the list holds
+    (can_id, flags, dlc, data) with only the frame's own data bytes.
+    """
+    rng = random.Random(seed)
+    dlc_weights = dlc_weights or (FD_DLC_WEIGHTS if fd else DEFAULT_DLC_WEIGHTS)
+    id_pool = id_pool or default_id_pool(rng=rng)
+    ids = [can_id for can_id, _ in id_pool]
+    id_weights = [weight for _, weight in id_pool]
+    dlcs = range(len(dlc_weights))
+
+    stream = bytearray()
+    intact = []
+    device_ts_us = rng.randrange(1 << 32) if timestamped else None
+    for _ in range(n_frames):
+        can_id = rng.choices(ids, id_weights)[0]
+        dlc = rng.choices(dlcs, dlc_weights)[0]
+        flags = 0
+        n = dlc
+        if fd:
+            if rng.random() < FD_CLASSIC_RATE:
+                dlc = min(dlc, 8)
+            else:
+                flags = CANFD_FDF | (CANFD_BRS if rng.random() < FD_BRS_RATE else 0) | (CANFD_ESI if rng.random() < FD_ESI_RATE else 0)
+            n = canfd_data_len(flags, dlc)
+        data = bytearray(rng.randrange(256) for _ in range(n))
+        for i in range(n):
+            if rng.random() < false_sof_rate:
+                data[i] = SOF_FLOAT
+                if i + 1 < n and rng.random() < 0.5:
+                    data[i + 1] = SOF_WRAPPED
+        if fd:
+            frame = bytearray(build_fd_frame(can_id, flags, dlc, data, device_ts_us))
+        else:
+            frame = bytearray(build_frame(can_id, dlc, data, device_ts_us))
+        if timestamped:
+            device_ts_us = (device_ts_us + frame_interval_us) & 0xFFFFFFFF
+
+        corrupted = False
+        if rng.random() < bit_error_rate:
+            # Anywhere but the SOF byte, so the frame is still found and has to fail its CRC
+            frame[rng.randrange(1, len(frame))] ^= 1 << rng.randrange(8)
+            corrupted = True
+        if rng.random() < drop_rate:
+            del frame[rng.randrange(len(frame))]
+            corrupted = True
+        stream += frame
+        if not corrupted:
+            intact.append((can_id, flags, dlc, bytes(data)) if fd else (can_id, dlc, bytes(data).ljust(8, b'\0')))
+    return bytes(stream), intact
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Teensy serial dump (for --replay-file or benchmarking)")
+    parser.add_argument("output", help="File to write the raw stream to")
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--id-count", type=int, default=DEFAULT_ID_COUNT, help="How many distinct CAN IDs")
+    parser.add_argument("--bit-errors", type=float, default=0.0, help="Probability of a flipped bit per frame")
+    parser.add_argument("--dropped-bytes", type=float, default=0.0, help="Probability of a dropped byte per frame")
+    parser.add_argument("--false-sof", type=float, default=0.0, help="Probability of 0xAA per payload byte")
+    parser.add_argument("--timestamped", action="store_true", help="21-byte frames with a device timestamp")
+    parser.add_argument("--canfd", action="store_true", help="Length-prefixed CAN FD frames (for --canfd)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stream, intact = generate_stream(args.frames, default_id_pool(args.id_count, rng), bit_error_rate=args.bit_errors,
+                                     drop_rate=args.dropped_bytes, false_sof_rate=args.false_sof,
+                                     timestamped=args.timestamped, seed=args.seed, fd=args.canfd)
+    with open(args.output, 'wb') as f:
+        f.write(stream)
+    print(f"Wrote {len(stream)} bytes, {args.frames} frames ({len(intact)} intact) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# test_socketcan_encoder.py
+# What the encoders put on the wire, byte for byte: DLT_SOCKETCAN (227) reads
+# can_id big-endian, a can_frame behind an SLL2 header is read in host order.
+# Run with: python -m pytest test_socketcan_encoder.py
+import struct
+
+from crc16_common import CANFD_BRS, CANFD_FDF
+from frame_protocols import AA69, AA69_FD, AA69_TS, SLCAN, XOR16
+from slcan_framer import CAN_EFF_FLAG, CAN_RTR_FLAG, SlcanFramer
+from socketcan_encoder import CanFdEncoder, make_encoder
+from teensy_traffic import build_fd_frame, build_frame
+
+LINK_HEADER = bytes(range(20)) # stands in for a port's SLL2 header, only its length matters
+
+
+def xor16_frame(can_id, dlc, data, extended=False):
+    """0x69 FLAGS ID(BE) LEN DATA(8) XOR, checksum left 0 (the encoder doesn't look at it)."""
+    return bytes((0x69, 0x01 if extended else 0x00)) + struct.pack('>IB', can_id, dlc) + data.ljust(8, b'\0') + b'\0'
+
+
+def test_xor16_id_big_endian_without_link_header():
+    payload = make_encoder(XOR16).encode(xor16_frame(0x123, 2, b'\xde\xad'))
+    assert bytes(payload) == bytes.fromhex('00000123' '02000000' 'dead000000000000')
+
+
+def test_xor16_id_host_order_behind_sll2():
+    payload = make_encoder(XOR16, LINK_HEADER).encode(xor16_frame(0x123, 2, b'\xde\xad'))
+    assert bytes(payload[:20]) == LINK_HEADER
+    assert bytes(payload[20:]) == bytes.fromhex('23010000' '02000000' 'dead000000000000')
+
+
+def test_xor16_extended_id_sets_eff_flag_in_the_top_byte():
+    frame = xor16_frame(0x1ABCDEF, 8, bytes(range(8)), extended=True)
+    assert bytes(make_encoder(XOR16).encode(frame)[:4]) == bytes.fromhex('81abcdef')
+    assert bytes(make_encoder(XOR16, LINK_HEADER).encode(frame)[20:24]) == bytes.fromhex('efcdab81')
+
+
+def test_aa69_id_big_endian_without_link_header():
+    payload = make_encoder(AA69).encode(build_frame(0x123, 2, b'\xde\xad'))
+    assert bytes(payload) == bytes.fromhex('00000123' '02000000' 'dead000000000000')
+
+
+def test_aa69_id_host_order_behind_sll2():
+    payload = make_encoder(AA69, LINK_HEADER).encode(build_frame(0x123, 2, b'\xde\xad'))
+    assert bytes(payload[:20]) == LINK_HEADER
+    assert bytes(payload[20:]) == bytes.fromhex('23010000' '02000000' 'dead000000000000')
+
+
+def test_aa69_timestamped_id_matches_untimestamped():
+    frame = build_frame(0x1ABCDEF, 8, bytes(range(8)), device_ts_us=0x11223344)
+    assert bytes(make_encoder(AA69_TS).encode(frame)) == bytes.fromhex('01abcdef' '08000000' '0001020304050607')
+    assert bytes(make_encoder(AA69_TS, LINK_HEADER).encode(frame)[20:24]) == bytes.fromhex('efcdab01')
+
+
+def test_canfd_id_big_endian_without_link_header():
+    encoder = make_encoder(AA69_FD)
+    fd = bytes(encoder.encode(build_fd_frame(0x123, CANFD_FDF | CANFD_BRS, 9, bytes(range(12)))))
+    assert fd == bytes.fromhex('00000123' '0c050000') + bytes(range(12)) # BRS | FDF
+    classic = bytes(encoder.encode(build_fd_frame(0x123, 0, 2, b'\xde\xad')))
+    assert classic == bytes.fromhex('00000123' '02000000' 'dead000000000000')
+
+
+def test_canfd_id_host_order_behind_sll2():
+    encoder = make_encoder(AA69_FD, LINK_HEADER, FD_LINK_HEADER)
+    fd = bytes(encoder.encode(build_fd_frame(0x123, CANFD_FDF | CANFD_BRS, 9, bytes(range(12)))))
+    assert fd == FD_LINK_HEADER + bytes.fromhex('23010000' '0c050000') + bytes(range(12)) # BRS | FDF
+    classic = bytes(encoder.encode(build_fd_frame(0x123, 0, 2, b'\xde\xad')))
+    assert classic == LINK_HEADER + bytes.fromhex('23010000' '02000000' 'dead000000000000')
+
+
+FD_LINK_HEADER = bytes(range(100, 120))
+
+
+def test_canfd_link_header_without_a_separate_fd_header():
+    encoder = CanFdEncoder(link_header=LINK_HEADER)
+    fd = bytes(encoder.encode(build_fd_frame(0x123, CANFD_FDF | CANFD_BRS, 9, bytes(12))))
+    classic = bytes(encoder.encode(build_fd_frame(0x123, 0, 2, b'\xde\xad')))
+    assert fd[:20] == LINK_HEADER and classic[:20] == LINK_HEADER
+
+
+def test_canfd_link_headers_follow_the_frame_kind():
+    encoder = make_encoder(AA69_FD, LINK_HEADER, FD_LINK_HEADER)
+    assert bytes(encoder.encode(build_fd_frame(0x123, 0, 2, b'\xde\xad'))[:20]) == LINK_HEADER
+    assert bytes(encoder.encode(build_fd_frame(0x123, CANFD_FDF, 9, bytes(12)))[:20]) == FD_LINK_HEADER
+    assert bytes(encoder.encode(build_fd_frame(0x123, 0, 2, b'\xde\xad'))[:20]) == LINK_HEADER
+
+
+SLCAN_LINES = ["t1232DEAD", "T1234567F1AA", "r1230", "R1234567F4", "t7FF8DEADBEEF01020304"]
+
+
+def slcan_line(can_frame, byte_order):
+    """The SLCAN line an encoded can_frame stands for."""
+    can_id, dlc, data = struct.unpack(byte_order + 'IB3x8s', can_frame)
+    if can_id & CAN_EFF_FLAG:
+        text = f"{'R' if can_id & CAN_RTR_FLAG else 'T'}{can_id & 0x1FFFFFFF:08X}{dlc:X}"
+    else:
+        text = f"{'r' if can_id & CAN_RTR_FLAG else 't'}{can_id & 0x7FF:03X}{dlc:X}"
+    if not can_id & CAN_RTR_FLAG:
+        text += data[:dlc].hex().upper()
+    return text
+
+
+def encode_slcan(lines, link_header=None):
+    framer = SlcanFramer()
+    encoder = make_encoder(SLCAN, link_header)
+    framer.feed("".join(line + "\r" for line in lines).encode())
+    encoded = []
+    while (frame := framer.next_frame()) is not None:
+        encoded.append(bytes(encoder.encode(frame)))
+    return encoded
+
+
+def test_slcan_round_trip_without_link_header():
+    encoded = encode_slcan(SLCAN_LINES)
+    assert encoded[0] == bytes.fromhex('00000123' '02000000' 'dead000000000000')
+    assert encoded[1][:4] == bytes.fromhex('9234567f')
+    assert [slcan_line(frame, '>') for frame in encoded] == SLCAN_LINES
+
+
+def test_slcan_round_trip_behind_sll2():
+    encoded = encode_slcan(SLCAN_LINES, LINK_HEADER)
+    assert all(frame[:20] == LINK_HEADER for frame in encoded)
+    assert [slcan_line(frame[20:], '<') for frame in encoded] == SLCAN_LINES
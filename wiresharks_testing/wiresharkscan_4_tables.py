@@ -5,54 +5,59 @@ import sys
 import serial
 import argparse
 import os
+import asyncio
+import functools
+import queue
 import struct
 
-# --- IMPORT THE CRC16 LOOKUP TABLE ---
-from crc16_ccitt_table import crc16_table # This line imports the table from your file
+# --- IMPORT THE FRAMER (CRC16 lookup table + custom protocol constants live in can_framer.py) ---
+from can_framer import make_framer
+from frame_protocols import PROTOCOLS, DEFAULT_PROTOCOL, SLCAN, get_protocol
+from socketcan_encoder import make_encoder
+from slcan_framer import SLCAN_BITRATES, SLCAN_CLOSE_COMMAND, slcan_open_commands
+from protocol_detect import PROTOCOL_AUTO, detect_protocol, read_sample
+from replay_source import ReplaySource
+from device_clock import DeviceClock
+from metrics import MetricsRegistry, DEFAULT_METRICS_INTERVAL, FIFO_WRITE_BUCKETS, READ_SIZE_BUCKETS
+from capture_filter import CaptureFilter
+from extcap_control import ExtcapControl, control_interface_lines
+from capture_log import CaptureLog, LOG_FRAME, LOG_LEVELS, DEFAULT_LOG_LEVEL
+from serial_reader import SerialReader, END_OF_STREAM, DEFAULT_QUEUE_CHUNKS, get_chunk
+from async_capture import AsyncCapture
+from pcap_writer import (
+    PcapBatchWriter, DEFAULT_FLUSH_BYTES, DEFAULT_FLUSH_AGE,
+    pcapng_section_header, pcapng_interface_block,
+)
 
 # --- extcap Constants ---
 # These are standard DLT (Data Link Type) values for Wireshark
 DLT_SOCKETCAN = 227 # Standard Linux SocketCAN DLT
 EXTCAP_VERSION = "1.0"
+# The interfaces we show up as: the Teensy with its binary formats, and any SLCAN adapter
+# (slcan_framer.py), which always speaks SLCAN and doesn't need the format options
+INTERFACE_TEENSY = "wowcan"
+INTERFACE_SLCAN = "wowslcan"
+INTERFACES = (INTERFACE_TEENSY, INTERFACE_SLCAN)
 
-# --- Your Custom Protocol Constants ---
-SOF_FLOAT = 0xAA # First Start-of-Frame byte (floating preamble)
-SOF_WRAPPED = 0x69 # Second Start-of-Frame byte (wrapped, part of CRC)
-
-# --- START MODIFICATIONS HERE ---
 # Correct length for the standard Linux 'struct can_frame' that Wireshark DLT_SOCKETCAN expects
 # This includes 4 bytes for CAN ID, 1 byte for DLC, 3 bytes for padding, 8 bytes for data
 WIRESHARK_SOCKETCAN_FRAME_LEN = 16
 
-# This remains 13, as it's the size of the *actual* CAN content within your serial protocol
-# (ID, DLC, 8 data bytes)
-# Let's rename it for clarity to distinguish from Wireshark's expected frame size
-CUSTOM_CAN_CONTENT_LEN = 13
+# --- Multi-port captures ---
+# Plain DLT_SOCKETCAN has nowhere to say which port a frame came from, so when capturing
+# several ports at once every frame gets a 20-byte Linux "cooked" v2 header in front,
+# whose interface index field says which port it is (Wireshark: sll.ifindex == 1)
+# https://www.tcpdump.org/linktypes/LINKTYPE_LINUX_SLL2.html
+DLT_LINUX_SLL2 = 276
+ARPHRD_CAN = 280 # "hardware type" CAN
+ETH_P_CAN = 0x000C # "protocol" CAN, the payload is the same struct can_frame
+ETH_P_CANFD = 0x000D # "protocol" CAN FD, the payload is a struct canfd_frame
 
-CRC_LEN = 2 # Length of the CRC-16
 
-# Use CUSTOM_CAN_CONTENT_LEN for your protocol's CRC calculation and total packet length
-PACKET_LEN_CRC_COVERED = 1 + CUSTOM_CAN_CONTENT_LEN # Length of data covered by CRC (0x69 + custom CAN content) = 1 + 13 = 14 bytes
-PACKET_LEN_TOTAL = 1 + PACKET_LEN_CRC_COVERED + CRC_LEN # Total custom packet length (0xAA + 14 bytes + 2 bytes CRC) = 1 + 14 + 2 = 17 bytes
-# --- END MODIFICATIONS HERE ---
+def sll2_header(if_index, protocol=ETH_P_CAN):
+    """20-byte LINKTYPE_LINUX_SLL2 header for one port (all fields big-endian, address unused)."""
+    return struct.pack('>HHIHBB8x', protocol, 0, if_index, ARPHRD_CAN, 0, 0)
 
-# --- CRC-16 CCITT Parameters (matching your Teensy code) ---
-# CRC16_POLY = 0x1021 # No longer directly used in the table-driven function, but good to keep for reference
-CRC16_INIT = 0xFFFF
-
-# --- MODIFIED CRC-16 FUNCTION TO USE THE TABLE ---
-def crc16_ccitt_lookup(data_bytes: bytes, initial_value: int = CRC16_INIT) -> int:
-    """
-    Calculates CRC-16 CCITT using the pre-computed lookup table,
-    matching the logic of your Teensy code.
-    """
-    crc = initial_value
-    for byte_val in data_bytes:
-        # byte_val is an integer (0-255) when iterating over bytes
-        tbl_idx = ((crc >> 8) ^ byte_val) & 0xFF # high byte XOR input, ensure it's 8-bit index
-        crc = (crc << 8) ^ crc16_table[tbl_idx]
-        crc &= 0xFFFF # Ensure CRC stays 16-bit
-    return crc
 
 # python your_extcap_script.py --extcap-interfaces
 # wireshark is the "parent process"
@@ -115,7 +120,11 @@ def crc16_ccitt_lookup(data_bytes: bytes, initial_value: int = CRC16_INIT) -> in
 def print_extcap_interfaces():
     """Prints the extcap interfaces list."""
     print(f"extcap {{version={EXTCAP_VERSION}}}{os.linesep}", file=sys.stdout)
-    print(f"interface {{value=wowcan}}{{display=wowcan2shark}}{{help=Capture CAN data from Teensy via custom serial protocol}}{os.linesep}", file=sys.stdout)
+    print(f"interface {{value={INTERFACE_TEENSY}}}{{display=wowcan2shark}}{{help=Capture CAN data from Teensy via custom serial protocol}}{os.linesep}", file=sys.stdout)
+    print(f"interface {{value={INTERFACE_SLCAN}}}{{display=wowcan2shark SLCAN}}{{help=Capture CAN data from an SLCAN (Lawicel) serial adapter}}{os.linesep}", file=sys.stdout)
+    # Interface toolbar (extcap_control.py), used when Wireshark passes --extcap-control-in/out
+    for line in control_interface_lines(DEFAULT_LOG_LEVEL):
+        print(line, file=sys.stdout)
     sys.stdout.flush()
 
 def print_extcap_dlt():
@@ -123,8 +132,8 @@ def print_extcap_dlt():
     print(f"dlt {{value={DLT_SOCKETCAN}}}{{display=Linux SocketCAN (CAN Bus)}}{{linktype=CAN_2_0}}{os.linesep}", file=sys.stdout)
     sys.stdout.flush()
 
-def print_extcap_config():
-    """Prints the extcap configuration options."""
+def print_extcap_config(interface=INTERFACE_TEENSY):
+    """Prints the extcap configuration options (the SLCAN interface has no serial format options)."""
     # arg {number} must be unique for each argument
     # call={--arg-name} must match your argparse argument names
     # display is what user sees in Wireshark GUI
@@ -133,23 +142,237 @@ def print_extcap_config():
     # default (optional)
     # tooltip (optional)
 
-    print(f"arg {{number=0}}{{call=--serial-port}}{{display=Serial Port}}{{type=string}}{{required=true}}{{tooltip=The serial port (e.g., COM4 or /dev/ttyACM0)}}", file=sys.stdout)
+    print(f"arg {{number=0}}{{call=--serial-port}}{{display=Serial Port}}{{type=string}}{{required=true}}{{tooltip=The serial port (e.g., COM4 or /dev/ttyACM0), or several separated by commas (COM4,COM5) to capture them all in one session}}", file=sys.stdout)
     print(f"arg {{number=1}}{{call=--baudrate}}{{display=Baud Rate}}{{type=integer}}{{required=true}}{{default=115200}}{{tooltip=The serial baud rate (default: 115200)}}", file=sys.stdout)
+    print(f"arg {{number=2}}{{call=--flush-bytes}}{{display=Flush Size (bytes)}}{{type=integer}}{{required=false}}{{default={DEFAULT_FLUSH_BYTES}}}{{tooltip=Send buffered frames to Wireshark once this many bytes are waiting}}", file=sys.stdout)
+    print(f"arg {{number=3}}{{call=--flush-ms}}{{display=Max Flush Delay (ms)}}{{type=double}}{{required=false}}{{default={DEFAULT_FLUSH_AGE * 1000:g}}}{{tooltip=Send buffered frames to Wireshark once the oldest one is this old}}", file=sys.stdout)
+    print(f"arg {{number=4}}{{call=--log-level}}{{display=Log Level}}{{type=selector}}{{required=false}}{{default={DEFAULT_LOG_LEVEL}}}{{tooltip=stderr diagnostics: off, a once-per-second summary, or every frame (slow)}}", file=sys.stdout)
+    print(f"value {{arg=4}}{{value=off}}{{display=Off}}", file=sys.stdout)
+    print(f"value {{arg=4}}{{value=summary}}{{display=Summary (1 line/s)}}{{default=true}}", file=sys.stdout)
+    print(f"value {{arg=4}}{{value=frame}}{{display=Every frame}}", file=sys.stdout)
+    print(f"arg {{number=5}}{{call=--pipelined}}{{display=Separate reader thread}}{{type=boolflag}}{{required=false}}{{tooltip=Read the serial port on its own thread so it keeps draining while frames are decoded/written}}", file=sys.stdout)
+    print(f"arg {{number=6}}{{call=--queue-size}}{{display=Reader queue size (chunks)}}{{type=integer}}{{required=false}}{{default={DEFAULT_QUEUE_CHUNKS}}}{{tooltip=Max serial chunks waiting between the reader thread and the decoder}}", file=sys.stdout)
+    print(f"arg {{number=7}}{{call=--asyncio}}{{display=asyncio engine (Linux/macOS)}}{{type=boolflag}}{{required=false}}{{tooltip=Read the serial port and write the FIFO from one event loop, no polling}}", file=sys.stdout)
+    print(f"arg {{number=8}}{{call=--bus-names}}{{display=Bus names}}{{type=string}}{{required=false}}{{tooltip=Comma-separated labels for the serial ports, same order (e.g. powertrain,body)}}", file=sys.stdout)
+    print(f"arg {{number=9}}{{call=--pcapng}}{{display=pcapng output}}{{type=boolflag}}{{required=false}}{{tooltip=One interface per serial port and nanosecond timestamps}}", file=sys.stdout)
+    if interface == INTERFACE_TEENSY:
+        print(f"arg {{number=10}}{{call=--device-timestamps}}{{display=Device timestamps}}{{type=boolflag}}{{required=false}}{{tooltip=Frames carry the Teensy's micros() (21-byte format), use it for packet times}}", file=sys.stdout)
+    print(f"arg {{number=11}}{{call=--replay-file}}{{display=Replay file}}{{type=fileselect}}{{mustexist=true}}{{required=false}}{{tooltip=Decode a raw serial dump instead of the serial port}}", file=sys.stdout)
+    print(f"arg {{number=12}}{{call=--replay-paced}}{{display=Replay at line rate}}{{type=boolflag}}{{required=false}}{{tooltip=Play the replay file at the baud rate instead of as fast as possible}}", file=sys.stdout)
+    print(f"arg {{number=13}}{{call=--metrics-file}}{{display=Metrics file}}{{type=string}}{{required=false}}{{tooltip=Write capture counters here in Prometheus text format}}", file=sys.stdout)
+    if interface == INTERFACE_TEENSY:
+        print(f"arg {{number=14}}{{call=--canfd}}{{display=CAN FD}}{{type=boolflag}}{{required=false}}{{tooltip=Length-prefixed CAN FD frames (up to 64 data bytes, BRS/ESI flags), written as canfd_frame}}", file=sys.stdout)
+        print(f"arg {{number=15}}{{call=--protocol}}{{display=Serial format}}{{type=selector}}{{required=false}}{{default={DEFAULT_PROTOCOL}}}{{tooltip=Frame format the device sends (frame_protocols.py); Device timestamps / CAN FD pick the aa69 variants}}", file=sys.stdout)
+        print(f"value {{arg=15}}{{value={PROTOCOL_AUTO}}}{{display=Detect from the first few KB}}", file=sys.stdout)
+        for name, protocol in PROTOCOLS.items():
+            default = "{default=true}" if name == DEFAULT_PROTOCOL else ""
+            print(f"value {{arg=15}}{{value={name}}}{{display={protocol.description}}}{default}", file=sys.stdout)
+    else:
+        print(f"arg {{number=16}}{{call=--slcan-bitrate}}{{display=CAN bit rate}}{{type=selector}}{{required=false}}{{tooltip=Open the adapter's CAN channel at this rate (C, Sn, O commands); leave empty if it's already streaming}}", file=sys.stdout)
+        for name in SLCAN_BITRATES:
+            print(f"value {{arg=16}}{{value={name}}}{{display={name}bit/s}}", file=sys.stdout)
     sys.stdout.flush()
 
-def capture_loop(serial_port, fifo_path, baudrate):
+
+def write_frames(framer, writer, log, encoder, if_id=0, clock_source=time, control=None, capture_filter=None):
+    """
+    Pulls every complete frame out of the framer, converts it to a SocketCAN
+    frame and queues it on the pcap writer. Shared by the direct, pipelined
+    and asyncio capture loops.
+    encoder: the port's SocketCanEncoder (socketcan_encoder.py), which also carries the
+    per-port SLL2 header in multi-port legacy pcap.
+    if_id: per-port pcapng interface id (multi-port pcapng, no link header needed there).
+    clock_source: where time_ns()/monotonic_ns() come from, the time module, or a
+    ReplaySource's virtual line clock when replaying a dump.
+    With a timestamped framer each frame is stamped with the device's own time (framer.clock),
+    otherwise with the time this batch of frames was decoded.
+    control: the toolbar's ExtcapControl (extcap_control.py), if there is one: frames are still
+    decoded (to stay in sync) but not written while paused, or if their ID doesn't pass its filter.
+    capture_filter: the compiled --extcap-capture-filter (capture_filter.py), frames it
+    rejects are dropped right after the CRC check, before they're encoded.
+    """
+    # One clock read for the whole batch instead of one per frame: the frames all came out of
+    # the same read anyway. Device-stamped frames only need it as the arrival time for the clock fit.
+    clock = framer.clock
+    if clock is not None:
+        arrival_ns = clock_source.monotonic_ns()
+    else:
+        ts_ns = clock_source.time_ns()
+    # The toolbar settings are read once per batch too, the control thread may swap them any time
+    paused = False
+    id_filter = None
+    if control is not None:
+        paused = control.paused
+        id_filter = control.id_filter
+    # Try to find and process every full packet in the buffer
+    # The framer does the SOF_FLOAT / SOF_WRAPPED / CRC checks and resyncs on its own,
+    # it hands back a 17-byte memoryview into its buffer for each valid frame
+    while (current_packet_candidate := framer.next_frame()) is not None:
+        # If we reach here, the packet is valid!
+        if log.level >= LOG_FRAME: # check first so the hex formatting is skipped entirely otherwise
+            log.trace("Valid packet received. Raw: %s", current_packet_candidate.hex().upper())
+        if capture_filter is not None and not capture_filter.match(current_packet_candidate):
+            capture_filter.rejected += 1
+            continue
+        if paused:
+            continue
+        if id_filter is not None and encoder.can_id(current_packet_candidate) not in id_filter:
+            control.filtered += 1
+            continue
+
+        # --- SOCKETCAN FRAME CREATION ---
+        # ID, DLC and data get copied straight out of the framer's buffer into the encoder's
+        # preallocated 16-byte 'struct can_frame' (behind the link header, if the port has one)
+        socketcan_frame_payload = encoder.encode(current_packet_candidate)
+
+        if log.level >= LOG_FRAME:
+            log.trace("Prepared %d-byte SocketCAN payload: %s", len(socketcan_frame_payload), socketcan_frame_payload.hex().upper())
+
+        # --- 2. WRITE PCAP PACKET HEADER (FOR EACH PACKET) ---
+        # Nanoseconds as an int: pcapng keeps all of it, legacy pcap gets it cut down to microseconds
+        if clock is not None:
+            ts_ns = clock.stamp(encoder.device_ts(current_packet_candidate), arrival_ns)
+
+        # --- Queue pcap header (or pcapng EPB) + SocketCAN payload, the writer decides when to flush ---
+        # The writer packs the record header in place and copies the payload after it
+        # (orig_len: CAN FD records are cut short to their data, see socketcan_encoder.py)
+        writer.write_packet(ts_ns, socketcan_frame_payload, if_id, encoder.orig_len)
+
+
+def register_metrics(metrics, writer, framers, port_labels):
+    """
+    Hooks the framers' and the writer's own stats into the registry (read only when
+    the metrics get written) and gives them histograms to fill in, one entry per
+    serial read / FIFO write.
+    """
+    metrics.counter("serial_bytes_total", "Bytes read from the serial port(s)",
+                    fn=lambda: sum(framer.bytes_in for framer in framers))
+    read_sizes = metrics.histogram("serial_read_bytes", "Bytes per serial read", READ_SIZE_BUCKETS)
+    for framer, label in zip(framers, port_labels):
+        framer.read_sizes = read_sizes
+        metrics.gauge("ring_high_water_bytes", "Most unread bytes ever waiting in the frame buffer",
+                      fn=lambda framer=framer: framer.ring_high_water, labels={"port": label})
+    metrics.counter("fifo_bytes_total", "Bytes written to the Wireshark FIFO", fn=lambda: writer.bytes_written)
+    metrics.counter("fifo_writes_total", "Writes (flushes) to the Wireshark FIFO", fn=lambda: writer.flush_count)
+    metrics.counter("fifo_write_stalls_total", "FIFO writes that blocked for 10 ms or more", fn=lambda: writer.stalls)
+    metrics.counter("fifo_write_stall_seconds_total", "Time spent in stalled FIFO writes", fn=lambda: writer.stall_time)
+    writer.write_times = metrics.histogram("fifo_write_seconds", "Seconds per FIFO write", FIFO_WRITE_BUCKETS)
+
+
+def register_reader_metrics(metrics, readers, port_labels):
+    """Queue stats of the --pipelined reader threads."""
+    for reader, label in zip(readers, port_labels):
+        metrics.gauge("reader_queue_high_water_chunks", "Most chunks ever waiting between reader and decoder",
+                      fn=lambda reader=reader: reader.depth_high_water, labels={"port": label})
+        metrics.counter("reader_stalls_total", "Times the reader thread blocked on a full queue",
+                        fn=lambda reader=reader: reader.stalls, labels={"port": label})
+
+
+def capture_loop(serial_port, fifo_path, baudrate, flush_bytes=DEFAULT_FLUSH_BYTES, flush_age=DEFAULT_FLUSH_AGE,
+                 log_level=DEFAULT_LOG_LEVEL, pipelined=False, queue_size=DEFAULT_QUEUE_CHUNKS,
+                 use_asyncio=False, bus_names=None, pcapng=False, device_timestamps=False,
+                 replay_files=None, replay_paced=False, metrics_file=None, metrics_interval=DEFAULT_METRICS_INTERVAL,
+                 control_in=None, control_out=None, capture_filter=None, canfd=False,
+                 protocol=DEFAULT_PROTOCOL, slcan_bitrate=None):
     """
     Main capture loop: reads from serial, parses custom frames, and writes
     SocketCAN frames to the FIFO, prepended with a pcap global header
     and per-packet pcap headers.
+
+    serial_port can be a list of ports: they're all read at once and their frames are
+    interleaved into the one stream, each tagged with its port's interface index
+    (1 = first port, ...) in an SLL2 header. bus_names optionally labels them in the log.
+    Several ports need the pipelined or asyncio engine (pipelined is used if neither is picked).
+
+    pcapng=True writes pcapng instead of legacy pcap: one Interface Description Block per
+    port (DLT_SOCKETCAN, nanosecond timestamps) and Enhanced Packet Blocks, so several
+    ports don't need the SLL2 header, each frame just says which interface it's on.
+
+    device_timestamps=True expects the 21-byte frames with the Teensy's micros() counter in
+    them and uses that (unwrapped, offset + drift corrected, see device_clock.py) for the
+    packet timestamps instead of the time the frames were decoded.
+
+    replay_files (a list) reads raw serial dumps (replay_source.py) instead of serial_port,
+    each one standing in for a port, and stops when they're used up. They run as fast as
+    the decoder goes, or at the baudrate's line rate with replay_paced=True.
+
+    metrics_file: write counters/histograms there (Prometheus text format) every metrics_interval
+    seconds (metrics.py). A summary of them is logged at exit either way.
+
+    control_in / control_out: Wireshark's interface toolbar pipes (extcap_control.py). Log level,
+    ID filter and pause/resume come in on their own thread and the stats line goes out once
+    per summary interval from another, so the capture never waits on them.
+
+    capture_filter: --extcap-capture-filter text (capture_filter.py), compiled once here, e.g.
+    "id in 0x100-0x1FF and data[0] == 2". Only matching frames are encoded and written.
+
+    canfd=True expects the length-prefixed CAN FD frames (crc16_common.py, up to 64 data bytes)
+    and writes FD frames as SocketCAN canfd_frame records, cut down to their data length.
+
+    protocol: name of the serial frame format (frame_protocols.py), "aa69" by default.
+    device_timestamps / canfd pick its variant for aa69; device_timestamps also works
+    with the other formats that carry a device timestamp (crc32-25).
+    "auto" samples each port first and picks its format from that (protocol_detect.py),
+    the ports don't have to agree.
+
+    slcan_bitrate: for SLCAN adapters, open their CAN channel at this rate (a SLCAN_BITRATES
+    key) at the start and close it at the end. None leaves the adapter alone.
+
+    pipelined=True moves the serial reads to their own thread (serial_reader.py)
+    so the port keeps getting drained while this thread decodes or writes the FIFO.
+    use_asyncio=True runs the event-loop engine instead (async_capture.py, POSIX only):
+    the port is read on readiness events and the FIFO is written through an async transport.
     """
+    # All stderr output goes through this (capture_log.py): per-frame lines only at log_level='frame',
+    # otherwise discards/CRC errors are just counted and summarized once per second
+    # and the totals go into the metrics registry
+    metrics = MetricsRegistry(metrics_file, metrics_interval)
+    log = CaptureLog(log_level, metrics=metrics)
+    auto_detect = protocol == PROTOCOL_AUTO
+    if not auto_detect:
+        try:
+            protocol = get_protocol(protocol, device_timestamps, canfd)
+        except ValueError as e:
+            log.error("%s", e)
+            sys.exit(1)
+        log.info("Serial format: %s (%s)", protocol.name, protocol.description)
+    control = None
+    if control_in or control_out:
+        control = ExtcapControl(control_in, control_out, log)
+        log.listeners.append(control.on_summary)
     try:
         # serial.Serial(xxx,xxx,xxx) is a constructer call, or "call)"
         # it's calling a special method __init__ of the Serial class from the pyserial library
         # This creates a new instance, or object, of the Serial class
         # The newly created "Serial" object is then assigned to the variable "ser"
         # "ser" is now YOUR HANDLE TO INTERACT WITH THE SERIAL PORT
-        ser = serial.Serial(serial_port, baudrate, timeout=0.1)
+        # The read timeout can't be longer than flush_age, otherwise an idle line
+        # would hold buffered frames back until the next byte shows up
+        if replay_files:
+            # Raw dumps stand in for the ports, same pipeline from here on
+            serial_ports = replay_files
+            try:
+                sers = [ReplaySource(path, baudrate, replay_paced, timeout=min(0.1, flush_age)) for path in replay_files]
+            except OSError as e:
+                log.error("Error opening replay file: %s", e)
+                sys.exit(1)
+            if use_asyncio:
+                # add_reader() doesn't work on regular files
+                log.info("asyncio mode can't poll a replay file, using the regular loop instead.")
+                use_asyncio = False
+        else:
+            serial_ports = serial_port if isinstance(serial_port, (list, tuple)) else [serial_port]
+            sers = []
+            for port in serial_ports:
+                sers.append(serial.Serial(port, baudrate, timeout=min(0.1, flush_age)))
+            if slcan_bitrate:
+                for port_ser in sers:
+                    port_ser.write(slcan_open_commands(slcan_bitrate))
+                log.info("SLCAN channel opened at %sbit/s", slcan_bitrate)
+        ser = sers[0]
+        multi_port = len(sers) > 1
+        if multi_port and not (pipelined or use_asyncio):
+            pipelined = True # The direct loop can only block on one port at a time
         # For binary output, direct to buffer
         
         # this car, comeoes from ```--fifo``` argument passed to the script by wireshark
@@ -167,10 +390,9 @@ def capture_loop(serial_port, fifo_path, baudrate):
             fifo = sys.stdout.buffer
 
         # this line is for debugging
-        sys.stderr.write(f"extcap: Starting capture on {serial_port} at {baudrate} baud.\n")
+        log.info("Starting capture on %s at %d baud.", ", ".join(serial_ports), baudrate)
         # this line is for logging/debugging information 
-        sys.stderr.write(f"extcap: Writing to FIFO: {fifo_path or 'stdout'}\n")
-        sys.stderr.flush()
+        log.info("Writing to FIFO: %s", fifo_path or 'stdout')
 
         # --- 1. WRITE PCAP GLOBAL HEADER (ONCE) ---
         # https://wiki.wireshark.org/Development/LibpcapFileFormat
@@ -179,7 +401,7 @@ def capture_loop(serial_port, fifo_path, baudrate):
         # Time Zone Offset (0)
         # Sigfigs (0)
         # Snaplen (max packet length, 0xFFFF means no limit for 16-bit, or a large number for 32-bit)
-        # Link-layer type (DLT) - DLT_SOCKETCAN (227)
+        # Link-layer type (DLT) - DLT_SOCKETCAN (227), or DLT_LINUX_SLL2 (276) when capturing several ports
 
         # Using '<' for little-endian byte order
         # I, 0xA1B2C3D4, # magic_number (little-endian), so this is like exactly 4 bytes
@@ -197,165 +419,202 @@ def capture_loop(serial_port, fifo_path, baudrate):
             0, # tz_offset (GMT, in seconds) # this is 0x0000
             0, # sigfigs (accuracy of timestamps, usually 0) # this is 0x0000
             65535,  # snaplen (max bytes per packet, 65535 is common, or large enough for CAN)
-            DLT_SOCKETCAN # linktype (227 for Linux SocketCAN)
+            DLT_LINUX_SLL2 if multi_port else DLT_SOCKETCAN # linktype (227 for Linux SocketCAN) (not used with pcapng)
         )
         
-        fifo.write(pcap_global_header)
-        fifo.flush() # IMPORTANT: Ensure header is written immediately
-        sys.stderr.write(f"extcap: Wrote pcap global header: {pcap_global_header.hex()}\n")
-        sys.stderr.flush()
+        # What each port is called in the log / pcapng interface description
+        bus_names = bus_names or []
+        bus_labels = [bus_names[i] if i < len(bus_names) else port for i, port in enumerate(serial_ports)]
+
+        # Everything going to the FIFO goes through the batch writer (pcap_writer.py):
+        # records are packed into one buffer and flushed by size or age instead of once per frame
+        writer = PcapBatchWriter(fifo, flush_bytes, flush_age, pcapng)
+        if pcapng:
+            # pcapng instead: Section Header Block, then one Interface Description Block per port
+            # (all DLT_SOCKETCAN with nanosecond timestamps, interface ids 0, 1, 2... in port order)
+            writer.write(pcapng_section_header())
+            for port, bus in zip(serial_ports, bus_labels):
+                writer.write(pcapng_interface_block(DLT_SOCKETCAN, port, bus))
+            writer.flush() # IMPORTANT: Ensure header is written immediately
+            log.info("Wrote pcapng section header + %d interface block(s)", len(sers))
+        else:
+            writer.write(pcap_global_header)
+            writer.flush() # IMPORTANT: Ensure header is written immediately
+            log.info("Wrote pcap global header: %s", pcap_global_header.hex())
         # --- END PCAP GLOBAL HEADER ---
 
+        # --protocol auto: sample each port and decode it in whatever format the sample turns out to be in
+        # (protocol_detect.py). The sample goes into that port's framer below, so none of it is lost
+        samples = [b''] * len(sers)
+        if auto_detect:
+            port_protocols = []
+            for i, (port_ser, port) in enumerate(zip(sers, serial_ports)):
+                samples[i] = read_sample(port_ser)
+                detected, scores = detect_protocol(samples[i])
+                ranking = ", ".join(f"{name} {score:.2f}" for name, score in sorted(scores.items(), key=lambda item: -item[1])[:3])
+                if detected is None:
+                    detected = get_protocol(DEFAULT_PROTOCOL)
+                    log.error("%s: no serial format recognized in the first %d bytes (%s), using %s",
+                              port, len(samples[i]), ranking, detected.name)
+                else:
+                    log.info("%s: detected serial format %s (scores: %s)", port, detected.name, ranking)
+                port_protocols.append(detected)
+        else:
+            port_protocols = [protocol] * len(sers)
+
         # Partial packet buffer
-        # initializes and empty bytes object... its string tho?
-        # b'' IS NOT a string object, '' with the b prefix is a EMPTY bytes object... for raw binary data
-        partial_packet = b'' # initializes and empty bytes object... its string tho?
-        
-        while True: # Try to find and process a full packet, it will basically run contiously, until it is stopped
-            # Read all available bytes
+        # CanFramer keeps the incoming bytes in a preallocated bytearray with a read cursor (see frame_ring.py),
+        # so dropping a junk byte or a finished frame just moves the cursor instead of copying the whole buffer
+        # One framer per port (each port has its own byte stream to sync on)
+        # (A replayed dump's arrival times are made up, so its device timestamps are taken as they are)
+        framers = [make_framer(port_protocol, log=log, timestamped=device_timestamps,
+                               clock=DeviceClock(fit=False) if replay_files else None)
+                   for port_protocol in port_protocols]
+        framer = framers[0]
+        # And one frame writer per port, each with its own preallocated SocketCAN encoder: with several
+        # ports it tags each frame with the port's pcapng interface id, or in legacy pcap with the port's SLL2 header
+        # Replayed dumps also bring their own (virtual line-time) clock
+        clock_sources = sers if replay_files else [time] * len(sers)
+        compiled_filters = {} # one per serial format in use, by name
+        if capture_filter:
             try:
-                # bytes_to_read = ser.in_waiting or 1
-                # ser.in_waiting: This is the key. It tells you how many bytes are *currently* in the serial port's input buffer, waiting to be read.
-                # 'or 1': This is a Pythonic trick. If ser.in_waiting is 0 (meaning no bytes are waiting), it evaluates to 1.
-                #         So, bytes_to_read will be the number of waiting bytes, OR at least 1 byte if nothing is waiting.
-                # Purpose: This makes the ser.read() call below (mostly) non-blocking. It tries to read *available* bytes, or just one if it needs to check.
-                bytes_to_read = ser.in_waiting or 1 # reads bytes waiting in serial, or at least 1
-
-                # data = ser.read(bytes_to_read)
-                # This tries to read `bytes_to_read` bytes from the serial port.
-                # If the port is open but no data is coming in, and bytes_to_read was 1,
-                # ser.read(1) might return an empty bytes object (b'') after a short timeout (if configured),
-                # or it might block briefly until 1 byte arrives. The 'or 1' helps prevent indefinite blocking.
-                data = ser.read(bytes_to_read) # reads data from the serial port
+                for port_protocol in port_protocols:
+                    if port_protocol.name not in compiled_filters:
+                        compiled_filters[port_protocol.name] = CaptureFilter(capture_filter, port_protocol)
+            except ValueError as e:
+                log.error("Bad capture filter %r: %s", capture_filter, e)
+                sys.exit(1)
+            metrics.counter("capture_filter_rejected_total", "Valid frames dropped by the capture filter",
+                            fn=lambda: sum(compiled.rejected for compiled in compiled_filters.values()))
+            log.info("Capture filter: %s", capture_filter)
+        frame_writers = [functools.partial(write_frames, encoder=make_encoder(port_protocol), clock_source=clock_source,
+                                           control=control, capture_filter=compiled_filters.get(port_protocol.name))
+                         for port_protocol, clock_source in zip(port_protocols, clock_sources)]
+        if multi_port:
+            for i, (port, bus, port_protocol) in enumerate(zip(serial_ports, bus_labels, port_protocols)):
+                port_filter = compiled_filters.get(port_protocol.name)
+                if pcapng:
+                    frame_writers[i] = functools.partial(write_frames, encoder=make_encoder(port_protocol), if_id=i,
+                                                         clock_source=clock_sources[i], control=control,
+                                                         capture_filter=port_filter)
+                    log.info("Interface id %d = %s (bus '%s')", i, port, bus)
+                else:
+                    encoder = make_encoder(port_protocol, sll2_header(i + 1), sll2_header(i + 1, ETH_P_CANFD))
+                    frame_writers[i] = functools.partial(
+                        write_frames, encoder=encoder, clock_source=clock_sources[i],
+                        control=control, capture_filter=port_filter)
+                    log.info("Interface index %d = %s (bus '%s')", i + 1, port, bus)
+
+        register_metrics(metrics, writer, framers, bus_labels)
+        # The detection samples go first, as if they'd just been read
+        for port_framer, port_frame_writer, sample in zip(framers, frame_writers, samples):
+            if sample:
+                port_framer.feed(sample)
+                port_frame_writer(port_framer, writer, log)
+        if control is not None:
+            control.start()
+            log.info("Interface toolbar: control-in %s, control-out %s", control_in or "-", control_out or "-")
+
+        if use_asyncio:
+            engine = AsyncCapture(writer, log, flush_age)
+            for port_ser, port_framer, port_frame_writer in zip(sers, framers, frame_writers):
+                engine.add_port(port_ser, port_framer, port_frame_writer)
+            log.info("asyncio mode: reading on readiness events.")
+            asyncio.run(engine.run())
+
+        elif pipelined:
+            # One reader thread per port, all feeding the same queue, tagged with the port's position
+            chunk_queue = queue.Queue(maxsize=queue_size)
+            readers = [SerialReader(port_ser, out_queue=chunk_queue, tag=i) for i, port_ser in enumerate(sers)]
+            register_reader_metrics(metrics, readers, bus_labels)
+            for reader in readers:
+                reader.start()
+            log.info("Pipelined mode: %d reader thread(s) + %d-chunk queue.", len(readers), queue_size)
+            running = len(readers)
+            while running:
+                # Wait at most flush_age for a chunk so buffered frames still get flushed on time
+                tag, data = get_chunk(chunk_queue, flush_age)
+                if data is END_OF_STREAM:
+                    if readers[tag].error:
+                        raise readers[tag].error
+                    running -= 1
+                    continue
                 if data:
-                    pass
-            except Exception as e:
-                sys.stderr.write(f"extcap: Serial read error: {e}\n")
-                sys.stderr.flush()
-                time.sleep(0.01)
-                continue
-
-            if not data:
-                continue
-
-            partial_packet += data
-
-            while True: # Try to find and process a full packet from the buffer
-                # Stage 1: Find SOF_FLOAT (0xAA)
-                sof_float_idx = partial_packet.find(SOF_FLOAT.to_bytes(1, 'little'))
-                if sof_float_idx == -1:
-                    # No SOF_FLOAT found, clear buffer if it's too long to prevent overflow
-                    if len(partial_packet) > PACKET_LEN_TOTAL * 2: # Keep some window
-                        partial_packet = partial_packet[-PACKET_LEN_TOTAL:]
-                    break # Wait for more data
-
-                # Discard data before SOF_FLOAT
-                if sof_float_idx > 0:
-                    sys.stderr.write(f"extcap: Discarding {sof_float_idx} bytes before SOF_FLOAT.\n")
-                    sys.stderr.flush()
-                    partial_packet = partial_packet[sof_float_idx:]
-                    sof_float_idx = 0 # Now SOF_FLOAT is at index 0
-
-                # Stage 2: Check if enough bytes for a full packet
-                if len(partial_packet) < PACKET_LEN_TOTAL:
-                    break # Not enough data for a full packet, wait for more
-
-                # We have a potential full packet (17 bytes) starting with SOF_FLOAT
-                current_packet_candidate = partial_packet[:PACKET_LEN_TOTAL]
-
-                # Stage 3: Validate SOF_WRAPPED (0x69)
-                if current_packet_candidate[1] != SOF_WRAPPED:
-                    sys.stderr.write(f"extcap: Mismatch on SOF_WRAPPED. Expected {SOF_WRAPPED:02X}, got {current_packet_candidate[1]:02X}. Discarding packet.\n")
-                    sys.stderr.flush()
-                    partial_packet = partial_packet[1:] # Discard SOF_FLOAT and re-scan from next byte
-                    continue # Try again with the truncated buffer
-
-                # Stage 4: Validate CRC
-                # CRC is calculated over bytes from SOF_WRAPPED (index 1) to end of data (index 14)
-                data_for_crc = current_packet_candidate[1 : 1 + PACKET_LEN_CRC_COVERED]
-                received_crc_bytes = current_packet_candidate[1 + PACKET_LEN_CRC_COVERED : PACKET_LEN_TOTAL]
-                
-                # Reconstruct received CRC (big-endian because Teensy sends MSB then LSB)
-                received_crc = (received_crc_bytes[0] << 8) | received_crc_bytes[1]
-                
-                # --- CALL THE NEW CRC LOOKUP FUNCTION ---
-                calculated_crc = crc16_ccitt_lookup(data_for_crc)
-
-                if received_crc != calculated_crc:
-                    sys.stderr.write(f"extcap: CRC mismatch! Calculated {calculated_crc:04X}, Received {received_crc:04X}. Discarding packet.\n")
-                    sys.stderr.flush()
-                    partial_packet = partial_packet[1:] # Discard SOF_FLOAT and re-scan
-                    continue # Try again with the truncated buffer
-
-                # If we reach here, the packet is valid!
-                sys.stderr.write(f"extcap: Valid packet received. Raw: {current_packet_candidate.hex().upper()}\n")
-                sys.stderr.flush()
-
-                # --- START CORE MODIFICATIONS FOR SOCKETCAN FRAME CREATION ---
-                # Extract the components of the CAN message from your custom 17-byte serial packet.
-                # Custom Packet Format: 0xAA | 0x69 | CAN_ID(4) | DLC(1) | CAN_DATA(8) | CRC(2)
-                # Indices: 0       1        2-5         6         7-14          15-16
-                can_id_bytes = current_packet_candidate[2:6]
-                dlc_byte = current_packet_candidate[6] # This is already an integer byte
-                can_data_bytes = current_packet_candidate[7:15]
-
-                # Convert the raw CAN ID bytes to an integer for struct.pack
-                can_id_int = struct.unpack('<I', can_id_bytes)[0]
-                
-                # Construct the 16-byte standard Linux 'struct can_frame' payload
-                # Format: '<IB3x8s'
-                #   '<' : little-endian byte order
-                #   'I' : unsigned int (4 bytes) for can_id
-                #   'B' : unsigned char (1 byte) for can_dlc
-                #   '3x': 3 pad bytes (Wireshark expects this for DLT_SOCKETCAN)
-                #   '8s': 8-byte string/bytes for data[8]
-                socketcan_frame_payload = struct.pack(
-                    '<IB3x8s',
-                    can_id_int, # The 4-byte CAN ID as an integer
-                    dlc_byte, # The 1-byte DLC as an integer
-                    can_data_bytes # The 8-byte CAN data as a bytes object
-                )
-
-                sys.stderr.write(f"extcap: Prepared {len(socketcan_frame_payload)}-byte SocketCAN payload: {socketcan_frame_payload.hex().upper()}\n")
-                sys.stderr.flush()
-                # --- END CORE MODIFICATIONS ---
-
-                # --- 2. WRITE PCAP PACKET HEADER (FOR EACH PACKET) ---
-                current_time = time.time()
-                ts_sec = int(current_time)
-                ts_usec = int((current_time - ts_sec) * 1_000_000) # Convert fraction to microseconds
-
-                pcap_packet_header = struct.pack(
-                    '<IIII',
-                    ts_sec, # Timestamp seconds
-                    ts_usec, # Timestamp microseconds
-                    WIRESHARK_SOCKETCAN_FRAME_LEN, # Captured packet length (must be 16)
-                    WIRESHARK_SOCKETCAN_FRAME_LEN # Original packet length (must be 16)
-                )
-                fifo.write(pcap_packet_header)
-                # --- END PCAP PACKET HEADER ---
-
-                # --- Write the 16-byte SocketCAN payload to the FIFO ---
-                fifo.write(socketcan_frame_payload) # Write the correctly structured 16-byte payload
-                fifo.flush() # Ensure data is written immediately
-
-                # Remove the processed packet from the buffer
-                partial_packet = partial_packet[PACKET_LEN_TOTAL:]
+                    framers[tag].feed(data)
+                    frame_writers[tag](framers[tag], writer, log)
+                writer.poll()
+                log.tick()
+
+        else:
+            while True: # Try to find and process a full packet, it will basically run contiously, until it is stopped
+                # Read all available bytes
+                try:
+                    # bytes_to_read = ser.in_waiting or 1
+                    # ser.in_waiting: This is the key. It tells you how many bytes are *currently* in the serial port's input buffer, waiting to be read.
+                    # 'or 1': This is a Pythonic trick. If ser.in_waiting is 0 (meaning no bytes are waiting), it evaluates to 1.
+                    #         So, bytes_to_read will be the number of waiting bytes, OR at least 1 byte if nothing is waiting.
+                    # Purpose: This makes the ser.read() call below (mostly) non-blocking. It tries to read *available* bytes, or just one if it needs to check.
+                    bytes_to_read = ser.in_waiting or 1 # reads bytes waiting in serial, or at least 1
+
+                    # data = ser.read(bytes_to_read)
+                    # This tries to read `bytes_to_read` bytes from the serial port.
+                    # If the port is open but no data is coming in, and bytes_to_read was 1,
+                    # ser.read(1) might return an empty bytes object (b'') after a short timeout (if configured),
+                    # or it might block briefly until 1 byte arrives. The 'or 1' helps prevent indefinite blocking.
+                    data = ser.read(bytes_to_read) # reads data from the serial port
+                    if data:
+                        pass
+                except Exception as e:
+                    log.error("Serial read error: %s", e)
+                    time.sleep(0.01)
+                    continue
+
+                if not data:
+                    if replay_files and ser.at_eof:
+                        break # Whole dump decoded
+                    writer.poll() # Nothing new, but frames already buffered may be due
+                    log.tick()
+                    continue
+
+                framer.feed(data)
+                frame_writers[0](framer, writer, log)
+
+                writer.poll() # Flush if the oldest buffered frame is older than flush_age
+                log.tick() # Once-per-second summary line (frames, discarded bytes, CRC errors)
 
     except serial.SerialException as e:
-        sys.stderr.write(f"extcap: Error opening serial port: {e}\n")
-        sys.stderr.flush()
+        log.error("Error opening serial port: %s", e)
         sys.exit(1)
     except KeyboardInterrupt:
-        sys.stderr.write("extcap: Capture interrupted.\n")
-        sys.stderr.flush()
+        log.info("Capture interrupted.")
     finally:
-        if 'ser' in locals() and ser.is_open:
-            ser.close()
+        if control is not None:
+            control.stop()
+        if 'readers' in locals():
+            for reader in readers:
+                reader.stop()
+                log.info("%s", reader.stats_line())
+        if 'writer' in locals():
+            writer.flush() # Don't lose frames still sitting in the batch buffer
+        # Final numbers: fold in the last partial interval, write the metrics file once more, log a summary
+        log.fold()
+        try:
+            metrics.publish()
+        except OSError as e:
+            log.error("Can't write the metrics file: %s", e)
+        for line in metrics.summary_lines():
+            log.info("metrics: %s", line)
+        for port_ser in locals().get('sers', []):
+            if port_ser.is_open:
+                if slcan_bitrate and not replay_files:
+                    try:
+                        port_ser.write(SLCAN_CLOSE_COMMAND)
+                    except (serial.SerialException, OSError):
+                        pass
+                port_ser.close()
         if 'fifo' in locals() and fifo != sys.stdout.buffer:
             fifo.close()
-        sys.stderr.write("extcap: Capture finished.\n")
-        sys.stderr.flush()
+        log.info("Capture finished.")
 
 
 def main():
@@ -369,9 +628,9 @@ def main():
     parser.add_argument("--extcap-interfaces", action="store_true", help="List available interfaces")
     parser.add_argument("--extcap-dlts", action="store_true", help="List DLTs for a given interface")
     parser.add_argument("--extcap-interface", help="Specify the interface to capture on (e.g., teensy_can)")
-    parser.add_argument("--extcap-capture-filter", help="Not supported by this extcap")
-    parser.add_argument("--extcap-control-in", help="Not supported by this extcap")
-    parser.add_argument("--extcap-control-out", help="Not supported by this extcap")
+    parser.add_argument("--extcap-capture-filter", help="Only capture matching frames, e.g. 'id in 0x100-0x1FF and data[0] == 2'")
+    parser.add_argument("--extcap-control-in", help="Interface toolbar pipe, Wireshark -> extcap")
+    parser.add_argument("--extcap-control-out", help="Interface toolbar pipe, extcap -> Wireshark")
     parser.add_argument("--extcap-version", action="store_true", help="Print extcap version")
     parser.add_argument("--capture", action="store_true", help="Start capturing")
     parser.add_argument("--fifo", help="Named pipe (FIFO) to write captured data to")
@@ -381,14 +640,35 @@ def main():
     # --- END ADDITION ---
     
     # Custom arguments for our specific extcap
-    parser.add_argument("--serial-port", required=False, help="Serial port to connect to (e.g., COM4 or /dev/ttyACM0)")
+    parser.add_argument("--serial-port", required=False, help="Serial port to connect to (e.g., COM4 or /dev/ttyACM0), or several separated by commas")
+    parser.add_argument("--bus-names", help="Comma-separated labels for the ports in --serial-port (e.g. powertrain,body)")
     parser.add_argument("--baudrate", type=int, default=115200, help="Serial baud rate (default: 115200)")
+    parser.add_argument("--flush-bytes", type=int, default=DEFAULT_FLUSH_BYTES, help=f"Flush buffered frames to the FIFO at this many bytes (default: {DEFAULT_FLUSH_BYTES})")
+    parser.add_argument("--log-level", choices=sorted(LOG_LEVELS), default=DEFAULT_LOG_LEVEL, help=f"stderr diagnostics: off, summary (1 line/s) or frame (every frame, slow) (default: {DEFAULT_LOG_LEVEL})")
+    parser.add_argument("--pipelined", action="store_true", help="Read the serial port on a separate thread, decode on the main thread")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_CHUNKS, help=f"Max chunks queued between reader and decoder in --pipelined mode (default: {DEFAULT_QUEUE_CHUNKS})")
+    parser.add_argument("--asyncio", action="store_true", help="Use the asyncio engine: serial fd + FIFO on one event loop (POSIX only)")
+    parser.add_argument("--pcapng", action="store_true", help="Write pcapng (per-port interfaces, nanosecond timestamps) instead of legacy pcap")
+    parser.add_argument("--replay-file", help="Decode a raw serial dump (or several, separated by commas) instead of --serial-port")
+    parser.add_argument("--replay-paced", action="store_true", help="Play --replay-file at the --baudrate line rate instead of as fast as possible")
+    parser.add_argument("--metrics-file", help="Write capture metrics to this file (Prometheus text format) while capturing")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_METRICS_INTERVAL, help=f"Seconds between --metrics-file updates (default: {DEFAULT_METRICS_INTERVAL:g})")
+    parser.add_argument("--protocol", choices=[PROTOCOL_AUTO] + list(PROTOCOLS), default=DEFAULT_PROTOCOL, help=f"Serial frame format, see frame_protocols.py, or {PROTOCOL_AUTO} to detect it (default: {DEFAULT_PROTOCOL})")
+    parser.add_argument("--slcan-bitrate", choices=list(SLCAN_BITRATES), help="Open the SLCAN adapter's CAN channel at this bit rate (only on the SLCAN interface)")
+    parser.add_argument("--canfd", action="store_true", help="Length-prefixed CAN FD frames (up to 64 data bytes), written as canfd_frame")
+    parser.add_argument("--device-timestamps", action="store_true", help="Frames carry the device's microsecond counter (21-byte format), use it for packet timestamps")
+    parser.add_argument("--flush-ms", type=float, default=DEFAULT_FLUSH_AGE * 1000, help=f"Flush buffered frames once the oldest is this many ms old (default: {DEFAULT_FLUSH_AGE * 1000:g})")
 
     # argparse helps your python script understand command from the outside
     # wireshark uses specific --ectcap- commands to talk to your script
     # ```args``` holds all those command calues for your script to use
     # ```args = parser.parse_args()``` thats where it checks which command it received
     args = parser.parse_args()
+    if args.extcap_interface == INTERFACE_SLCAN:
+        # The SLCAN interface is the same capture with the format fixed (its config has no format options)
+        args.protocol = SLCAN.name
+        args.canfd = False
+        args.device_timestamps = False
 
     # wireshark runs the script with extcap-interfaces, this is the first thing it does, to discover what plugins are available
     # The script detects if this argument is "True" and then run runs ```print_extcap_interfaces()```
@@ -400,9 +680,9 @@ def main():
     # if a user selects "wowcan" interface, or if wireshark wants to know more about it, it will run the script AGAIN
     # this time it will run the script with ```--extcap-dlts``` and also run it with ```---extcap-interface wowcan```
         # this check ensures that wireshark is asking for DLTs for your specific interface, "wowcan", if it's not available, there is an error
-        if not args.extcap_interface or args.extcap_interface != "wowcan": # Ensure it's for our interface
+        if args.extcap_interface not in INTERFACES: # Ensure it's for one of our interfaces
             # this is what writes the error if there is a "problem" with the interface...
-            sys.stderr.write("extcap: --extcap-dlts requires --extcap-interface and must be 'wowcan'\n")
+            sys.stderr.write(f"extcap: --extcap-dlts requires --extcap-interface and must be one of {', '.join(INTERFACES)}\n")
             sys.stderr.flush()
             # if there is a problem, the script exits, with a non-zero status code, tell the os, and wireshark that an error occured
             # it also means that the program terminates imediately... running with anything other than zero, is a exit code status
@@ -418,12 +698,12 @@ def main():
     elif args.extcap_config:
         # When Wireshark calls --extcap-config, it also provides --extcap-interface
         # so wowcan is like the only interface we have for extcap... so, this just makes an error if its not avalable
-        if not args.extcap_interface or args.extcap_interface != "wowcan": # Ensure it's for our interface
-            sys.stderr.write("extcap: --extcap-config requires --extcap-interface and must be 'wowcan'\n")
+        if args.extcap_interface not in INTERFACES: # Ensure it's for one of our interfaces
+            sys.stderr.write(f"extcap: --extcap-config requires --extcap-interface and must be one of {', '.join(INTERFACES)}\n")
             sys.stderr.flush()
             sys.exit(1)
         # this send the configuration arguments like ```--serial-port``` and ```--baudrate``` so wireshark can display them in the gui`
-        print_extcap_config()
+        print_extcap_config(args.extcap_interface)
     # --- END NEW BLOCK ---
     
     # wireshark can querie extcap tool for it's version number, and the script prints `EXTCAP_VERSION = "1.0"`` to stdout
@@ -431,11 +711,31 @@ def main():
         print(EXTCAP_VERSION)
         sys.stdout.flush()
     elif args.capture:
-        if not args.serial_port:
-            sys.stderr.write("extcap: --serial-port is required for capture.\n")
+        if not args.serial_port and not args.replay_file:
+            sys.stderr.write("extcap: --serial-port (or --replay-file) is required for capture.\n")
             sys.stderr.flush()
             sys.exit(1)
-        capture_loop(args.serial_port, args.fifo, args.baudrate)
+        serial_ports = [port.strip() for port in (args.serial_port or "").split(",") if port.strip()]
+        replay_files = [path.strip() for path in args.replay_file.split(",") if path.strip()] if args.replay_file else None
+        bus_names = [name.strip() for name in args.bus_names.split(",")] if args.bus_names else None
+        capture_loop(serial_ports if len(serial_ports) != 1 else serial_ports[0], args.fifo, args.baudrate, args.flush_bytes, args.flush_ms / 1000.0,
+                     args.log_level, args.pipelined, args.queue_size,
+                     args.asyncio, bus_names, args.pcapng, args.device_timestamps,
+                     replay_files, args.replay_paced, args.metrics_file, args.metrics_interval,
+                     args.extcap_control_in, args.extcap_control_out, args.extcap_capture_filter, args.canfd,
+                     args.protocol, args.slcan_bitrate)
+    # Wireshark checks a capture filter as it's typed by running us with just
+    # --extcap-interface and --extcap-capture-filter: no output means it's valid,
+    # otherwise whatever we print is shown as the reason it isn't
+    elif args.extcap_capture_filter is not None:
+        if args.extcap_capture_filter.strip():
+            try:
+                # With auto the format isn't known yet, check it against the default layout (or the FD one)
+                name = DEFAULT_PROTOCOL if args.protocol == PROTOCOL_AUTO else args.protocol
+                CaptureFilter(args.extcap_capture_filter, get_protocol(name, args.device_timestamps, args.canfd))
+            except ValueError as e:
+                print(e)
+        sys.stdout.flush()
     else:
         parser.print_help()
         sys.exit(1)